@@ -1,16 +1,32 @@
+import logging
 import os
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import FileResponse
+from urllib.parse import quote
+from fastapi import APIRouter, Depends, HTTPException, Header, Query
+from fastapi.responses import FileResponse, StreamingResponse
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import StaleDataError
 from app.core.db import get_db
 from app.core.deps import require_admin
+from app.models.document import Document
 from app.repositories.user_repo import UserRepo
 from app.repositories.document_repo import DocumentRepo
 from app.schemas.user import UserOut
-from app.schemas.document import DocumentOut, AdminReviewIn
-from app.core.config import settings
+from app.schemas.document import (
+    DocumentOut, AdminReviewIn, BulkReviewIn, BulkReviewOut, BulkReviewResult,
+    DocumentVersionOut, StorageConsumerOut, StorageQuotaIn, StorageUsageOut,
+)
+from app.services.activity_logger import log_activities, log_activity
+from app.services.client_counters import recompute_client_counters
+from app.services import document_versions
+from app.services.previews import preview_response
+from app.services.review_queue import claimed_by_other
+from app.services import storage_quota
+from app.services.scanner import BLOCKED_STATUSES
+from app.services.storage import document_path
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
 @router.get("/customers", response_model=list[UserOut])
 def list_customers(db: Session = Depends(get_db), admin = Depends(require_admin)):
@@ -25,12 +41,48 @@ def download_any(doc_id:int, db: Session = Depends(get_db), admin = Depends(requ
     doc = DocumentRepo(db).get(doc_id)
     if not doc:
         raise HTTPException(404, "No encontrado")
-    path = os.path.join(settings.UPLOAD_DIR, doc.stored_name)
-    print(f"DEBUG DOWNLOAD: ID={doc_id}, Stored={doc.stored_name}, Path={path}, Exists={os.path.exists(path)}")
+    if doc.status in BLOCKED_STATUSES:
+        raise HTTPException(423, "Documento en análisis antivirus o bloqueado")
+    path = document_path(doc.stored_name)
     if not os.path.exists(path):
+        logger.warning("Archivo físico no encontrado: documento %s, %s", doc_id, path)
         raise HTTPException(404, f"Archivo físico no encontrado: {path}")
     return FileResponse(path, media_type=doc.mime_type, filename=doc.original_name)
 
+@router.get("/documents/{doc_id}/preview")
+def preview_any(doc_id:int, if_none_match: str | None = Header(None), db: Session = Depends(get_db), admin = Depends(require_admin)):
+    """Miniatura WebP del documento (cacheable) para la pantalla de revisión"""
+    doc = DocumentRepo(db).get(doc_id)
+    if not doc:
+        raise HTTPException(404, "No encontrado")
+    return preview_response(doc, if_none_match)
+
+@router.get("/documents/{doc_id}/versions", response_model=list[DocumentVersionOut])
+def list_document_versions(doc_id:int, db: Session = Depends(get_db), admin = Depends(require_admin)):
+    """Versiones anteriores del documento, de la más reciente a la más antigua"""
+    if not DocumentRepo(db).get(doc_id):
+        raise HTTPException(404, "No encontrado")
+    return document_versions.list_versions(db, doc_id)
+
+@router.get("/documents/{doc_id}/versions/{version}/download")
+def download_document_version(doc_id:int, version:int, db: Session = Depends(get_db), admin = Depends(require_admin)):
+    """Descargar una versión anterior (las archivadas con gzip se descomprimen al vuelo)"""
+    v = document_versions.get_version(db, doc_id, version)
+    if not v:
+        raise HTTPException(404, "Versión no encontrada")
+    if v.status in BLOCKED_STATUSES:
+        raise HTTPException(423, "Versión bloqueada por el antivirus")
+    path = document_versions.version_path(v)
+    if not os.path.exists(path):
+        logger.warning("Archivo de versión no encontrado: documento %s v%s, %s", doc_id, version, path)
+        raise HTTPException(404, "Archivo físico no encontrado")
+    if v.compression is None:
+        return FileResponse(path, media_type=v.mime_type, filename=v.original_name)
+    return StreamingResponse(
+        document_versions.iter_version_file(v), media_type=v.mime_type,
+        headers={"Content-Disposition": f"attachment; filename*=utf-8''{quote(v.original_name)}"},
+    )
+
 @router.put("/documents/{doc_id}", response_model=DocumentOut)
 @router.patch("/documents/{doc_id}", response_model=DocumentOut)
 def review_document(doc_id:int, data: AdminReviewIn, db: Session = Depends(get_db), admin = Depends(require_admin)):
@@ -40,10 +92,18 @@ def review_document(doc_id:int, data: AdminReviewIn, db: Session = Depends(get_d
     doc = repo.get(doc_id)
     if not doc:
         raise HTTPException(404, "No encontrado")
-    updated_doc = repo.review(doc=doc, status=data.status, admin_notes=data.admin_notes)
+    if doc.status in BLOCKED_STATUSES:
+        raise HTTPException(409, "El documento no ha pasado el análisis antivirus")
+    if claimed_by_other(doc, admin.id):
+        raise HTTPException(409, "Otro administrador está revisando este documento")
+    try:
+        updated_doc = repo.review(doc=doc, status=data.status, admin_notes=data.admin_notes)
+    except StaleDataError:
+        # El cliente subió una versión nueva mientras tanto: no aprobarla sin verla
+        db.rollback()
+        raise HTTPException(409, "El cliente ha reemplazado el documento; revisa la versión nueva")
 
     # Log activity
-    from app.services.activity_logger import log_activity
     status_es = "aprobado" if data.status == "approved" else "rechazado"
     log_activity(
         db=db,
@@ -57,43 +117,108 @@ def review_document(doc_id:int, data: AdminReviewIn, db: Session = Depends(get_d
 
     return updated_doc
 
-from app.models.client import Client
-from app.models.user import User
+STALE_REVIEW_DETAIL = "El documento se reemplazó durante la revisión. Vuelve a revisarlo"
+
+def _bulk_review_pass(db: Session, items, admin, stale: set[int]):
+    """Validar y aplicar (sin confirmar) la revisión en bloque; stale son los
+    documentos que cambiaron en un intento anterior y se devuelven como 409"""
+    ids = {item.doc_id for item in items}
+    docs = {doc.id: doc for doc in DocumentRepo(db).get_many_for_update(ids)}
+
+    results, activities, seen, affected_users, read_versions = [], [], set(), set(), {}
+    for item in items:
+        doc = docs.get(item.doc_id)
+        if item.doc_id in seen:
+            error = (400, "Documento repetido en la petición")
+        elif item.status not in ("approved", "rejected"):
+            error = (400, "status debe ser 'approved' o 'rejected'")
+        elif not doc:
+            error = (404, "No encontrado")
+        elif item.doc_id in stale:
+            error = (409, STALE_REVIEW_DETAIL)
+        elif doc.status in BLOCKED_STATUSES:
+            error = (409, "El documento no ha pasado el análisis antivirus")
+        elif claimed_by_other(doc, admin.id):
+            error = (409, "Otro administrador está revisando este documento")
+        else:
+            error = None
+        seen.add(item.doc_id)
+
+        if error:
+            results.append(BulkReviewResult(doc_id=item.doc_id, ok=False, status_code=error[0], detail=error[1]))
+            continue
+
+        read_versions[doc.id] = doc.version
+        doc.status = item.status
+        doc.admin_notes = item.admin_notes
+        doc.claimed_by_id = None
+        doc.claimed_until = None
+        affected_users.add(doc.user_id)
+        status_es = "aprobado" if item.status == "approved" else "rechazado"
+        activities.append({
+            "activity_type": f"document_{item.status}",
+            "title": f"Documento {status_es}",
+            "description": f"Admin revisó {doc.category}",
+            "user_id": doc.user_id,
+            "performed_by_id": admin.id,
+            "performed_by_email": admin.email,
+        })
+        results.append(BulkReviewResult(doc_id=item.doc_id, ok=True, status_code=200, status=item.status))
+    return results, activities, affected_users, read_versions
+
+@router.post("/documents/bulk-review", response_model=BulkReviewOut)
+def bulk_review_documents(data: BulkReviewIn, db: Session = Depends(get_db), admin = Depends(require_admin)):
+    """Revisar varios documentos en una sola transacción.
+
+    Cada elemento se valida igual que en la revisión individual y devuelve su
+    propio resultado; los que fallan no impiden aplicar el resto. Las
+    actividades se insertan en bloque y los contadores de cada cliente
+    afectado se recalculan una sola vez. Si un documento se reemplaza entre
+    medias (StaleDataError) se deshace todo, ese documento queda como 409 y el
+    resto se aplica en un segundo intento.
+    """
+    stale: set[int] = set()
+    for attempt in range(2):
+        results, activities, affected_users, read_versions = _bulk_review_pass(db, data.items, admin, stale)
+        if not activities:
+            break
+        try:
+            db.flush()
+            log_activities(db, activities)
+            recompute_client_counters(db, sorted(affected_users), commit=False)
+            db.commit()
+            break
+        except StaleDataError:
+            db.rollback()
+            current = dict(db.execute(
+                select(Document.id, Document.version).where(Document.id.in_(read_versions))
+                .execution_options(include_deleted=True)
+            ).all())
+            stale |= {doc_id for doc_id, version in read_versions.items() if current.get(doc_id) != version}
+    else:
+        # También falló el segundo intento: no se aplicó nada
+        results = [
+            r if not r.ok else BulkReviewResult(doc_id=r.doc_id, ok=False, status_code=409, detail=STALE_REVIEW_DETAIL)
+            for r in results
+        ]
+        activities = []
+
+    return BulkReviewOut(updated=len(activities), results=results)
+
 import csv
 import io
-from fastapi.responses import StreamingResponse
+from app.schemas.job import JobOut
+from app.services.job_queue import enqueue
+from app.services.tasks import DASHBOARD_HEADERS, dashboard_rows
 
 @router.get("/export/dashboard", response_class=StreamingResponse)
 def export_dashboard_csv(db: Session = Depends(get_db), admin = Depends(require_admin)):
-    # Query clients with user email
-    results = db.query(Client, User.email).join(User, Client.user_id == User.id).all()
-    
     output = io.StringIO()
     writer = csv.writer(output)
-    
-    # Headers
-    writer.writerow([
-        "ID", "Nombres", "Apellidos", "Email", "Teléfono", 
-        "Destino", "Visa", "Estado", "Progreso (%)", 
-        "Docs Totales", "Docs Pendientes", "Fecha Registro"
-    ])
-    
-    for client, email in results:
-        writer.writerow([
-            client.id,
-            client.first_name or "",
-            client.last_name or "",
-            email,
-            client.phone or "",
-            client.destination_country or "",
-            client.visa_type or "",
-            client.status,
-            client.progress,
-            client.total_documents,
-            client.pending_documents,
-            client.created_at.strftime("%Y-%m-%d %H:%M")
-        ])
-        
+    writer.writerow(DASHBOARD_HEADERS)
+    for row in dashboard_rows(db):
+        writer.writerow(row)
+
     output.seek(0)
     
     response = StreamingResponse(
@@ -103,6 +228,43 @@ def export_dashboard_csv(db: Session = Depends(get_db), admin = Depends(require_
     response.headers["Content-Disposition"] = "attachment; filename=reporte_clientes.csv"
     return response
 
+@router.post("/export/dashboard/async", response_model=JobOut, status_code=202)
+def export_dashboard_async(db: Session = Depends(get_db), admin = Depends(require_admin)):
+    """Generar el reporte en segundo plano; descargar luego en /admin/jobs/{id}/download"""
+    return enqueue(db, "export_dashboard_csv", priority=5, created_by_id=admin.id)
+
+@router.post("/customers/{user_id}/dossier", response_model=JobOut, status_code=202)
+def build_dossier(user_id:int, db: Session = Depends(get_db), admin = Depends(require_admin)):
+    """Empaquetar en ZIP todos los documentos de un cliente en segundo plano"""
+    if not UserRepo(db).get_by_id(user_id):
+        raise HTTPException(404, "Usuario no encontrado")
+    return enqueue(db, "dossier_zip", {"user_id": user_id}, priority=5, created_by_id=admin.id)
+
+@router.post("/clients/reconcile-counters", response_model=JobOut, status_code=202)
+def reconcile_counters(db: Session = Depends(get_db), admin = Depends(require_admin)):
+    """Recalcular contadores de documentos de todos los clientes en segundo plano"""
+    return enqueue(db, "reconcile_client_counters", created_by_id=admin.id)
+
+@router.post("/storage/gc", response_model=JobOut, status_code=202)
+def run_storage_gc(db: Session = Depends(get_db), admin = Depends(require_admin)):
+    """Purgar la papelera y los archivos huérfanos ahora; el resultado del trabajo indica el espacio liberado"""
+    return enqueue(db, "gc_uploads", created_by_id=admin.id)
+
+@router.get("/storage/top", response_model=list[StorageConsumerOut])
+def storage_top_consumers(limit: int = Query(20, ge=1, le=200), db: Session = Depends(get_db), admin = Depends(require_admin)):
+    """Clientes que más espacio ocupan (de los contadores, sin sumar documentos)"""
+    return storage_quota.top_consumers(db, limit)
+
+@router.put("/customers/{user_id}/storage-quota", response_model=StorageUsageOut)
+def set_storage_quota(user_id:int, payload: StorageQuotaIn, db: Session = Depends(get_db), admin = Depends(require_admin)):
+    """Fijar la cuota de un usuario (quota_mb null vuelve a la cuota por defecto)"""
+    quota = None if payload.quota_mb is None else payload.quota_mb * storage_quota.MB
+    if not storage_quota.set_quota(db, user_id, quota):
+        raise HTTPException(404, "Usuario no encontrado")
+    usage = storage_quota.get_usage(db, user_id)
+    return StorageUsageOut(used_bytes=usage.used_bytes, quota_bytes=usage.quota_bytes,
+                           remaining_bytes=usage.remaining_bytes, used_percent=usage.used_percent)
+
 @router.get("/documents", response_model=list[DocumentOut])
 def list_all_documents(db: Session = Depends(get_db), admin = Depends(require_admin)):
     return DocumentRepo(db).list_all()
@@ -1,24 +1,74 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.orm import Session
 from app.core.db import get_db
-from app.core.security import hash_password, verify_password, create_token
-from app.schemas.auth import RegisterIn, LoginIn, TokenOut
+from app.core.deps import current_user
+from app.core.security import REFRESH, create_token_pair, decode_token, hash_password, verify_password
+from app.schemas.auth import RegisterIn, LoginIn, RefreshIn, TokenOut
 from app.repositories.user_repo import UserRepo
+from app.services.rate_limit import RateLimited, guard_login, guard_register, login_failed, login_succeeded
 
 router = APIRouter()
 
+def _client_ip(request: Request) -> str:
+    # Detrás de un proxy es la IP real solo si el proxy está en FORWARDED_ALLOW_IPS
+    return request.client.host if request.client else "unknown"
+
+def _too_many(e: RateLimited) -> HTTPException:
+    return HTTPException(
+        status_code=429,
+        detail="Demasiados intentos. Espera un momento e inténtalo de nuevo.",
+        headers={"Retry-After": str(e.retry_after)},
+    )
+
 @router.post('/register', response_model=TokenOut)  # crea siempre customer
-def register(data: RegisterIn, db: Session = Depends(get_db)):
+def register(data: RegisterIn, request: Request, db: Session = Depends(get_db)):
+    try:
+        guard_register(_client_ip(request))
+    except RateLimited as e:
+        raise _too_many(e)
     repo = UserRepo(db)
     if repo.get_by_email(data.email):
         raise HTTPException(400, 'Correo ya registrado')
     user = repo.create(email=data.email, hashed_password=hash_password(data.password), role="customer")
-    return TokenOut(access_token=create_token(user.email))
+    return TokenOut(**create_token_pair(user))
 
 @router.post('/login', response_model=TokenOut)
-def login(data: LoginIn, db: Session = Depends(get_db)):
+def login(data: LoginIn, request: Request, db: Session = Depends(get_db)):
+    # Los límites se comprueban antes de bcrypt: un ataque no consume CPU de verificación
+    try:
+        guard_login(_client_ip(request), data.email)
+    except RateLimited as e:
+        raise _too_many(e)
     repo = UserRepo(db)
     user = repo.get_by_email(data.email)
     if not user or not verify_password(data.password, user.hashed_password):
+        login_failed(data.email)
         raise HTTPException(401, 'Credenciales inválidas')
-    return TokenOut(access_token=create_token(user.email))
+    login_succeeded(data.email)
+    if user.is_active is False:
+        raise HTTPException(403, 'Cuenta desactivada')
+    return TokenOut(**create_token_pair(user))
+
+@router.post('/refresh', response_model=TokenOut)
+def refresh(data: RefreshIn, db: Session = Depends(get_db)):
+    """Cambiar un refresh token vigente por un par nuevo (el único paso que consulta la BD)"""
+    try:
+        payload = decode_token(data.refresh_token)
+    except Exception:
+        raise HTTPException(401, 'Token inválido')
+    if payload.get("type") != REFRESH:
+        raise HTTPException(401, 'Token inválido')
+    user = UserRepo(db).get_by_id(payload.get("uid"))
+    if not user or user.is_active is False or user.token_version != payload.get("ver"):
+        raise HTTPException(401, 'Sesión expirada o revocada')
+    return TokenOut(**create_token_pair(user))
+
+@router.post('/logout', status_code=204)
+def logout(db: Session = Depends(get_db), user = Depends(current_user)):
+    """Cerrar sesión: invalida todos los tokens del usuario (en todos sus dispositivos)"""
+    repo = UserRepo(db)
+    db_user = repo.get_by_id(user.id)
+    if db_user:
+        repo.revoke_tokens(db_user)
+        repo.save_revocation(db_user)
+    return Response(status_code=204)
@@ -1,15 +1,28 @@
 """
 API endpoints para gestión de clientes (Admin)
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+import logging
+import os
+import uuid
+from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, status
 from sqlalchemy.orm import Session
 from typing import List
+from app.core.config import settings
 from app.core.db import get_db
 from app.core.deps import get_current_user, require_admin
 from app.core.security import hash_password
+from app.core.token_versions import token_versions
 from app.models.user import User
 from app.models.client import Client
+from app.models.document import Document
 from app.schemas.client import ClientResponse, ClientUpdate, ClientWithUser, ClientCreate, ClientCreateRequest
+from app.schemas.job import JobOut
+from app.services.activity_logger import log_activity
+from app.services.job_queue import enqueue
+
+IMPORT_MAX_BYTES = 50 * 1024 * 1024
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/admin/clients", tags=["Admin - Clients"])
 
@@ -50,7 +63,6 @@ def create_client(
     db.refresh(new_client)
     
     # Log activity
-    from app.services.activity_logger import log_activity
     log_activity(
         db=db,
         activity_type="user_registered",
@@ -66,6 +78,46 @@ def create_client(
         "email": new_user.email
     }
 
+@router.post("/import", response_model=JobOut, status_code=status.HTTP_202_ACCEPTED)
+def import_clients_csv(
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_admin)
+):
+    """Importar clientes desde un CSV en segundo plano (solo admin)
+
+    Columnas: email, password y opcionalmente los campos del cliente. El
+    trabajo devuelve el resumen y su descarga es el CSV de errores por fila.
+    """
+    import_dir = os.path.join(settings.EXPORT_DIR, "imports")
+    os.makedirs(import_dir, exist_ok=True)
+    path = os.path.join(import_dir, f"{uuid.uuid4().hex}.csv")
+    size = 0
+    with open(path, "wb") as out:
+        while chunk := file.file.read(1024 * 1024):
+            size += len(chunk)
+            if size > IMPORT_MAX_BYTES:
+                out.close()
+                os.remove(path)
+                raise HTTPException(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    detail=f"Archivo demasiado grande (máx {IMPORT_MAX_BYTES // (1024 * 1024)}MB)"
+                )
+            out.write(chunk)
+
+    # Sin reintentos: un reintento marcaría como duplicados los lotes ya importados
+    return enqueue(
+        db, "import_clients",
+        {
+            "path": path,
+            "filename": file.filename,
+            "performed_by_id": current_user.id,
+            "performed_by_email": current_user.email,
+        },
+        max_attempts=1,
+        created_by_id=current_user.id,
+    )
+
 @router.delete("/{client_id}")
 def delete_client(
     client_id: int,
@@ -82,11 +134,13 @@ def delete_client(
         )
     
     # Eliminar el usuario asociado (esto eliminará el cliente en cascada)
-    user = db.query(User).filter(User.id == client.user_id).first()
+    user_id = client.user_id
+    user = db.query(User).filter(User.id == user_id).first()
     if user:
         db.delete(user)
     
     db.commit()
+    token_versions.forget(user_id)
     
     return {"message": "Cliente eliminado exitosamente"}
 
@@ -99,7 +153,7 @@ def get_all_clients(
     current_user: User = Depends(require_admin)
 ):
     """Obtener todos los clientes (solo admin)"""
-    print(f"DEBUG: get_all_clients called. skip={skip}, limit={limit}, status={filter_status}")
+    logger.debug("get_all_clients skip=%s limit=%s status=%s", skip, limit, filter_status)
     query = db.query(Client).join(User, Client.user_id == User.id)
     
     if filter_status:
@@ -166,7 +220,6 @@ def update_client(
     db.refresh(client)
 
     # Log activity
-    from app.services.activity_logger import log_activity
     log_activity(
         db=db,
         activity_type="client_updated",
@@ -186,7 +239,6 @@ def get_client_documents(
     current_user: User = Depends(require_admin)
 ):
     """Obtener documentos de un cliente"""
-    from app.models.document import Document
     
     client = db.query(Client).filter(Client.id == client_id).first()
     
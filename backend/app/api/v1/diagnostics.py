@@ -0,0 +1,68 @@
+"""
+Diagnóstico del proceso de la API (Admin): pool de conexiones, cola de trabajos,
+workers, cachés y comprobaciones de /readyz sin caché
+"""
+import os
+from datetime import datetime
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+from app.core.db import get_db, get_engine
+from app.core.deps import require_admin
+from app.core.lifecycle import lifecycle
+from app.core.token_versions import token_versions
+from app.models.user import User
+from app.services import health, heartbeats, job_queue
+from app.services.form_autosave import autosave_buffer
+
+router = APIRouter(prefix="/admin/diagnostics", tags=["Admin - Diagnostics"])
+
+def _pool_stats() -> dict:
+    engine = get_engine()
+    pool = engine.pool
+    stats = {"dialect": engine.dialect.name, "pool": type(pool).__name__, "status": pool.status()}
+    # Solo QueuePool (MySQL y SQLite en archivo) lleva la cuenta de conexiones
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        fn = getattr(pool, name, None)
+        if callable(fn):
+            stats[name] = fn()
+    return stats
+
+def _rss_mb() -> float | None:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+@router.get("")
+def get_diagnostics(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_admin)
+):
+    """Estado detallado de este proceso y sus dependencias (solo admin)"""
+    now = datetime.utcnow()
+    workers = [
+        {
+            "worker_id": w.worker_id,
+            "hostname": w.hostname,
+            "pid": w.pid,
+            "concurrency": w.concurrency,
+            "started_at": w.started_at,
+            "last_seen_seconds": round((now - w.last_seen_at).total_seconds(), 1),
+        }
+        for w in heartbeats.list_workers(db)
+    ]
+    return {
+        "process": {"pid": os.getpid(), "rss_mb": _rss_mb(), **lifecycle.stats()},
+        "database": _pool_stats(),
+        "checks": health.run_checks(),
+        "queue": job_queue.queue_stats(db),
+        "workers": workers,
+        "caches": {
+            "token_versions": token_versions.stats(),
+            "form_autosave": autosave_buffer.stats(db),
+        },
+    }
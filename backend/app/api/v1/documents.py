@@ -1,56 +1,63 @@
 # app/api/v1/documents.py
-import os, uuid
-from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException, Query
+import logging
+import uuid
+from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException, Query, Header
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import FileResponse
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import StaleDataError
 from app.core.db import get_db
 from app.core.config import settings
 from app.core.deps import current_user
+from app.core.tracing import span
 from app.core.categories import REQUIRED_CATEGORIES
 from app.repositories.document_repo import DocumentRepo
-from app.schemas.document import DocumentOut
+from app.schemas.document import DocumentOut, StorageUsageOut
+from app.services.activity_logger import log_activity
+from app.services.image_ingest import INGEST_MIME_TYPES, ImageTooLarge, normalize_image
+from app.services.job_queue import enqueue
+from app.services.previews import preview_response
+from app.services.scanner import BLOCKED_STATUSES, scanning_enabled
+from app.services import storage_quota
+from app.services.storage import delete_document_files, document_path, ensure_parent, file_sha256, original_path
+from app.services.upload_validation import StreamValidator, UploadRejected, stream_to_disk
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
 ALLOWED = {"application/pdf", "image/jpeg", "image/png"}
 MAX_SIZE = 10 * 1024 * 1024  # 10 MB
 
+def _quota_detail(usage: storage_quota.StorageUsage) -> str:
+    mb = 1024 * 1024
+    return (f"Cuota de almacenamiento superada (usados {usage.used_bytes / mb:.1f} "
+            f"de {usage.quota_bytes / mb:.0f} MB). Elimina documentos que ya no necesites "
+            "(sus versiones anteriores también ocupan espacio)")
+
 @router.get("/categories", response_model=list[str])
 def categories():
     return REQUIRED_CATEGORIES
 
-def _delete_file_if_exists(path: str):
-    try:
-        if os.path.exists(path):
-            os.remove(path)
-    except Exception:
-        # no interrumpir flujo por error de filesystem
-        pass
-
 @router.post("/documents", response_model=DocumentOut)
 async def upload_document(
     # Ahora la categoría viene en el cuerpo como form-data (más natural para multipart)
     category: str = Form(..., description="Categoría requerida exactamente como en /categories"),
     file: UploadFile = File(...),
     # Opcional: reemplazar si ya existe un documento en la misma categoría
-    replace: bool = Query(False, description="Si true, reemplaza el documento existente en esta categoría"),
+    replace: bool = Query(False, description="Si true, sube una versión nueva del documento existente en esta categoría (la anterior se conserva)"),
     family_member_name: str | None = Form(None),
     db: Session = Depends(get_db),
     user = Depends(current_user),
 ):
     if category not in REQUIRED_CATEGORIES:
         raise HTTPException(400, "Categoría inválida. Consulta /api/v1/categories")
-    if file.content_type not in ALLOWED:
-        raise HTTPException(415, "Tipo de archivo no permitido (PDF, JPG o PNG)")
-    content = await file.read()
-    if len(content) > MAX_SIZE:
-        raise HTTPException(413, "Archivo demasiado grande (máx 10MB)")
 
     repo = DocumentRepo(db)
 
     # ¿Ya hay documento(s) de esta categoría?
     # TODO: Si es familia, permitir múltiples docs por categoría si son de diferentes miembros
-    existing_docs = [d for d in repo.list_by_user(user_id=user.id) if d.category == category]
+    with span("documents.duplicate_check"):
+        existing_docs = [d for d in repo.list_by_user(user_id=user.id) if d.category == category]
     
     # Si no especifican miembro, asumimos que es el principal y verificamos duplicados
     # Si especifican miembro, verificamos si ese miembro ya tiene doc en esa categoría
@@ -66,42 +73,132 @@ async def upload_document(
             detail="Ya existe un documento para esta categoría/miembro. Usa ?replace=true para reemplazarlo."
         )
 
-    # Guardar archivo en disco
-    os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
+    # Cuota: se lee el contador del usuario (una fila) y lo que queda libre
+    # limita el tamaño del archivo. Sin espacio se rechaza antes de leer el
+    # cuerpo. Reemplazar no libera nada (la versión anterior sigue contando);
+    # solo los duplicados antiguos, que van a la papelera (su historial no se
+    # suma aquí: reserve() al final usa el contador ya actualizado).
+    with span("documents.quota_check"):
+        usage = storage_quota.get_usage(db, user.id)
+    max_size, max_size_detail = MAX_SIZE, None
+    if usage.quota_bytes is not None:
+        freed = sum(storage_quota.charged_bytes(d.status, d.size_bytes) for d in existing_docs[1:]) if replace else 0
+        available = usage.remaining_bytes + freed
+        if available <= 0:
+            raise HTTPException(413, _quota_detail(usage))
+        if available < MAX_SIZE:
+            max_size, max_size_detail = available, _quota_detail(usage)
+
+    # Guardar archivo en disco validando en la misma pasada: el tipo se detecta
+    # por la firma del archivo (no por el Content-Type del cliente) y se
+    # rechaza antes de escribir nada si no es PDF/JPG/PNG.
     stored_name = f"{uuid.uuid4().hex}_{file.filename}"
-    path = os.path.join(settings.UPLOAD_DIR, stored_name)
-    with open(path, "wb") as f:
-        f.write(content)
-
-    # Si hay existente(s) y replace=true, borrar físicamente y en BD
-    if existing_docs and replace:
-        for old in existing_docs:
-            _delete_file_if_exists(os.path.join(settings.UPLOAD_DIR, old.stored_name))
-            repo.delete(doc=old)
-
-    # Crear registro nuevo
-    # Crear registro nuevo
-    doc = repo.create(
-        user_id=user.id,
-        category=category,
-        original_name=file.filename,
-        stored_name=stored_name,
-        mime_type=file.content_type,
-        size_bytes=len(content),
-        family_member_name=family_member_name
-    )
+    path = ensure_parent(document_path(stored_name))
+    validator = StreamValidator(max_size=max_size, max_pdf_pages=settings.MAX_PDF_PAGES, allowed=ALLOWED,
+                                max_size_detail=max_size_detail)
+    try:
+        mime_type = await run_in_threadpool(stream_to_disk, file.file, path, validator)
+    except UploadRejected as e:
+        raise HTTPException(e.status_code, e.detail)
+    size_bytes = validator.size
+    sha256 = validator.sha256
+
+    # Normalización opcional de fotos (EXIF, orientación, tamaño). Es CPU pura:
+    # se ejecuta en el threadpool para no bloquear el event loop.
+    if settings.IMAGE_INGEST_ENABLED and mime_type in INGEST_MIME_TYPES:
+        keep_at = original_path(stored_name) if settings.IMAGE_INGEST_KEEP_ORIGINAL else None
+        try:
+            with span("image.normalize", **{"file.mime_type": mime_type}):
+                ingest = await run_in_threadpool(normalize_image, path, mime_type, category, keep_at)
+            size_bytes = ingest.bytes_after
+            if ingest.rewritten:
+                sha256 = await run_in_threadpool(file_sha256, path)
+        except ImageTooLarge as e:
+            delete_document_files(stored_name)
+            raise HTTPException(422, f"Imagen demasiado grande: {e}")
+        except OSError as e:
+            if e.errno is not None:
+                # Error del disco (lleno, E/S), no de la imagen: no guardar a medias
+                logger.exception("Error de disco normalizando %s", stored_name)
+                delete_document_files(stored_name)
+                raise
+            # Imagen que Pillow no puede decodificar (truncada, formato raro): se guarda tal cual
+            logger.warning("Imagen %s guardada sin normalizar: %s", stored_name, e)
+        except (ValueError, SyntaxError) as e:
+            # Pillow usa SyntaxError para algunas cabeceras PNG/JPEG corruptas
+            logger.warning("Imagen %s guardada sin normalizar: %s", stored_name, e)
+
+    # Con replace=true el documento conserva su id y sube de versión: la
+    # anterior queda en document_versions (ver DocumentRepo.new_version). Si por
+    # datos antiguos hubiera más de uno, el resto va a la papelera.
+    status = "quarantined" if scanning_enabled() else "pending"  # con antivirus, en cuarentena hasta escanearlo
+    current = existing_docs[0] if existing_docs and replace else None
+    if current is not None:
+        with span("documents.replace", **{"documents.replaced": len(existing_docs)}):
+            # Releer el actual (la subida ha tardado): si otro reemplazo ya lo
+            # cambió se rechaza en vez de guardar como anterior una versión leída vieja
+            read_version = current.version
+            db.refresh(current)
+            if current.deleted_at is not None or current.version != read_version:
+                db.rollback()
+                delete_document_files(stored_name)
+                raise HTTPException(409, "El documento cambió durante la subida. Vuelve a intentarlo.")
+            for old in existing_docs[1:]:
+                repo.delete(doc=old, commit=False)
+            repo.new_version(doc=current, original_name=file.filename, stored_name=stored_name, mime_type=mime_type,
+                             size_bytes=size_bytes, sha256=sha256, status=status)
+
+    # Sumar al uso con un UPDATE condicionado a la cuota: si otra subida en
+    # paralelo ya ocupó el espacio, se deshace todo (también el reemplazo)
+    if not storage_quota.reserve(db, user.id, size_bytes, usage.quota_bytes):
+        db.rollback()
+        delete_document_files(stored_name)
+        raise HTTPException(413, _quota_detail(storage_quota.get_usage(db, user.id)))
+
+    if current is not None:
+        try:
+            db.commit()
+        except StaleDataError:
+            # Otro reemplazo del mismo documento confirmó entre medias
+            db.rollback()
+            delete_document_files(stored_name)
+            raise HTTPException(409, "El documento cambió durante la subida. Vuelve a intentarlo.")
+        db.refresh(current)
+        doc = current
+    else:
+        # Crear registro nuevo
+        with span("documents.create"):
+            doc = repo.create(
+                user_id=user.id,
+                category=category,
+                original_name=file.filename,
+                stored_name=stored_name,
+                mime_type=mime_type,
+                size_bytes=size_bytes,
+                family_member_name=family_member_name,
+                sha256=sha256,
+                status=status,
+            )
+
+    # Escaneo y miniatura se hacen en el worker, fuera del request (la miniatura,
+    # después de un escaneo limpio). Sin commit propio: se confirma junto con
+    # el registro de actividad.
+    if scanning_enabled():
+        enqueue(db, "scan_document", {"document_id": doc.id}, priority=20, max_attempts=5, commit=False)
+    else:
+        enqueue(db, "generate_preview", {"document_id": doc.id}, priority=10, commit=False)
 
     # Log activity
-    from app.services.activity_logger import log_activity
-    log_activity(
-        db=db,
-        activity_type="document_uploaded",
-        title="Nuevo documento subido",
-        description=f"{user.email} subió {category}",
-        user_id=user.id,
-        performed_by_id=user.id,
-        performed_by_email=user.email
-    )
+    with span("activity.log"):
+        log_activity(
+            db=db,
+            activity_type="document_uploaded",
+            title="Nuevo documento subido",
+            description=f"{user.email} subió {category}" + (f" (versión {doc.version})" if doc.version > 1 else ""),
+            user_id=user.id,
+            performed_by_id=user.id,
+            performed_by_email=user.email
+        )
 
     return doc
 
@@ -109,20 +206,40 @@ async def upload_document(
 def my_documents(db: Session = Depends(get_db), user = Depends(current_user)):
     return DocumentRepo(db).list_by_user(user_id=user.id)
 
+@router.get("/documents/usage", response_model=StorageUsageOut)
+def my_storage_usage(db: Session = Depends(get_db), user = Depends(current_user)):
+    """Espacio usado por mis documentos y mi cuota"""
+    usage = storage_quota.get_usage(db, user.id)
+    return StorageUsageOut(used_bytes=usage.used_bytes, quota_bytes=usage.quota_bytes,
+                           remaining_bytes=usage.remaining_bytes, used_percent=usage.used_percent)
+
 @router.get("/documents/{doc_id}")
 def download_document(doc_id: int, db: Session = Depends(get_db), user = Depends(current_user)):
     doc = DocumentRepo(db).get_owned(doc_id=doc_id, user_id=user.id)
     if not doc:
         raise HTTPException(404, "No encontrado")
-    path = os.path.join(settings.UPLOAD_DIR, doc.stored_name)
+    if doc.status in BLOCKED_STATUSES:
+        raise HTTPException(423, "Documento en análisis antivirus o bloqueado")
+    path = document_path(doc.stored_name)
     return FileResponse(path, media_type=doc.mime_type, filename=doc.original_name)
 
+@router.get("/documents/{doc_id}/preview")
+def document_preview(
+    doc_id: int,
+    if_none_match: str | None = Header(None),
+    db: Session = Depends(get_db),
+    user = Depends(current_user),
+):
+    doc = DocumentRepo(db).get_owned(doc_id=doc_id, user_id=user.id)
+    if not doc:
+        raise HTTPException(404, "No encontrado")
+    return preview_response(doc, if_none_match)
+
 @router.delete("/documents/{doc_id}")
 def delete_document(doc_id: int, db: Session = Depends(get_db), user = Depends(current_user)):
     repo = DocumentRepo(db)
     doc = repo.get_owned(doc_id=doc_id, user_id=user.id)
     if not doc:
         raise HTTPException(404, "No encontrado")
-    _delete_file_if_exists(os.path.join(settings.UPLOAD_DIR, doc.stored_name))
     repo.delete(doc=doc)
     return {"message": "Eliminado"}
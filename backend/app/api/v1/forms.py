@@ -1,83 +1,65 @@
 """
 API endpoints para formularios de solicitud de visa
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Body, Depends, HTTPException, status
+from pydantic import ValidationError
+from sqlalchemy import text
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import StaleDataError
 from typing import List
-from datetime import datetime
 from app.core.db import get_db
 from app.core.deps import get_current_user, require_admin
 from app.models.user import User
 from app.models.intake_form import IntakeForm
-from app.schemas.intake_form import IntakeFormResponse, IntakeFormCreate, IntakeFormUpdate
+from app.schemas.intake_form import (
+    IntakeFormResponse, IntakeFormCreate, IntakeFormUpdate, IntakeFormAutosave, IntakeFormAutosaveResult
+)
+from app.services.activity_logger import log_activity
+from app.services.form_autosave import FormNotFound, StaleVersion, autosave_buffer, current_version
+from app.services.intake_forms import apply_form_patch, assign_form_values, form_values, upsert_form
 
 router = APIRouter(prefix="/forms", tags=["Forms"])
 
+def _log_form_activity(db: Session, user: User, submitted: bool):
+    """Registrar la actividad de guardado/envío del formulario (hace commit)"""
+    log_activity(
+        db=db,
+        activity_type="form_submitted" if submitted else "form_updated",
+        title="Formulario enviado" if submitted else "Formulario actualizado",
+        description=f"{user.email} {'completó' if submitted else 'actualizó'} su formulario",
+        user_id=user.id,
+        performed_by_id=user.id,
+        performed_by_email=user.email
+    )
+
+def _stale_form(version: int | None) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail=f"El formulario cambió en otra sesión (versión actual {version}). Recarga para continuar.",
+        headers={"X-Form-Version": str(version)}
+    )
+
+def _commit_form(db: Session, user_id: int):
+    """Confirmar la escritura del formulario; 409 si otra escritura subió la versión antes"""
+    try:
+        db.commit()
+    except StaleDataError:
+        db.rollback()
+        raise _stale_form(current_version(db, user_id))
+
 @router.post("", response_model=IntakeFormResponse)
 def create_or_update_form(
     form_data: IntakeFormCreate,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Crear o actualizar formulario de solicitud"""
-    # Verificar si ya existe un formulario para este usuario
-    existing_form = db.query(IntakeForm).filter(
-        IntakeForm.user_id == current_user.id
-    ).first()
-    
-    if existing_form:
-        # Actualizar formulario existente
-        update_data = form_data.dict(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(existing_form, field, value)
-        
-        # Si se marca como completado, guardar la fecha
-        if form_data.is_completed and not existing_form.completed_at:
-            existing_form.completed_at = datetime.utcnow()
-        
-        db.commit()
-        db.refresh(existing_form)
-
-        # Log activity
-        from app.services.activity_logger import log_activity
-        log_activity(
-            db=db,
-            activity_type="form_submitted" if form_data.is_completed else "form_updated",
-            title="Formulario enviado" if form_data.is_completed else "Formulario actualizado",
-            description=f"{current_user.email} {'completó' if form_data.is_completed else 'actualizó'} su formulario",
-            user_id=current_user.id,
-            performed_by_id=current_user.id,
-            performed_by_email=current_user.email
-        )
-
-        return existing_form
-    else:
-        # Crear nuevo formulario
-        new_form = IntakeForm(
-            user_id=current_user.id,
-            **form_data.dict()
-        )
-        
-        if form_data.is_completed:
-            new_form.completed_at = datetime.utcnow()
-        
-        db.add(new_form)
-        db.commit()
-        db.refresh(new_form)
-
-        # Log activity
-        from app.services.activity_logger import log_activity
-        log_activity(
-            db=db,
-            activity_type="form_submitted" if form_data.is_completed else "form_updated",
-            title="Formulario enviado" if form_data.is_completed else "Formulario actualizado",
-            description=f"{current_user.email} {'completó' if form_data.is_completed else 'actualizó'} su formulario",
-            user_id=current_user.id,
-            performed_by_id=current_user.id,
-            performed_by_email=current_user.email
-        )
-
-        return new_form
+    """Crear o actualizar formulario de solicitud (upsert por usuario)"""
+    autosave_buffer.flush_user(db, current_user.id)
+    form = upsert_form(db, current_user.id, form_data)
+    # La respuesta se arma antes del commit para no tener que recargar la fila
+    response = IntakeFormResponse.model_validate(form)
+    _log_form_activity(db, current_user, bool(form_data.is_completed))
+    return response
 
 @router.get("/me", response_model=IntakeFormResponse)
 def get_my_form(
@@ -85,6 +67,7 @@ def get_my_form(
     current_user: User = Depends(get_current_user)
 ):
     """Obtener mi formulario"""
+    autosave_buffer.flush_user(db, current_user.id)
     form = db.query(IntakeForm).filter(
         IntakeForm.user_id == current_user.id
     ).first()
@@ -104,6 +87,7 @@ def update_my_form(
     current_user: User = Depends(get_current_user)
 ):
     """Actualizar mi formulario"""
+    autosave_buffer.flush_user(db, current_user.id)
     form = db.query(IntakeForm).filter(
         IntakeForm.user_id == current_user.id
     ).first()
@@ -114,48 +98,130 @@ def update_my_form(
             detail="Formulario no encontrado. Usa POST para crear uno nuevo."
         )
     
-    # Actualizar campos
-    update_data = form_update.dict(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(form, field, value)
+    # Actualizar campos (solo los que cambian)
+    assign_form_values(form, form_values(form_update))
+    _commit_form(db, current_user.id)
+    db.refresh(form)
+
+    _log_form_activity(db, current_user, bool(form_update.is_completed))
     
-    # Si se marca como completado, guardar la fecha
-    if form_update.is_completed and not form.completed_at:
-        form.completed_at = datetime.utcnow()
+    return form
+
+@router.patch("/me", response_model=IntakeFormResponse)
+def patch_my_form(
+    patch: dict = Body(..., media_type="application/merge-patch+json"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Actualización parcial de mi formulario (JSON Merge Patch, RFC 7386).
+
+    Pensado para el autoguardado por pasos: se envía solo lo que cambió y en
+    las secciones JSON (p.ej. parents_data) se mezcla con lo ya guardado.
+    """
+    autosave_buffer.flush_user(db, current_user.id)
+    form = db.query(IntakeForm).filter(
+        IntakeForm.user_id == current_user.id
+    ).first()
+    
+    if not form:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Formulario no encontrado. Usa POST para crear uno nuevo."
+        )
     
-    db.commit()
+    try:
+        changed = apply_form_patch(form, patch)
+    except ValidationError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=e.errors(include_url=False, include_context=False))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+    
+    # Sin cambios reales: no se escribe nada
+    if not changed:
+        return form
+    
+    _commit_form(db, current_user.id)
     db.refresh(form)
 
-    # Log activity
-    from app.services.activity_logger import log_activity
-    log_activity(
-        db=db,
-        activity_type="form_submitted" if form_update.is_completed else "form_updated",
-        title="Formulario enviado" if form_update.is_completed else "Formulario actualizado",
-        description=f"{current_user.email} {'completó' if form_update.is_completed else 'actualizó'} su formulario",
-        user_id=current_user.id,
-        performed_by_id=current_user.id,
-        performed_by_email=current_user.email
-    )
+    _log_form_activity(db, current_user, "is_completed" in changed and form.is_completed)
     
     return form
 
+@router.put("/me/autosave", response_model=IntakeFormAutosaveResult)
+def autosave_my_form(
+    data: IntakeFormAutosave,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Autoguardado del formulario.
+
+    Los cambios quedan en un borrador en la fila del formulario y se copian a
+    sus columnas como mucho una vez por AUTOSAVE_WINDOW_SECONDS; la versión
+    devuelta es la que debe enviarse en el siguiente guardado. Una versión vieja devuelve 409 (recargar el formulario).
+    """
+    try:
+        version, pending = autosave_buffer.save(db, current_user.id, current_user.email, data.version, data.changes)
+    except FormNotFound:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Formulario no encontrado. Usa POST para crear uno nuevo."
+        )
+    except StaleVersion as e:
+        raise _stale_form(e.current_version)
+    except ValidationError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=e.errors(include_url=False, include_context=False))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+    
+    return IntakeFormAutosaveResult(version=version, pending=pending)
+
 @router.get("/admin/all", response_model=List[IntakeFormResponse])
 def get_all_forms(
     skip: int = 0,
     limit: int = 100,
     completed: bool = None,
+    nacionalidad: str = None,
+    pasaporte: str = None,
+    miembro_pasaporte: str = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin)
 ):
-    """Obtener todos los formularios (solo admin)"""
+    """Obtener todos los formularios (solo admin)
+
+    miembro_pasaporte busca el pasaporte entre los familiares registrados.
+    Los filtros miran las columnas: un autoguardado aún sin escribir (como mucho
+    AUTOSAVE_WINDOW_SECONDS) no cuenta para ellos.
+    """
     query = db.query(IntakeForm)
     
     if completed is not None:
         query = query.filter(IntakeForm.is_completed == completed)
+    if nacionalidad:
+        query = query.filter(IntakeForm.nacionalidad == nacionalidad)
+    if pasaporte:
+        query = query.filter(IntakeForm.pasaporte == pasaporte)
+    if miembro_pasaporte:
+        if db.bind.dialect.name == "mysql":
+            # Usa el índice multivaluado ix_intake_forms_family_pasaportes
+            member_filter = text(
+                "CAST(:pasaporte AS CHAR(50)) MEMBER OF "
+                "(intake_forms.family_members_data->'$[*].pasaporte')"
+            )
+        else:
+            member_filter = text(
+                "EXISTS (SELECT 1 FROM json_each(intake_forms.family_members_data) "
+                "WHERE json_extract(json_each.value, '$.pasaporte') = :pasaporte)"
+            )
+        query = query.filter(member_filter.bindparams(pasaporte=miembro_pasaporte))
     
     forms = query.offset(skip).limit(limit).all()
-    
+
+    # Solo se escriben los borradores pendientes de esta página: vaciarlos todos
+    # en cada listado anularía la ventana de agrupado de los demás usuarios
+    for form in forms:
+        if form.autosave_due_at is not None and autosave_buffer.flush_user(db, form.user_id):
+            db.refresh(form)
+
     return forms
 
 @router.get("/admin/{form_id}", response_model=IntakeFormResponse)
@@ -173,4 +239,7 @@ def get_form_by_id(
             detail="Formulario no encontrado"
         )
     
+    if autosave_buffer.flush_user(db, form.user_id):
+        db.refresh(form)
+    
     return form
@@ -0,0 +1,66 @@
+"""
+API endpoints para consultar trabajos en segundo plano (Admin)
+"""
+import os
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import FileResponse
+from sqlalchemy.orm import Session
+from typing import List
+from app.core.db import get_db
+from app.core.deps import require_admin
+from app.models.user import User
+from app.models.job import Job
+from app.schemas.job import JobOut
+
+router = APIRouter(prefix="/admin/jobs", tags=["Admin - Jobs"])
+
+@router.get("", response_model=List[JobOut])
+def list_jobs(
+    skip: int = 0,
+    limit: int = 50,
+    job_status: str = None,
+    kind: str = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_admin)
+):
+    """Listar trabajos recientes (solo admin)"""
+    query = db.query(Job)
+    if job_status:
+        query = query.filter(Job.status == job_status)
+    if kind:
+        query = query.filter(Job.kind == kind)
+    return query.order_by(Job.id.desc()).offset(skip).limit(limit).all()
+
+def _get_job(db: Session, job_id: int) -> Job:
+    job = db.query(Job).filter(Job.id == job_id).first()
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Trabajo no encontrado"
+        )
+    return job
+
+@router.get("/{job_id}", response_model=JobOut)
+def get_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_admin)
+):
+    """Consultar el estado de un trabajo"""
+    return _get_job(db, job_id)
+
+@router.get("/{job_id}/download")
+def download_job_result(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_admin)
+):
+    """Descargar el archivo generado por un trabajo (exportaciones, expedientes ZIP)"""
+    job = _get_job(db, job_id)
+    if job.status != "done":
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"El trabajo está en estado '{job.status}'")
+    result = job.result or {}
+    path = result.get("path")
+    if not path or not os.path.exists(path):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="El trabajo no generó un archivo descargable")
+    return FileResponse(path, media_type=result.get("media_type"), filename=result.get("filename"))
@@ -0,0 +1,71 @@
+"""
+API endpoints de la cola de revisión de documentos (Admin)
+"""
+from datetime import datetime, timedelta
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+from typing import List
+from app.core.config import settings
+from app.core.db import get_db
+from app.core.deps import require_admin
+from app.models.user import User
+from app.schemas.document import ReviewQueueItem, ReviewClaimOut
+from app.services import review_queue
+
+router = APIRouter(prefix="/admin/review-queue", tags=["Admin - Review queue"])
+
+def _claim_out(claimed: list[int]) -> ReviewClaimOut:
+    until = datetime.utcnow() + timedelta(minutes=settings.REVIEW_CLAIM_MINUTES) if claimed else None
+    return ReviewClaimOut(claimed=claimed, claimed_until=until)
+
+@router.get("", response_model=List[ReviewQueueItem])
+def get_review_queue(
+    order: str = Query("oldest", pattern="^(oldest|client)$"),
+    skip: int = 0,
+    limit: int = Query(50, ge=1, le=200),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_admin)
+):
+    """Documentos pendientes de revisión que no tiene reservados otro admin (solo admin)
+
+    order: "oldest" (más tiempo esperando primero) o "client" (clientes más antiguos primero).
+    """
+    return review_queue.list_queue(db, current_user.id, order=order, limit=limit, offset=skip)
+
+@router.post("/claim", response_model=ReviewClaimOut)
+def claim_next_documents(
+    count: int = Query(1, ge=1, le=50),
+    order: str = Query("oldest", pattern="^(oldest|client)$"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_admin)
+):
+    """Reservar los siguientes documentos de la cola durante REVIEW_CLAIM_MINUTES"""
+    return _claim_out(review_queue.claim_next(db, current_user.id, count=count, order=order))
+
+@router.post("/{doc_id}/claim", response_model=ReviewClaimOut)
+def claim_document(
+    doc_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_admin)
+):
+    """Reservar (o renovar la reserva de) un documento concreto"""
+    if not review_queue.claim(db, doc_id, current_user.id):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="El documento no está pendiente o lo está revisando otro administrador"
+        )
+    return _claim_out([doc_id])
+
+@router.delete("/{doc_id}/claim")
+def release_document(
+    doc_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_admin)
+):
+    """Liberar la reserva de un documento sin revisarlo"""
+    if not review_queue.release(db, doc_id, current_user.id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No tienes reservado este documento"
+        )
+    return {"message": "Reserva liberada"}
@@ -0,0 +1,33 @@
+"""
+API endpoint de búsqueda para el panel de admin
+"""
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+from typing import List
+from app.core.db import get_db
+from app.core.deps import require_admin
+from app.models.user import User
+from app.schemas.search import SearchHit
+from app.services.search import KINDS, search
+
+router = APIRouter(prefix="/admin/search", tags=["Admin - Search"])
+
+@router.get("", response_model=List[SearchHit])
+def search_cases(
+    q: str = Query(..., min_length=2, max_length=200),
+    kinds: str = None,
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_admin)
+):
+    """Buscar clientes, formularios y documentos por nombre, email, pasaporte o archivo (solo admin)
+
+    kinds: lista separada por comas de user, client, form, document (por defecto todos).
+    """
+    kind_list = [k.strip() for k in kinds.split(",") if k.strip()] if kinds else None
+    if kind_list and any(k not in KINDS for k in kind_list):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Tipos válidos: {', '.join(KINDS)}"
+        )
+    return search(db, q, kind_list, limit)
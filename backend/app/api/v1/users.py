@@ -6,6 +6,7 @@ from sqlalchemy.orm import Session
 from app.core.db import get_db
 from app.core.deps import require_admin
 from app.core.security import hash_password
+from app.models.user import User
 from app.repositories.user_repo import UserRepo
 from app.schemas.user import (
     UserOut, 
@@ -30,7 +31,6 @@ def get_user_stats(
     customers = repo.count_by_role("customer")
     
     # Contar usuarios activos
-    from app.models.user import User
     active = db.query(User).filter(User.is_active == True).count()
     
     return UserStatsOut(
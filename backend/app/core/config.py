@@ -1,9 +1,13 @@
+from typing import Literal
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     APP_NAME: str = "Xiomara Upload API"
     SECRET_KEY: str
-    ACCESS_TOKEN_EXPIRE_MINUTES: int = 120
+    # Tokens de acceso cortos; el de refresco (POST /refresh) renueva el par
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = 15
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 14
+    TOKEN_VERSIONS_REFRESH_SECONDS: float = 30  # cada cuánto se recarga la caché de tokens revocados
     CORS_ORIGINS: str = "*"
 
     DB_HOST: str
@@ -11,14 +15,129 @@ class Settings(BaseSettings):
     DB_USER: str
     DB_PASSWORD: str
     DB_NAME: str
+    # URL completa opcional (p.ej. sqlite:///./local.db); si se define, reemplaza a la de MySQL
+    DB_URL: str | None = None
 
     UPLOAD_DIR: str = "/data/uploads"
+    EXPORT_DIR: str = "/data/exports"
+    MAX_PDF_PAGES: int = 100
+
+    # Normalización de fotos al subir (EXIF, orientación, tamaño, recompresión)
+    IMAGE_INGEST_ENABLED: bool = False
+    IMAGE_INGEST_KEEP_ORIGINAL: bool = False
+    IMAGE_INGEST_MAX_SIZE: int = 2400  # px del lado mayor, para categorías sin política propia
+    IMAGE_INGEST_QUALITY: int = 85
+    # Límite de píxeles al abrir una foto (aún sin escanear): por encima se
+    # rechaza la subida en vez de descomprimirla (bomba de descompresión)
+    IMAGE_INGEST_MAX_PIXELS: int = 50_000_000
+
+    # Antivirus: "none" (sin escaneo) o "clamd". Otro valor impide arrancar (una
+    # errata no debe dejar las subidas sin escanear)
+    SCANNER_BACKEND: Literal["none", "clamd"] = "none"
+    CLAMD_SOCKET: str | None = None  # p.ej. /var/run/clamav/clamd.ctl; si no, se usa host/puerto
+    CLAMD_HOST: str = "localhost"
+    CLAMD_PORT: int = 3310
+    CLAMD_TIMEOUT: float = 30.0
+
+    # Cola de revisión: minutos que un admin tiene reservado un documento
+    REVIEW_CLAIM_MINUTES: int = 15
+
+    # Miniaturas para la revisión de documentos
+    PREVIEW_MAX_SIZE: int = 480  # px del lado mayor
+    PREVIEW_QUALITY: int = 70
+
+    # Autoguardado del formulario: ventana en la que se agrupan las escrituras
+    # (0 = escribir en cada petición) y duración de una "sesión" de edición
+    AUTOSAVE_WINDOW_SECONDS: float = 5.0
+    AUTOSAVE_SESSION_MINUTES: int = 30
+
+    # Observabilidad: nivel de log, umbrales de peticiones/consultas lentas y
+    # token opcional para /metrics (si se define, se exige "Authorization: Bearer <token>")
+    LOG_LEVEL: str = "INFO"
+    SLOW_REQUEST_MS: int = 1000
+    SLOW_QUERY_MS: int = 200
+    METRICS_TOKEN: str | None = None
+
+    # Trazas: "none", "file" (OTLP/JSON en TRACING_FILE) u "otlp" (POST al collector).
+    # Otro valor impide arrancar (si no, cada petición con SQL fallaría al exportar)
+    TRACING_EXPORTER: Literal["none", "file", "otlp"] = "none"
+    TRACING_FILE: str = "/data/traces/spans.jsonl"
+    TRACING_OTLP_ENDPOINT: str = "http://localhost:4318/v1/traces"
+    TRACING_SAMPLE_RATIO: float = 1.0  # fracción de peticiones trazadas (sin traceparent entrante)
+    TRACING_SERVICE_NAME: str = "visas-api"
+
+    # Proxies de confianza (IPs separadas por comas, o "*") cuyo X-Forwarded-For
+    # da la IP real del cliente; la usa gunicorn (forwarded_allow_ips). Sin
+    # default: con una IP equivocada todos los clientes comparten la del proxy
+    # y sus límites de login. "*" solo si la app no es accesible sin el proxy
+    FORWARDED_ALLOW_IPS: str
+
+    # Límite de intentos en /login y /register: cubetas por IP y por email
+    # (ráfaga + tokens por minuto) y bloqueo exponencial del email tras
+    # LOGIN_LOCKOUT_THRESHOLD fallos seguidos. Backend "memory" (por proceso:
+    # con varios workers cada uno lleva sus contadores) o "redis" (compartido)
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: Literal["memory", "redis"] = "memory"
+    RATE_LIMIT_REDIS_URL: str = "redis://localhost:6379/0"
+    LOGIN_IP_BURST: int = 20
+    LOGIN_IP_PER_MINUTE: float = 10
+    LOGIN_EMAIL_BURST: int = 5
+    LOGIN_EMAIL_PER_MINUTE: float = 2
+    REGISTER_IP_BURST: int = 5
+    REGISTER_IP_PER_MINUTE: float = 2
+    LOGIN_LOCKOUT_THRESHOLD: int = 5
+    LOGIN_LOCKOUT_BASE_SECONDS: float = 30
+    LOGIN_LOCKOUT_MAX_SECONDS: float = 900
+    LOGIN_LOCKOUT_WINDOW_SECONDS: float = 900  # los fallos se olvidan tras este tiempo sin intentos
+
+    # Apagado ordenado: tiempo máximo esperando a las peticiones en curso (debe
+    # ser menor que el graceful_timeout de gunicorn, GRACEFUL_TIMEOUT)
+    SHUTDOWN_DRAIN_SECONDS: float = 25
+
+    # Cola de trabajos en segundo plano
+    JOB_LEASE_SECONDS: int = 300
+    JOB_POLL_INTERVAL: float = 2.0
+    JOB_RECONCILE_INTERVAL_MINUTES: int = 15  # 0 desactiva la reconciliación periódica
+    WORKER_HEARTBEAT_SECONDS: int = 15
+
+    # Borrado de documentos: la fila queda en la papelera (deleted_at) y el GC
+    # periódico borra filas y archivos pasado DOCUMENT_PURGE_AFTER_MINUTES. El
+    # GC también borra los archivos de UPLOAD_DIR sin documento (p.ej. tras
+    # eliminar un cliente) con más de GC_ORPHAN_MIN_AGE_MINUTES: una subida en
+    # curso escribe el archivo antes de crear su fila
+    DOCUMENT_PURGE_AFTER_MINUTES: int = 60 * 24
+    GC_INTERVAL_MINUTES: int = 60  # 0 desactiva el GC periódico
+    GC_ORPHAN_MIN_AGE_MINUTES: int = 60
+    GC_BATCH_SIZE: int = 500
+
+    # Cuota de almacenamiento por persona de la solicitud (una familia de 3
+    # tiene el triple); el admin puede fijar otra por usuario. 0 = sin límite
+    STORAGE_QUOTA_MB: int = 200
+
+    # Versiones de documentos: reemplazar guarda la anterior en
+    # document_versions. Pasados VERSION_ARCHIVE_AFTER_DAYS su archivo se mueve
+    # a ARCHIVE_DIR (volumen más barato; los PDF comprimidos con gzip)
+    ARCHIVE_DIR: str = "/data/archive"
+    VERSION_ARCHIVE_AFTER_DAYS: int = 30
+    VERSION_ARCHIVE_INTERVAL_MINUTES: int = 360  # 0 desactiva el archivado periódico
+
+    # Sondas de /readyz: resultado cacheado unos segundos para no consultar la
+    # BD en cada sonda, espacio libre mínimo en UPLOAD_DIR y latido del worker
+    # (si HEALTH_REQUIRE_WORKER, un worker sin latido deja la API "no lista")
+    HEALTH_CACHE_SECONDS: float = 5
+    HEALTH_MIN_FREE_DISK_MB: int = 500
+    HEALTH_WORKER_STALE_SECONDS: int = 60
+    HEALTH_REQUIRE_WORKER: bool = False
 
     @property
     def DB_URI(self) -> str:
+        if self.DB_URL:
+            return self.DB_URL
         return f"mysql+mysqldb://{self.DB_USER}:{self.DB_PASSWORD}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}?charset=utf8mb4"
 
     class Config:
         env_file = ".env"
+        # El .env puede traer variables que no son de la app (p.ej. ADMIN_PASSWORD)
+        extra = "ignore"
 
 settings = Settings()
@@ -1,9 +1,48 @@
+import threading
 from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
 from app.core.config import settings
 
-engine = create_engine(settings.DB_URI, pool_pre_ping=True, pool_recycle=3600)
-SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+# El engine se crea en el primer uso (no al importar): importar la app no carga
+# el driver de la BD y, con gunicorn --preload, cada worker crea el suyo tras el fork
+_engine: Engine | None = None
+_engine_lock = threading.Lock()
+
+def get_engine() -> Engine:
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                # SQLite (pruebas locales) necesita compartir la conexión entre hilos
+                connect_args = {"check_same_thread": False} if settings.DB_URI.startswith("sqlite") else {}
+                engine = create_engine(settings.DB_URI, pool_pre_ping=True, pool_recycle=3600, connect_args=connect_args)
+                from app.core.instrumentation import instrument_engine
+                instrument_engine(engine)
+                SessionLocal.configure(bind=engine)
+                _engine = engine
+    return _engine
+
+def dispose_engine(close: bool = True):
+    """Soltar las conexiones del pool si el engine ya existe (al apagar o tras un fork)"""
+    if _engine is not None:
+        _engine.dispose(close=close)
+
+class _LazySessionmaker(sessionmaker):
+    """sessionmaker que crea el engine al abrir la primera sesión"""
+
+    def __call__(self, **local_kw):
+        if _engine is None:
+            get_engine()
+        return super().__call__(**local_kw)
+
+SessionLocal = _LazySessionmaker(autoflush=False, autocommit=False)
+
+def __getattr__(name: str):
+    # Compatibilidad con `from app.core.db import engine` (scripts de migración, etc.)
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 class Base(DeclarativeBase):
     pass
@@ -1,28 +1,51 @@
+from dataclasses import dataclass
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 from app.core.db import get_db
-from app.core.security import decode_token
+from app.core.security import ACCESS, decode_token
+from app.core.token_versions import token_versions
 from app.repositories.user_repo import UserRepo
 from app.models.user import User
 
 oauth2 = OAuth2PasswordBearer(tokenUrl="/api/v1/login")
 
-def current_user(db: Session = Depends(get_db), token: str = Depends(oauth2)) -> User:
+@dataclass(frozen=True)
+class TokenUser:
+    """Usuario autenticado a partir de los claims del token, sin consultar la BD.
+
+    Expone los mismos atributos que usan los endpoints (id, email, role);
+    si se necesita la fila completa, cargarla con UserRepo(db).get_by_id(user.id).
+    """
+    id: int
+    email: str
+    role: str
+    is_active: bool = True
+
+def current_user(db: Session = Depends(get_db), token: str = Depends(oauth2)) -> TokenUser | User:
     try:
         payload = decode_token(token)
-        email = payload.get("sub")
     except Exception:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token inválido")
-    user = UserRepo(db).get_by_email(email)
-    if not user:
+
+    if "uid" in payload:
+        if payload.get("type") != ACCESS:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token inválido")
+        # Revocación (logout, desactivación...) comprobada contra la caché en memoria
+        if not token_versions.is_valid(payload["uid"], payload.get("ver", 0)):
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Sesión expirada o revocada")
+        return TokenUser(id=payload["uid"], email=payload["sub"], role=payload.get("role", "customer"))
+
+    # Tokens emitidos antes de los claims uid/role/ver: se validan contra la BD hasta que caduquen
+    user = UserRepo(db).get_by_email(payload.get("sub"))
+    if not user or user.is_active is False:
         raise HTTPException(status_code=401, detail="Usuario no encontrado")
     return user
 
 # Alias para compatibilidad
 get_current_user = current_user
 
-def require_admin(user: User = Depends(current_user)) -> User:
+def require_admin(user: TokenUser | User = Depends(current_user)) -> TokenUser | User:
     if user.role != "admin":
         raise HTTPException(status_code=403, detail="Solo admin")
     return user
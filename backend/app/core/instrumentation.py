@@ -0,0 +1,134 @@
+"""
+Instrumentación de peticiones HTTP y consultas SQL.
+
+- RequestMetricsMiddleware mide la latencia de cada petición por ruta (plantilla,
+  p.ej. /api/v1/admin/documents/{doc_id}) y cuántas consultas SQL hizo y cuánto
+  tiempo pasó en la BD; lo añade en la cabecera Server-Timing.
+- instrument_engine() engancha before/after_cursor_execute del engine para
+  contar y cronometrar cada sentencia, y registra las lentas con su texto.
+
+Todo se publica en el registro de app.core.metrics (endpoint /metrics).
+"""
+import logging
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.core.config import settings
+from app.core.metrics import REGISTRY
+from app.core.tracing import trace_engine
+
+logger = logging.getLogger("app.slow")
+
+QUERY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+MAX_STATEMENT_LOG = 1000
+
+request_latency = REGISTRY.histogram(
+    "http_request_duration_seconds", "Latencia de las peticiones HTTP", ("method", "route", "status")
+)
+request_queries = REGISTRY.histogram(
+    "http_request_db_queries", "Sentencias SQL por petición", ("method", "route"), buckets=COUNT_BUCKETS
+)
+request_db_time = REGISTRY.histogram(
+    "http_request_db_seconds", "Tiempo en la BD por petición", ("method", "route"), buckets=QUERY_BUCKETS
+)
+query_latency = REGISTRY.histogram(
+    "db_query_duration_seconds", "Duración de las sentencias SQL", ("operation",), buckets=QUERY_BUCKETS
+)
+slow_queries = REGISTRY.counter("db_slow_queries_total", "Sentencias SQL más lentas que SLOW_QUERY_MS", ("operation",))
+slow_requests = REGISTRY.counter("http_slow_requests_total", "Peticiones más lentas que SLOW_REQUEST_MS", ("route",))
+
+@dataclass
+class RequestStats:
+    queries: int = 0
+    db_seconds: float = 0.0
+
+# Estadísticas de la petición en curso. El objeto es mutable para que las
+# consultas hechas en el threadpool (endpoints síncronos) sumen al mismo
+_current: ContextVar[RequestStats | None] = ContextVar("request_stats", default=None)
+
+def _operation(statement: str) -> str:
+    word = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+    return word if word in ("SELECT", "INSERT", "UPDATE", "DELETE") else "OTHER"
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_start"].pop()
+    elapsed = time.perf_counter() - started
+    operation = _operation(statement)
+    query_latency.observe(elapsed, operation=operation)
+
+    stats = _current.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_seconds += elapsed
+
+    if elapsed * 1000 >= settings.SLOW_QUERY_MS:
+        slow_queries.inc(operation=operation)
+        logger.warning("Consulta lenta (%.0f ms): %s", elapsed * 1000, " ".join(statement.split())[:MAX_STATEMENT_LOG])
+
+def _handle_error(exception_context):
+    # Una sentencia que falla no pasa por after_cursor_execute
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_start"):
+        conn.info["query_start"].pop()
+
+def instrument_engine(engine: Engine):
+    """Registrar los hooks de medición (y de trazas, si están activas) en el engine (idempotente)"""
+    trace_engine(engine)
+    if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+class RequestMetricsMiddleware:
+    """Middleware ASGI: latencia por ruta, consultas SQL y tiempo de BD por petición"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                total_ms = (time.perf_counter() - started) * 1000
+                headers = list(message.get("headers", []))
+                headers.append((
+                    b"server-timing",
+                    f'db;dur={stats.db_seconds * 1000:.1f};desc="{stats.queries} queries", app;dur={total_ms:.1f}'.encode(),
+                ))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            elapsed = time.perf_counter() - started
+            # Plantilla de la ruta (no la URL) para no disparar la cardinalidad
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            method = scope["method"]
+            request_latency.observe(elapsed, method=method, route=route, status=str(status_code))
+            request_queries.observe(stats.queries, method=method, route=route)
+            request_db_time.observe(stats.db_seconds, method=method, route=route)
+            if elapsed * 1000 >= settings.SLOW_REQUEST_MS:
+                slow_requests.inc(route=route)
+                logger.warning(
+                    "Petición lenta: %s %s -> %s en %.0f ms (%s consultas, %.0f ms en BD)",
+                    method, scope["path"], status_code, elapsed * 1000, stats.queries, stats.db_seconds * 1000,
+                )
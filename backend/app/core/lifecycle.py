@@ -0,0 +1,78 @@
+"""
+Estado del proceso para las sondas de salud y el apagado ordenado.
+
+El middleware cuenta las peticiones en curso (y cuántas son subidas). Al apagar,
+el lifespan marca el proceso como "draining" (/readyz responde 503 para que el
+balanceador deje de enviarle tráfico) y espera hasta SHUTDOWN_DRAIN_SECONDS a que
+terminen antes de volcar los autoguardados y las trazas pendientes.
+"""
+import asyncio
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+class Lifecycle:
+    def __init__(self):
+        self.created_at = time.monotonic()
+        self.started = False
+        self.draining = False
+        self.inflight = 0
+        self.uploads = 0
+        self._lock = threading.Lock()
+
+    def _add(self, upload: bool, delta: int):
+        with self._lock:
+            self.inflight += delta
+            if upload:
+                self.uploads += delta
+
+    @property
+    def ready(self) -> bool:
+        return self.started and not self.draining
+
+    def stats(self) -> dict:
+        return {
+            "uptime_seconds": round(time.monotonic() - self.created_at, 1),
+            "started": self.started,
+            "draining": self.draining,
+            "inflight": self.inflight,
+            "uploads": self.uploads,
+        }
+
+    async def drain(self, timeout: float):
+        """Dejar de aceptar tráfico (readiness) y esperar a las peticiones en curso"""
+        self.draining = True
+        deadline = time.monotonic() + timeout
+        if self.inflight:
+            logger.info("Apagando: esperando %s peticiones en curso (%s subidas)", self.inflight, self.uploads)
+        while self.inflight and time.monotonic() < deadline:
+            await asyncio.sleep(0.1)
+        if self.inflight:
+            logger.warning(
+                "Apagado tras %.0f s con %s peticiones sin terminar (%s subidas)", timeout, self.inflight, self.uploads
+            )
+
+lifecycle = Lifecycle()
+
+# Las sondas no cuentan como tráfico: no deben retrasar el apagado
+PROBE_PATHS = {"/healthz", "/readyz"}
+
+class InflightMiddleware:
+    """Middleware ASGI: cuenta las peticiones HTTP en curso"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in PROBE_PATHS:
+            await self.app(scope, receive, send)
+            return
+        content_type = dict(scope.get("headers", [])).get(b"content-type", b"")
+        upload = content_type.startswith(b"multipart/form-data")
+        lifecycle._add(upload, 1)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            lifecycle._add(upload, -1)
@@ -1,7 +1,9 @@
+import uuid
 from datetime import datetime, timedelta
 from jose import jwt
 import bcrypt
 from app.core.config import settings
+from app.core.tracing import span
 
 ALGO = "HS256"
 
@@ -10,20 +12,45 @@ def hash_password(p: str) -> str:
     # gensalt() generates a salt for us
     pwd_bytes = p.encode('utf-8')
     salt = bcrypt.gensalt()
-    return bcrypt.hashpw(pwd_bytes[:72], salt).decode('utf-8')
+    with span("bcrypt.hash"):
+        return bcrypt.hashpw(pwd_bytes[:72], salt).decode('utf-8')
 
 def verify_password(p: str, hp: str) -> bool:
     pwd_bytes = p.encode('utf-8')
     # If the hash in DB was stored as string, encode it back to bytes
     hash_bytes = hp.encode('utf-8')
     try:
-        return bcrypt.checkpw(pwd_bytes[:72], hash_bytes)
+        with span("bcrypt.verify"):
+            return bcrypt.checkpw(pwd_bytes[:72], hash_bytes)
     except Exception:
         return False
 
-def create_token(sub: str) -> str:
-    exp = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    return jwt.encode({"sub": sub, "exp": exp}, settings.SECRET_KEY, algorithm=ALGO)
+ACCESS = "access"
+REFRESH = "refresh"
+
+def _encode(claims: dict, expires: timedelta) -> str:
+    now = datetime.utcnow()
+    return jwt.encode({**claims, "iat": now, "exp": now + expires}, settings.SECRET_KEY, algorithm=ALGO)
+
+def create_access_token(user) -> str:
+    """Token de acceso con lo necesario para autorizar sin ir a la BD"""
+    return _encode(
+        {"sub": user.email, "uid": user.id, "role": user.role, "ver": user.token_version or 0, "type": ACCESS},
+        timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES),
+    )
+
+def create_refresh_token(user) -> str:
+    return _encode(
+        {"sub": user.email, "uid": user.id, "ver": user.token_version or 0, "type": REFRESH, "jti": uuid.uuid4().hex},
+        timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+    )
+
+def create_token_pair(user) -> dict:
+    return {
+        "access_token": create_access_token(user),
+        "refresh_token": create_refresh_token(user),
+        "expires_in": settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+    }
 
 def decode_token(token: str):
     return jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGO])
@@ -0,0 +1,137 @@
+"""
+Caché en memoria para validar tokens sin consultar la BD en cada petición.
+
+Cada token lleva la versión de token del usuario (users.token_version). Cerrar
+sesión, cambiar la contraseña, el rol o el email y desactivar o eliminar al
+usuario incrementa esa versión, y los tokens anteriores dejan de valer.
+
+La caché solo guarda las excepciones: usuarios con versión distinta de 0 o
+desactivados (la gran mayoría no aparece). Se recarga entera con una consulta
+cada TOKEN_VERSIONS_REFRESH_SECONDS; los cambios hechos en este proceso se
+aplican al instante y los de otros procesos, en la siguiente recarga.
+
+Un usuario eliminado ya no tiene fila, así que la recarga no lo ve: además se
+comprueba que el usuario existe (una consulta por clave primaria la primera vez
+que aparece tras cada recarga). Así su eliminación llega a todos los procesos
+en como mucho TOKEN_VERSIONS_REFRESH_SECONDS.
+"""
+import logging
+import threading
+import time
+from sqlalchemy import or_, select
+from app.core.config import settings
+from app.core.db import SessionLocal
+from app.core.metrics import REGISTRY
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+reloads = REGISTRY.counter("auth_token_versions_reloads_total", "Recargas de la caché de versiones de token")
+rejected_tokens = REGISTRY.counter("auth_tokens_revoked_total", "Tokens rechazados por versión vieja o usuario inactivo")
+
+class TokenVersionCache:
+    def __init__(self, refresh_seconds: float):
+        self.refresh_seconds = refresh_seconds
+        self._versions: dict[int, int] = {}
+        self._inactive: set[int] = set()
+        # Usuarios que existen / que no, comprobados desde la última recarga
+        self._existing: set[int] = set()
+        self._missing: set[int] = set()
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def _reload(self):
+        db = SessionLocal()
+        try:
+            rows = db.execute(
+                select(User.id, User.token_version, User.is_active)
+                .where(or_(User.token_version != 0, User.is_active == False))  # noqa: E712
+            ).all()
+        finally:
+            db.close()
+        self._versions = {row.id: row.token_version for row in rows if row.token_version}
+        self._inactive = {row.id for row in rows if row.is_active is False}
+        self._existing, self._missing = set(), set()
+        self._loaded_at = time.monotonic()
+        reloads.inc()
+
+    def _ensure_fresh(self):
+        if time.monotonic() - self._loaded_at < self.refresh_seconds:
+            return
+        with self._lock:
+            if time.monotonic() - self._loaded_at < self.refresh_seconds:
+                return
+            try:
+                self._reload()
+            except Exception:
+                # Sin BD se sigue con la última copia; se reintenta en la próxima petición
+                logger.exception("No se pudo recargar la caché de versiones de token")
+
+    def load(self):
+        """Cargar la caché si hace falta (al arrancar, para no hacerlo en la primera petición)"""
+        self._ensure_fresh()
+
+    def _exists(self, user_id: int) -> bool:
+        if user_id in self._existing:
+            return True
+        if user_id in self._missing:
+            return False
+        db = SessionLocal()
+        try:
+            found = db.scalar(select(User.id).where(User.id == user_id)) is not None
+        except Exception:
+            # Igual que sin recarga: sin BD no se rechaza a nadie por esto
+            logger.exception("No se pudo comprobar si existe el usuario %s", user_id)
+            return True
+        finally:
+            db.close()
+        (self._existing if found else self._missing).add(user_id)
+        return found
+
+    def is_valid(self, user_id: int, version: int) -> bool:
+        """¿Sigue vigente un token con esta versión para este usuario?"""
+        self._ensure_fresh()
+        valid = (
+            user_id not in self._inactive
+            and self._versions.get(user_id, 0) == version
+            and self._exists(user_id)
+        )
+        if not valid:
+            rejected_tokens.inc()
+        return valid
+
+    def update(self, user: User):
+        """Aplicar en este proceso la versión y el estado actuales del usuario (tras el commit)"""
+        with self._lock:
+            if user.token_version:
+                self._versions[user.id] = user.token_version
+            else:
+                self._versions.pop(user.id, None)
+            if user.is_active is False:
+                self._inactive.add(user.id)
+            else:
+                self._inactive.discard(user.id)
+
+    def forget(self, user_id: int):
+        """Usuario eliminado: sus tokens dejan de valer ya en este proceso (en
+        los demás, tras su próxima recarga)"""
+        with self._lock:
+            self._existing.discard(user_id)
+            self._missing.add(user_id)
+
+    def stats(self) -> dict:
+        return {
+            "versions": len(self._versions),
+            "inactive": len(self._inactive),
+            "checked_users": len(self._existing),
+            "missing_users": len(self._missing),
+            "age_seconds": round(time.monotonic() - self._loaded_at, 1) if self._loaded_at else None,
+        }
+
+    def clear(self):
+        with self._lock:
+            self._versions, self._inactive = {}, set()
+            self._existing, self._missing = set(), set()
+            self._loaded_at = 0.0
+
+token_versions = TokenVersionCache(settings.TOKEN_VERSIONS_REFRESH_SECONDS)
@@ -0,0 +1,371 @@
+"""
+Trazas por petición al estilo OpenTelemetry, sin dependencias externas.
+
+Cada petición HTTP (o trabajo del worker) abre un span raíz; dentro se anidan
+spans de las sentencias SQL, los commits, la E/S de archivos y bcrypt. Al
+terminar, los spans se encolan y un hilo los exporta por lotes en formato
+OTLP/JSON:
+
+- TRACING_EXPORTER=file: una línea JSON por lote en TRACING_FILE (lo lee el
+  receptor otlpjsonfile del collector o backend/trace_report.py).
+- TRACING_EXPORTER=otlp: POST a TRACING_OTLP_ENDPOINT (collector, Jaeger, Tempo...).
+
+Se respeta la cabecera W3C traceparent entrante y el id de la traza se
+devuelve en X-Trace-Id. Con TRACING_EXPORTER=none todo es un no-op.
+"""
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.metrics import REGISTRY
+
+logger = logging.getLogger("app.tracing")
+
+# SpanKind de OTLP
+INTERNAL, SERVER, CLIENT, CONSUMER = 1, 2, 3, 5
+STATUS_ERROR = 2
+
+MAX_QUEUE = 10_000
+BATCH_SIZE = 512
+EXPORT_INTERVAL = 2.0
+MAX_STATEMENT = 2000
+
+dropped_spans = REGISTRY.counter("tracing_spans_dropped_total", "Spans descartados por cola llena o error al exportar")
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: str | None
+    kind: int = INTERNAL
+    start_ns: int = field(default_factory=time.time_ns)
+    end_ns: int = 0
+    attributes: dict = field(default_factory=dict)
+    error: str | None = None
+
+    def set(self, key: str, value):
+        self.attributes[key] = value
+
+    def record_error(self, error: BaseException | str):
+        self.error = error if isinstance(error, str) else f"{type(error).__name__}: {error}"
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+class _NoopSpan:
+    """Span de una traza no muestreada (o con el tracing apagado)"""
+    trace_id = span_id = None
+
+    def set(self, key: str, value):
+        pass
+
+    def record_error(self, error):
+        pass
+
+NOOP = _NoopSpan()
+
+_current: ContextVar[Span | _NoopSpan | None] = ContextVar("current_span", default=None)
+
+def enabled() -> bool:
+    return settings.TRACING_EXPORTER != "none"
+
+def current_span() -> Span | _NoopSpan:
+    return _current.get() or NOOP
+
+def _new_id(bits: int) -> str:
+    return f"{random.getrandbits(bits):0{bits // 4}x}"
+
+def parse_traceparent(value: str | None) -> tuple[str, str, bool] | None:
+    """'00-<trace_id>-<span_id>-<flags>' -> (trace_id, span_id, sampled)"""
+    parts = (value or "").strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        int(parts[1], 16), int(parts[2], 16)
+        sampled = bool(int(parts[3], 16) & 1)
+    except ValueError:
+        return None
+    return parts[1], parts[2], sampled
+
+def start_span(name: str, *, kind: int = INTERNAL, root: bool = False, traceparent: str | None = None, **attributes):
+    """Crear un span hijo del actual sin activarlo (lo cierra end_span).
+
+    Fuera de una traza solo se crea si root=True; así el trabajo de fondo
+    (autoguardado, pool de bcrypt) no genera trazas sueltas.
+    """
+    if not enabled():
+        return NOOP
+    parent = _current.get()
+    if parent is NOOP:
+        return NOOP
+    if parent is not None:
+        return Span(name, parent.trace_id, _new_id(64), parent.span_id, kind, attributes=attributes)
+    if not root:
+        return NOOP
+    remote = parse_traceparent(traceparent)
+    if remote:
+        trace_id, parent_id, sampled = remote
+    else:
+        trace_id, parent_id = _new_id(128), None
+        sampled = random.random() < settings.TRACING_SAMPLE_RATIO
+    if not sampled:
+        return NOOP
+    return Span(name, trace_id, _new_id(64), parent_id, kind, attributes=attributes)
+
+def end_span(span: Span | _NoopSpan, error: BaseException | str | None = None):
+    if span is NOOP:
+        return
+    span.end_ns = time.time_ns()
+    if error is not None:
+        span.record_error(error)
+    _processor.submit(span)
+
+@contextmanager
+def span(name: str, *, kind: int = INTERNAL, root: bool = False, traceparent: str | None = None, **attributes):
+    """Abrir un span y hacerlo el actual dentro del bloque"""
+    s = start_span(name, kind=kind, root=root, traceparent=traceparent, **attributes)
+    if s is NOOP and not root:
+        # Sin traza activa (o no muestreada): no se toca el contexto
+        yield s
+        return
+    token = _current.set(s)
+    try:
+        yield s
+    except BaseException as e:
+        end_span(s, e)
+        raise
+    else:
+        end_span(s)
+    finally:
+        _current.reset(token)
+
+# --- Exportación (OTLP/JSON) ---
+
+def _attr_value(value) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+def _otlp_span(s: Span) -> dict:
+    data = {
+        "traceId": s.trace_id,
+        "spanId": s.span_id,
+        "name": s.name,
+        "kind": s.kind,
+        "startTimeUnixNano": str(s.start_ns),
+        "endTimeUnixNano": str(s.end_ns),
+        "attributes": [{"key": k, "value": _attr_value(v)} for k, v in s.attributes.items() if v is not None],
+    }
+    if s.parent_id:
+        data["parentSpanId"] = s.parent_id
+    if s.error:
+        data["status"] = {"code": STATUS_ERROR, "message": s.error}
+    return data
+
+def otlp_payload(spans: list[Span], service_name: str) -> dict:
+    """Cuerpo de un ExportTraceServiceRequest en la codificación JSON de OTLP"""
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [
+                {"key": "service.name", "value": {"stringValue": service_name}},
+                {"key": "process.pid", "value": {"intValue": str(os.getpid())}},
+            ]},
+            "scopeSpans": [{"scope": {"name": "app.tracing"}, "spans": [_otlp_span(s) for s in spans]}],
+        }]
+    }
+
+class FileExporter:
+    def __init__(self, path: str):
+        self.path = path
+
+    def export(self, payload: dict):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        # Una línea JSON por lote (formato del receptor otlpjsonfile)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(payload, separators=(",", ":")) + "\n")
+
+class OtlpHttpExporter:
+    def __init__(self, endpoint: str, timeout: float = 5.0):
+        self.endpoint = endpoint
+        self.timeout = timeout
+
+    def export(self, payload: dict):
+        request = urllib.request.Request(
+            self.endpoint,
+            data=json.dumps(payload, separators=(",", ":")).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+def _make_exporter():
+    if settings.TRACING_EXPORTER == "file":
+        return FileExporter(settings.TRACING_FILE)
+    if settings.TRACING_EXPORTER == "otlp":
+        return OtlpHttpExporter(settings.TRACING_OTLP_ENDPOINT)
+    raise ValueError(f"TRACING_EXPORTER desconocido: {settings.TRACING_EXPORTER}")
+
+class _BatchProcessor:
+    """Cola de spans terminados y un hilo que los exporta por lotes"""
+
+    def __init__(self):
+        self.service_name = settings.TRACING_SERVICE_NAME
+        self._queue: queue.Queue[Span] = queue.Queue(maxsize=MAX_QUEUE)
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._exporter = None
+
+    def submit(self, s: Span):
+        if self._thread is None:
+            self._start()
+        try:
+            self._queue.put_nowait(s)
+        except queue.Full:
+            dropped_spans.inc()
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None:
+                self._exporter = _make_exporter()
+                self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+                self._thread.start()
+
+    def _drain(self, wait: float | None) -> list[Span]:
+        batch = []
+        try:
+            batch.append(self._queue.get(timeout=wait) if wait else self._queue.get_nowait())
+            while len(batch) < BATCH_SIZE:
+                batch.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+        return batch
+
+    def _export(self, batch: list[Span]):
+        try:
+            self._exporter.export(otlp_payload(batch, self.service_name))
+        except Exception as e:
+            dropped_spans.inc(len(batch))
+            logger.warning("No se pudieron exportar %s spans: %s", len(batch), e)
+
+    def _run(self):
+        while True:
+            batch = self._drain(EXPORT_INTERVAL)
+            if batch:
+                self._export(batch)
+
+    def flush(self):
+        """Exportar lo que quede en la cola (al apagar el proceso)"""
+        if self._exporter is None:
+            return
+        while batch := self._drain(None):
+            self._export(batch)
+
+_processor = _BatchProcessor()
+
+def setup_tracing(service_name: str | None = None):
+    """Fijar el nombre del servicio (p.ej. el worker usa otro)"""
+    if service_name:
+        _processor.service_name = service_name
+
+def shutdown_tracing():
+    _processor.flush()
+
+# --- Integraciones: SQLAlchemy y ASGI ---
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    s = start_span(
+        statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "SQL",
+        kind=CLIENT,
+        **{"db.system": conn.dialect.name, "db.statement": " ".join(statement.split())[:MAX_STATEMENT]},
+    )
+    if executemany:
+        s.set("db.executemany", True)
+    conn.info.setdefault("trace_spans", []).append(s)
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    end_span(conn.info["trace_spans"].pop())
+
+def _handle_error(exception_context):
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("trace_spans"):
+        end_span(conn.info["trace_spans"].pop(), exception_context.original_exception)
+
+def _before_commit(session):
+    # El span cubre el flush pendiente más el COMMIT; las sentencias del flush
+    # quedan como hermanas (solapadas en el tiempo)
+    session.info["trace_commit"] = start_span("db.commit")
+
+def _after_commit(session):
+    end_span(session.info.pop("trace_commit", NOOP))
+
+def _after_soft_rollback(session, previous_transaction):
+    s = session.info.pop("trace_commit", None)
+    if s is not None:
+        end_span(s, "rollback")
+
+def trace_engine(engine: Engine):
+    """Registrar los spans de SQL en el engine y de commit en las sesiones (idempotente)"""
+    if not enabled() or event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+    event.listen(Session, "before_commit", _before_commit)
+    event.listen(Session, "after_commit", _after_commit)
+    event.listen(Session, "after_soft_rollback", _after_soft_rollback)
+
+class TracingMiddleware:
+    """Middleware ASGI: un span SERVER por petición, padre de todo lo demás"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not enabled():
+            await self.app(scope, receive, send)
+            return
+
+        traceparent = None
+        for name, value in scope.get("headers", []):
+            if name == b"traceparent":
+                traceparent = value.decode("latin-1")
+                break
+
+        method = scope["method"]
+        with span(
+            f"{method} {scope['path']}", kind=SERVER, root=True, traceparent=traceparent,
+            **{"http.request.method": method, "url.path": scope["path"]},
+        ) as s:
+            async def send_with_trace(message):
+                if message["type"] == "http.response.start":
+                    s.set("http.response.status_code", message["status"])
+                    if s.trace_id:
+                        message = {**message, "headers": [*message.get("headers", []), (b"x-trace-id", s.trace_id.encode())]}
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_trace)
+            finally:
+                # Nombre por plantilla de ruta (como las métricas), no por URL
+                route = getattr(scope.get("route"), "path", None)
+                if route and s is not NOOP:
+                    s.name = f"{method} {route}"
+                    s.set("http.route", route)
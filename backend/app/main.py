@@ -1,9 +1,48 @@
-from fastapi import FastAPI
+import logging
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Header, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
+from sqlalchemy import text
+from starlette.concurrency import run_in_threadpool
 from app.core.config import settings
-from app.api.v1 import auth, documents, me, admin, users, clients, forms, categories, activities
+from app.core.db import dispose_engine, get_engine
+from app.core.lifecycle import InflightMiddleware, lifecycle
+from app.core.instrumentation import RequestMetricsMiddleware
+from app.core.metrics import REGISTRY
+from app.core.tracing import TracingMiddleware, shutdown_tracing
+from app.api.v1 import auth, documents, me, admin, users, clients, forms, categories, activities, jobs, search, review_queue, diagnostics
+from app.core.token_versions import token_versions
+from app.services import health
+from app.services.form_autosave import autosave_buffer
 
-app = FastAPI(title=settings.APP_NAME)
+logging.basicConfig(level=settings.LOG_LEVEL, format="%(asctime)s %(levelname)s %(name)s %(message)s")
+logger = logging.getLogger("app")
+
+def _warm_up():
+    """Crear el engine, abrir la primera conexión del pool y cargar la caché de
+    tokens aquí y no en la primera petición (si la BD no responde, se sigue: /readyz lo reflejará)"""
+    try:
+        with get_engine().connect() as conn:
+            conn.execute(text("SELECT 1"))
+        token_versions.load()
+    except Exception as e:
+        logger.warning("Arranque sin BD disponible: %s", e)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await run_in_threadpool(_warm_up)
+    autosave_buffer.start()
+    lifecycle.started = True
+    yield
+    # Terminar las subidas y peticiones en curso, parar el temporizador del
+    # autoguardado (los borradores quedan en la BD) y exportar las trazas antes de salir
+    await lifecycle.drain(settings.SHUTDOWN_DRAIN_SECONDS)
+    await run_in_threadpool(autosave_buffer.stop)
+    await run_in_threadpool(shutdown_tracing)
+    dispose_engine()
+
+app = FastAPI(title=settings.APP_NAME, lifespan=lifespan)
 
 origins = [o.strip() for o in settings.CORS_ORIGINS.split(',') if o]
 # Ensure development frontend is allowed even if not in .env
@@ -20,7 +59,37 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-print(f"CORS Origins configured: {[o.strip() for o in settings.CORS_ORIGINS.split(',') if o]}")
+# Medición por petición (latencia por ruta, consultas SQL, tiempo de BD)
+app.add_middleware(RequestMetricsMiddleware)
+# Trazas (TRACING_EXPORTER): el span de la petición envuelve todo lo demás
+app.add_middleware(TracingMiddleware)
+# Peticiones en curso, para esperar a que terminen al apagar
+app.add_middleware(InflightMiddleware)
+
+logger.info("CORS Origins configured: %s", [o.strip() for o in settings.CORS_ORIGINS.split(',') if o])
+
+@app.get("/metrics", include_in_schema=False)
+def metrics(authorization: str | None = Header(None)):
+    """Métricas del proceso en formato de texto de Prometheus"""
+    if settings.METRICS_TOKEN and authorization != f"Bearer {settings.METRICS_TOKEN}":
+        raise HTTPException(status_code=401, detail="No autorizado")
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/healthz", include_in_schema=False)
+def healthz():
+    """Liveness: el proceso responde (no comprueba dependencias)"""
+    return {"status": "ok"}
+
+@app.get("/readyz", include_in_schema=False)
+def readyz():
+    """Readiness: arrancado, sin apagarse y con BD, almacenamiento, disco (y worker) en orden.
+
+    Las comprobaciones se cachean HEALTH_CACHE_SECONDS (ver app.services.health).
+    """
+    if not lifecycle.ready:
+        return JSONResponse({"status": "draining" if lifecycle.draining else "starting"}, status_code=503)
+    report = health.readiness()
+    return JSONResponse(report, status_code=200 if report["status"] == "ok" else 503)
 
 # Auth and user endpoints
 app.include_router(auth.router, prefix="/api/v1", tags=["auth"])
@@ -41,6 +110,18 @@ app.include_router(categories.router, prefix="/api/v1")
 # Activity endpoints
 app.include_router(activities.router, prefix="/api/v1")
 
+# Job endpoints
+app.include_router(jobs.router, prefix="/api/v1")
+
+# Search endpoints
+app.include_router(search.router, prefix="/api/v1")
+
+# Review queue endpoints
+app.include_router(review_queue.router, prefix="/api/v1")
+
+# Diagnostics endpoints
+app.include_router(diagnostics.router, prefix="/api/v1")
+
 # Admin endpoints
 app.include_router(admin.router, prefix="/api/v1/admin", tags=["admin"])
 app.include_router(users.router, prefix="/api/v1/admin/users", tags=["users"])
@@ -1,15 +1,22 @@
 from app.models.user import User
 from app.models.document import Document
+from app.models.document_version import DocumentVersion
 from app.models.client import Client
 from app.models.intake_form import IntakeForm
 from app.models.category import Category
 from app.models.activity import Activity
+from app.models.job import Job
+from app.models.worker_heartbeat import WorkerHeartbeat
+from app.models import search_index  # noqa: F401  (FTS5 para SQLite)
 
 __all__ = [
     "User",
     "Document",
+    "DocumentVersion",
     "Client",
     "IntakeForm",
     "Category",
     "Activity",
+    "Job",
+    "WorkerHeartbeat",
 ]
@@ -1,4 +1,4 @@
-from sqlalchemy import String, Integer, DateTime, ForeignKey, Text, Float
+from sqlalchemy import String, Integer, DateTime, ForeignKey, Text, Float, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from datetime import datetime
 from app.core.db import Base
@@ -6,6 +6,10 @@ from app.core.db import Base
 class Client(Base):
     """Modelo extendido de cliente con información detallada"""
     __tablename__ = "clients"
+    # Búsqueda de admin (MySQL); en SQLite se usa search_fts, ver models/search_index.py
+    __table_args__ = (
+        Index("ft_clients_search", "first_name", "last_name", "phone", mysql_prefix="FULLTEXT").ddl_if(dialect="mysql"),
+    )
     
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, unique=True)
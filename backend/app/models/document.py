@@ -1,10 +1,19 @@
-from sqlalchemy import String, Integer, DateTime, ForeignKey
-from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import String, Integer, DateTime, ForeignKey, Boolean, Index, event
+from sqlalchemy.orm import Mapped, Session, mapped_column, with_loader_criteria
 from datetime import datetime
 from app.core.db import Base
 
 class Document(Base):
     __tablename__ = "documents"
+    # Búsqueda de admin (MySQL); en SQLite se usa search_fts, ver models/search_index.py
+    __table_args__ = (
+        Index("ft_documents_name", "original_name", mysql_prefix="FULLTEXT").ddl_if(dialect="mysql"),
+        # Cola de revisión: documentos pendientes por antigüedad
+        Index("ix_documents_status_created", "status", "created_at"),
+        # "Mis documentos": solo los vivos de un usuario (las versiones anteriores
+        # están en document_versions)
+        Index("ix_documents_user_current", "user_id", "deleted_at"),
+    )
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     category: Mapped[str] = mapped_column(String(100), nullable=False)  # requerida
@@ -12,7 +21,37 @@ class Document(Base):
     stored_name: Mapped[str] = mapped_column(String(255))
     mime_type: Mapped[str] = mapped_column(String(100))
     size_bytes: Mapped[int] = mapped_column(Integer)
-    status: Mapped[str] = mapped_column(String(20), default="pending", nullable=False)  # pending|approved|rejected
+    sha256: Mapped[str | None] = mapped_column(String(64))  # del archivo guardado; None en documentos antiguos
+    status: Mapped[str] = mapped_column(String(20), default="pending", nullable=False)  # quarantined|infected|pending|approved|rejected
     admin_notes: Mapped[str | None] = mapped_column(String(500))
     family_member_name: Mapped[str | None] = mapped_column(String(200))
+    scan_result: Mapped[str | None] = mapped_column(String(200))  # clean o nombre de la firma detectada
+    scanned_at: Mapped[datetime | None] = mapped_column(DateTime)
+    # Reserva temporal de la revisión (otro admin no lo ve en la cola hasta claimed_until)
+    claimed_by_id: Mapped[int | None] = mapped_column(Integer, ForeignKey("users.id", ondelete="SET NULL"))
+    claimed_until: Mapped[datetime | None] = mapped_column(DateTime)
+    has_preview: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)  # miniatura WebP generada
+    # Fecha de subida de la versión actual
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    # Versión del archivo: sube al reemplazarlo (la anterior pasa a
+    # document_versions). Bloqueo optimista como en IntakeForm: cada UPDATE
+    # lleva "WHERE version = <leída>" y dos reemplazos a la vez no se pisan
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=1, server_default="1")
+    # Papelera: el borrado solo marca la fecha; el GC (tarea gc_uploads) borra
+    # la fila y los archivos pasado DOCUMENT_PURGE_AFTER_MINUTES
+    deleted_at: Mapped[datetime | None] = mapped_column(DateTime, index=True)
+
+    __mapper_args__ = {"version_id_col": version, "version_id_generator": False}
+
+@event.listens_for(Session, "do_orm_execute")
+def _hide_deleted_documents(state):
+    """Las consultas ORM no ven los documentos borrados salvo con
+    execution_options(include_deleted=True) (lo usa el GC)"""
+    if state.is_column_load or state.is_relationship_load:
+        return
+    if state.execution_options.get("include_deleted", False):
+        return
+    if state.is_select or state.is_update or state.is_delete:
+        state.statement = state.statement.options(
+            with_loader_criteria(Document, Document.deleted_at.is_(None), include_aliases=True)
+        )
@@ -0,0 +1,29 @@
+from sqlalchemy import String, Integer, DateTime, ForeignKey, Index, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import datetime
+from app.core.db import Base
+
+class DocumentVersion(Base):
+    """Versión anterior de un documento; la actual es la fila de documents"""
+    __tablename__ = "document_versions"
+    __table_args__ = (
+        UniqueConstraint("document_id", "version", name="uq_document_versions_version"),
+        # Tarea de archivado: versiones aún en UPLOAD_DIR por antigüedad
+        Index("ix_document_versions_tier_replaced", "storage_tier", "replaced_at"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    document_id: Mapped[int] = mapped_column(Integer, ForeignKey("documents.id", ondelete="CASCADE"), nullable=False, index=True)
+    version: Mapped[int] = mapped_column(Integer, nullable=False)
+    original_name: Mapped[str] = mapped_column(String(255))
+    stored_name: Mapped[str] = mapped_column(String(255), index=True)
+    mime_type: Mapped[str] = mapped_column(String(100))
+    size_bytes: Mapped[int] = mapped_column(Integer)
+    sha256: Mapped[str | None] = mapped_column(String(64))
+    status: Mapped[str] = mapped_column(String(20))  # estado de revisión que tenía al ser reemplazada
+    uploaded_at: Mapped[datetime | None] = mapped_column(DateTime)
+    replaced_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    # hot: el archivo sigue en UPLOAD_DIR; archive: movido a ARCHIVE_DIR (tarea archive_document_versions)
+    storage_tier: Mapped[str] = mapped_column(String(10), default="hot", nullable=False)
+    compression: Mapped[str | None] = mapped_column(String(10))  # gzip o None
+    stored_size: Mapped[int | None] = mapped_column(Integer)  # bytes en ARCHIVE_DIR
@@ -1,4 +1,4 @@
-from sqlalchemy import String, Integer, DateTime, ForeignKey, Text, Date
+from sqlalchemy import String, Integer, DateTime, ForeignKey, Text, Date, JSON, Index, UniqueConstraint, text
 from sqlalchemy.orm import Mapped, mapped_column
 from datetime import datetime
 from app.core.db import Base
@@ -6,16 +6,28 @@ from app.core.db import Base
 class IntakeForm(Base):
     """Modelo para almacenar los datos del formulario de solicitud de visa"""
     __tablename__ = "intake_forms"
+    __table_args__ = (
+        UniqueConstraint("user_id", name="uq_intake_forms_user_id"),
+        # Búsqueda de admin (MySQL); en SQLite se usa search_fts, ver models/search_index.py
+        Index("ft_intake_forms_search", "nombres", "apellidos", "pasaporte", mysql_prefix="FULLTEXT").ddl_if(dialect="mysql"),
+        # Índice multivaluado (MySQL 8.0.17+) sobre los pasaportes de los familiares,
+        # usado por "pasaporte MEMBER OF (...)" en el listado de admin
+        Index(
+            "ix_intake_forms_family_pasaportes",
+            text("(CAST(family_members_data->'$[*].pasaporte' AS CHAR(50) ARRAY))"),
+        ).ddl_if(dialect="mysql"),
+    )
     
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    # Un formulario por usuario (UNIQUE): permite el upsert de POST /forms
     user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     
     # Información Personal (Paso 1)
     apellidos: Mapped[str | None] = mapped_column(String(200))
     nombres: Mapped[str | None] = mapped_column(String(200))
     fecha_nacimiento: Mapped[str | None] = mapped_column(String(20))  # Stored as string for flexibility
-    nacionalidad: Mapped[str | None] = mapped_column(String(100))
-    pasaporte: Mapped[str | None] = mapped_column(String(50))
+    nacionalidad: Mapped[str | None] = mapped_column(String(100), index=True)
+    pasaporte: Mapped[str | None] = mapped_column(String(50), index=True)
     
     # Información Académica (Paso 2)
     nivel_educativo: Mapped[str | None] = mapped_column(String(100))
@@ -35,16 +47,26 @@ class IntakeForm(Base):
     # Información General (Paso 6)
     familiares_exterior: Mapped[str | None] = mapped_column(Text)
     
-    # Datos de miembros de la familia (JSON string)
-    family_members_data: Mapped[str | None] = mapped_column(Text)
+    # Datos de miembros de la familia (JSON nativo, ver schemas.intake_form.FamilyMember)
+    family_members_data: Mapped[list | None] = mapped_column(JSON)
     
-    # Datos extendidos (JSON string)
-    parents_data: Mapped[str | None] = mapped_column(Text)
-    education_data: Mapped[str | None] = mapped_column(Text)
-    work_data: Mapped[str | None] = mapped_column(Text)
+    # Datos extendidos (JSON nativo)
+    parents_data: Mapped[dict | None] = mapped_column(JSON)
+    education_data: Mapped[list | None] = mapped_column(JSON)
+    work_data: Mapped[list | None] = mapped_column(JSON)
     
     # Metadata
+    # Versión para bloqueo optimista; la asigna la aplicación (ver __mapper_args__)
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=1, server_default="1")
+    # Autoguardado (ver services/form_autosave.py): cambios ya aceptados (la
+    # versión ya subió) que aún no se copiaron a las columnas, y cuándo copiarlos
+    autosave_draft: Mapped[dict | None] = mapped_column(JSON(none_as_null=True))
+    autosave_due_at: Mapped[datetime | None] = mapped_column(DateTime, index=True)
     is_completed: Mapped[bool] = mapped_column(default=False)
     completed_at: Mapped[datetime | None] = mapped_column(DateTime)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Cada UPDATE incluye "WHERE version = <versión leída>"; si otra escritura
+    # llegó antes, SQLAlchemy lanza StaleDataError en lugar de pisarla
+    __mapper_args__ = {"version_id_col": version, "version_id_generator": False}
@@ -0,0 +1,34 @@
+from sqlalchemy import String, Integer, DateTime, ForeignKey, Text, JSON, Index
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import datetime
+from app.core.db import Base
+
+class Job(Base):
+    """Trabajo en cola para procesar fuera del request (exportaciones, ZIPs, reconciliaciones)"""
+    __tablename__ = "jobs"
+    __table_args__ = (
+        # Índice usado por los workers para reclamar el siguiente trabajo
+        Index("ix_jobs_claim", "status", "priority", "run_after"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    kind: Mapped[str] = mapped_column(String(50), nullable=False, index=True)
+    payload: Mapped[dict | None] = mapped_column(JSON)
+
+    status: Mapped[str] = mapped_column(String(20), default="queued", nullable=False)  # queued|running|done|failed
+    priority: Mapped[int] = mapped_column(Integer, default=0, nullable=False)  # mayor = se procesa antes
+    attempts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    max_attempts: Mapped[int] = mapped_column(Integer, default=3, nullable=False)
+    run_after: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+
+    # Lease: el worker que lo tomó y hasta cuándo lo tiene reservado
+    locked_by: Mapped[str | None] = mapped_column(String(100))
+    locked_until: Mapped[datetime | None] = mapped_column(DateTime)
+
+    result: Mapped[dict | None] = mapped_column(JSON)
+    last_error: Mapped[str | None] = mapped_column(Text)
+
+    created_by_id: Mapped[int | None] = mapped_column(Integer, ForeignKey("users.id", ondelete="SET NULL"))
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime)
@@ -0,0 +1,89 @@
+"""
+Índice de búsqueda para SQLite (pruebas locales).
+
+En MySQL la búsqueda usa índices FULLTEXT declarados en cada modelo. SQLite no
+los tiene, así que se crea una tabla FTS5 (search_fts) mantenida por triggers
+sobre users, clients, intake_forms y documents. El rowid codifica el origen
+(id * 4 + tipo) para que los triggers borren por clave y no recorran la tabla.
+"""
+from sqlalchemy import DDL, event
+from app.core.db import Base
+
+# tipo -> (código para el rowid, tabla, expresión del título, expresión del texto indexado, user_id)
+SOURCES = {
+    "user": (0, "users", "{r}.email", "{r}.email", "{r}.id"),
+    "client": (
+        1, "clients",
+        "TRIM(COALESCE({r}.first_name, '') || ' ' || COALESCE({r}.last_name, ''))",
+        "COALESCE({r}.first_name, '') || ' ' || COALESCE({r}.last_name, '') || ' ' || COALESCE({r}.phone, '')",
+        "{r}.user_id",
+    ),
+    "form": (
+        2, "intake_forms",
+        "TRIM(COALESCE({r}.nombres, '') || ' ' || COALESCE({r}.apellidos, ''))",
+        "COALESCE({r}.nombres, '') || ' ' || COALESCE({r}.apellidos, '') || ' ' || COALESCE({r}.pasaporte, '')",
+        "{r}.user_id",
+    ),
+    "document": (3, "documents", "{r}.original_name", "COALESCE({r}.original_name, '')", "{r}.user_id"),
+}
+
+# Filas que no se indexan: documentos en la papelera (soft delete)
+LIVE_ROWS = {"document": "{r}.deleted_at IS NULL"}
+
+CREATE_FTS = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS search_fts USING fts5("
+    "kind UNINDEXED, user_id UNINDEXED, title UNINDEXED, content, "
+    "tokenize = 'unicode61 remove_diacritics 2')"
+)
+
+def _insert_sql(kind: str, r: str) -> str:
+    code, _table, title, content, user_id = SOURCES[kind]
+    live = LIVE_ROWS.get(kind)
+    return (
+        f"INSERT INTO search_fts(rowid, kind, user_id, title, content) "
+        f"SELECT {r}.id * 4 + {code}, '{kind}', {user_id.format(r=r)}, "
+        f"{title.format(r=r)}, {content.format(r=r)}"
+        + (f" WHERE {live.format(r=r)}" if live else "")
+    )
+
+def trigger_ddl(kind: str) -> list[str]:
+    code, table, *_rest = SOURCES[kind]
+    delete = f"DELETE FROM search_fts WHERE rowid = old.id * 4 + {code}"
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS search_fts_{table}_ai AFTER INSERT ON {table} BEGIN {_insert_sql(kind, 'new')}; END",
+        f"CREATE TRIGGER IF NOT EXISTS search_fts_{table}_au AFTER UPDATE ON {table} BEGIN {delete}; {_insert_sql(kind, 'new')}; END",
+        f"CREATE TRIGGER IF NOT EXISTS search_fts_{table}_ad AFTER DELETE ON {table} BEGIN {delete}; END",
+    ]
+
+def rebuild_sql() -> list[str]:
+    """Sentencias para (re)llenar search_fts con los datos existentes"""
+    statements = ["DELETE FROM search_fts"]
+    for kind, (code, table, title, content, user_id) in SOURCES.items():
+        live = LIVE_ROWS.get(kind)
+        statements.append(
+            f"INSERT INTO search_fts(rowid, kind, user_id, title, content) "
+            f"SELECT t.id * 4 + {code}, '{kind}', {user_id.format(r='t')}, "
+            f"{title.format(r='t')}, {content.format(r='t')} FROM {table} t"
+            + (f" WHERE {live.format(r='t')}" if live else "")
+        )
+    return statements
+
+def drop_triggers_sql(kind: str) -> list[str]:
+    """Borrar los triggers de un origen (para reinstalarlos si cambia su definición)"""
+    table = SOURCES[kind][1]
+    return [f"DROP TRIGGER IF EXISTS search_fts_{table}_{suffix}" for suffix in ("ai", "au", "ad")]
+
+def install_sqlite_search(connection):
+    """Crear search_fts y sus triggers (no-op fuera de SQLite)"""
+    if connection.dialect.name != "sqlite":
+        return
+    connection.exec_driver_sql(CREATE_FTS)
+    for kind in SOURCES:
+        for ddl in trigger_ddl(kind):
+            connection.exec_driver_sql(ddl)
+
+@event.listens_for(Base.metadata, "after_create")
+def _after_create(target, connection, **kw):
+    install_sqlite_search(connection)
+
+event.listen(Base.metadata, "before_drop", DDL("DROP TABLE IF EXISTS search_fts").execute_if(dialect="sqlite"))
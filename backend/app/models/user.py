@@ -1,13 +1,22 @@
-from sqlalchemy import String, Integer, Boolean, DateTime
+from sqlalchemy import String, Integer, BigInteger, Boolean, DateTime, Index
 from sqlalchemy.orm import Mapped, mapped_column
 from datetime import datetime
 from app.core.db import Base
 
 class User(Base):
     __tablename__ = "users"
+    # Búsqueda de admin (MySQL); en SQLite se usa search_fts, ver models/search_index.py
+    __table_args__ = (Index("ft_users_email", "email", mysql_prefix="FULLTEXT").ddl_if(dialect="mysql"),)
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     email: Mapped[str] = mapped_column(String(255), unique=True, nullable=False)
     hashed_password: Mapped[str] = mapped_column(String(255), nullable=False)
     role: Mapped[str] = mapped_column(String(20), default="customer", nullable=False)  # admin|customer
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
+    # Se incrementa al cerrar sesión, cambiar contraseña/rol/email o desactivar:
+    # invalida todos los tokens emitidos antes (ver core/token_versions.py)
+    token_version: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    # Espacio ocupado por sus documentos (contador, ver services/storage_quota.py)
+    # y cuota fijada por el admin (None = la de STORAGE_QUOTA_MB)
+    storage_used_bytes: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0, server_default="0", index=True)
+    storage_quota_bytes: Mapped[int | None] = mapped_column(BigInteger)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
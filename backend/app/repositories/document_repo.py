@@ -1,13 +1,17 @@
+from datetime import datetime
 from sqlalchemy.orm import Session
 from app.models.document import Document
+from app.models.document_version import DocumentVersion
+from app.services import storage_quota
 
 class DocumentRepo:
     def __init__(self, db: Session):
         self.db = db
 
-    def create(self, *, user_id:int, category:str, original_name:str, stored_name:str, mime_type:str, size_bytes:int, family_member_name:str|None=None):
+    def create(self, *, user_id:int, category:str, original_name:str, stored_name:str, mime_type:str, size_bytes:int, family_member_name:str|None=None, status:str="pending", sha256:str|None=None):
         d = Document(user_id=user_id, category=category, original_name=original_name,
-                     stored_name=stored_name, mime_type=mime_type, size_bytes=size_bytes, family_member_name=family_member_name)
+                     stored_name=stored_name, mime_type=mime_type, size_bytes=size_bytes, family_member_name=family_member_name,
+                     status=status, sha256=sha256)
         self.db.add(d); self.db.commit(); self.db.refresh(d); return d
 
     def list_by_user(self, *, user_id:int):
@@ -19,16 +23,57 @@ class DocumentRepo:
     def get(self, doc_id:int):
         return self.db.query(Document).filter(Document.id==doc_id).first()
 
+    def get_many_for_update(self, doc_ids):
+        """Documentos por id con bloqueo de fila (SELECT ... FOR UPDATE) para revisarlos en bloque"""
+        return self.db.query(Document).filter(Document.id.in_(doc_ids)).with_for_update().all()
+
     def list_by_user_admin(self, *, user_id:int):
         return self.db.query(Document).filter(Document.user_id==user_id).order_by(Document.id.desc()).all()
 
     def review(self, *, doc: Document, status: str, admin_notes: str | None):
         doc.status = status
         doc.admin_notes = admin_notes
+        doc.claimed_by_id = None
+        doc.claimed_until = None
         self.db.commit(); self.db.refresh(doc); return doc
 
-    def delete(self, *, doc: Document):
-        self.db.delete(doc); self.db.commit()
+    def delete(self, *, doc: Document, commit: bool = True):
+        """Mandar a la papelera: los archivos los borra el GC (tarea gc_uploads).
+        Libera la cuota del documento y de sus versiones anteriores"""
+        doc.deleted_at = datetime.utcnow()
+        freed = storage_quota.charged_bytes(doc.status, doc.size_bytes) + storage_quota.history_bytes(self.db, doc.id)
+        storage_quota.release(self.db, doc.user_id, freed)
+        if commit:
+            self.db.commit()
+
+    def new_version(self, *, doc: Document, original_name:str, stored_name:str, mime_type:str, size_bytes:int, status:str, sha256:str|None=None):
+        """Reemplazar el archivo de un documento guardando el actual en document_versions.
+
+        Sin commit: va en la transacción de la subida. El UPDATE lleva
+        "WHERE version = <leída>" (version_id_col), así que si otro reemplazo
+        llegó antes el commit lanza StaleDataError.
+        """
+        self.db.add(DocumentVersion(
+            document_id=doc.id, version=doc.version, original_name=doc.original_name,
+            stored_name=doc.stored_name, mime_type=doc.mime_type, size_bytes=doc.size_bytes,
+            sha256=doc.sha256, status=doc.status, uploaded_at=doc.created_at,
+        ))
+        # La versión anterior sigue ocupando cuota (ver services/storage_quota.py)
+        doc.version = doc.version + 1
+        doc.original_name = original_name
+        doc.stored_name = stored_name
+        doc.mime_type = mime_type
+        doc.size_bytes = size_bytes
+        doc.sha256 = sha256
+        doc.status = status
+        doc.created_at = datetime.utcnow()
+        doc.admin_notes = None
+        doc.scan_result = None
+        doc.scanned_at = None
+        doc.claimed_by_id = None
+        doc.claimed_until = None
+        doc.has_preview = False
+        return doc
 
     def list_all(self):
         return self.db.query(Document).order_by(Document.id.desc()).all()
@@ -1,5 +1,6 @@
 from sqlalchemy.orm import Session
 from app.models.user import User
+from app.core.token_versions import token_versions
 from typing import Optional
 
 class UserRepo:
@@ -34,33 +35,47 @@ class UserRepo:
         """Listar solo administradores"""
         return self.db.query(User).filter(User.role == "admin").order_by(User.id.desc()).all()
 
+    def revoke_tokens(self, user: User) -> None:
+        """Invalidar todos los tokens emitidos al usuario (sin commit; ver save_revocation)"""
+        user.token_version = (user.token_version or 0) + 1
+
+    def save_revocation(self, user: User) -> User:
+        """Confirmar y aplicar al instante en la caché de tokens de este proceso"""
+        self.db.commit()
+        self.db.refresh(user)
+        token_versions.update(user)
+        return user
+
     def update(self, user: User, **kwargs) -> User:
         """Actualizar campos de un usuario"""
+        revoke = False
         for key, value in kwargs.items():
             if value is not None and hasattr(user, key):
+                # Email, rol y estado van en el token: los emitidos antes dejan de valer
+                revoke = revoke or (key in ("email", "role", "is_active", "hashed_password") and getattr(user, key) != value)
                 setattr(user, key, value)
-        self.db.commit()
-        self.db.refresh(user)
-        return user
+        if revoke:
+            self.revoke_tokens(user)
+        return self.save_revocation(user)
 
     def update_password(self, user: User, hashed_password: str) -> User:
-        """Actualizar contraseña de un usuario"""
+        """Actualizar contraseña de un usuario (cierra sus sesiones)"""
         user.hashed_password = hashed_password
-        self.db.commit()
-        self.db.refresh(user)
-        return user
+        self.revoke_tokens(user)
+        return self.save_revocation(user)
 
     def toggle_active(self, user: User) -> User:
         """Activar/desactivar un usuario"""
         user.is_active = not user.is_active
-        self.db.commit()
-        self.db.refresh(user)
-        return user
+        self.revoke_tokens(user)
+        return self.save_revocation(user)
 
     def delete(self, user: User) -> None:
         """Eliminar un usuario (hard delete)"""
+        user_id = user.id
         self.db.delete(user)
         self.db.commit()
+        token_versions.forget(user_id)
 
     def count_by_role(self, role: str) -> int:
         """Contar usuarios por rol"""
@@ -10,4 +10,9 @@ class LoginIn(BaseModel):
 
 class TokenOut(BaseModel):
     access_token: str
+    refresh_token: str | None = None
     token_type: str = "bearer"
+    expires_in: int | None = None  # segundos de vida del access_token
+
+class RefreshIn(BaseModel):
+    refresh_token: str
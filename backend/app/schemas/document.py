@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
 
 class DocumentOut(BaseModel):
@@ -10,10 +10,80 @@ class DocumentOut(BaseModel):
     status: str
     admin_notes: str | None = None
     family_member_name: str | None = None
+    has_preview: bool = False
+    version: int = 1
     created_at: datetime
     class Config:
         from_attributes = True
 
+class DocumentVersionOut(BaseModel):
+    version: int
+    original_name: str
+    mime_type: str
+    size_bytes: int
+    status: str
+    uploaded_at: datetime | None = None
+    replaced_at: datetime
+    storage_tier: str  # hot | archive
+    compression: str | None = None
+    stored_size: int | None = None
+    class Config:
+        from_attributes = True
+
 class AdminReviewIn(BaseModel):
     status: str  # "approved" | "rejected"
     admin_notes: str | None = None
+
+class ReviewQueueItem(BaseModel):
+    id: int
+    user_id: int
+    email: str
+    client_name: str | None = None
+    client_since: datetime | None = None
+    category: str
+    original_name: str
+    mime_type: str
+    size_bytes: int
+    family_member_name: str | None = None
+    has_preview: bool = False
+    created_at: datetime
+    claimed_until: datetime | None = None  # solo si la reserva es del admin actual
+
+class ReviewClaimOut(BaseModel):
+    claimed: list[int]
+    claimed_until: datetime | None = None
+
+class BulkReviewItem(AdminReviewIn):
+    doc_id: int
+
+class BulkReviewIn(BaseModel):
+    items: list[BulkReviewItem] = Field(..., min_length=1, max_length=200)
+
+class BulkReviewResult(BaseModel):
+    doc_id: int
+    ok: bool
+    status_code: int  # mismo código que devolvería la revisión individual
+    status: str | None = None
+    detail: str | None = None
+
+class BulkReviewOut(BaseModel):
+    updated: int
+    results: list[BulkReviewResult]
+
+class StorageUsageOut(BaseModel):
+    used_bytes: int
+    quota_bytes: int | None = None  # None = sin límite
+    remaining_bytes: int | None = None
+    used_percent: float | None = None
+
+class StorageConsumerOut(BaseModel):
+    user_id: int
+    email: str
+    client_name: str | None = None
+    used_bytes: int
+    quota_bytes: int | None = None
+    used_percent: float | None = None
+    custom_quota: bool = False
+
+class StorageQuotaIn(BaseModel):
+    quota_mb: int | None = Field(None, ge=0, description="Cuota en MB; null vuelve a la cuota por defecto")
@@ -1,7 +1,48 @@
-from pydantic import BaseModel
+import json
+from pydantic import BaseModel, ConfigDict, field_validator
 from datetime import datetime
 from typing import Optional
 
+# Sub-esquemas de las secciones guardadas como JSON
+# (los nombres de campo coinciden con los del formulario del frontend)
+class _Section(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+
+class EducationEntry(_Section):
+    nivel: Optional[str] = None
+    institucion: Optional[str] = None
+    desde: Optional[str] = None
+    hasta: Optional[str] = None
+
+class WorkEntry(_Section):
+    empresa: Optional[str] = None
+    cargo: Optional[str] = None
+    desde: Optional[str] = None
+    hasta: Optional[str] = None
+
+class ParentInfo(_Section):
+    nombres: Optional[str] = None
+    fechaNacimiento: Optional[str] = None
+    lugarNacimiento: Optional[str] = None
+    ocupacion: Optional[str] = None
+    fallecido: Optional[bool] = None
+    fechaDefuncion: Optional[str] = None
+
+class ParentsData(_Section):
+    padre: Optional[ParentInfo] = None
+    madre: Optional[ParentInfo] = None
+
+class FamilyMember(_Section):
+    nombres: Optional[str] = None
+    apellidos: Optional[str] = None
+    parentesco: Optional[str] = None
+    fechaNacimiento: Optional[str] = None
+    nacionalidad: Optional[str] = None
+    pasaporte: Optional[str] = None
+    ocupacion: Optional[str] = None
+
+JSON_SECTIONS = ("family_members_data", "parents_data", "education_data", "work_data")
+
 # IntakeForm Schemas
 class IntakeFormBase(BaseModel):
     # Información Personal
@@ -30,12 +71,20 @@ class IntakeFormBase(BaseModel):
     familiares_exterior: Optional[str] = None
     
     # Datos de miembros de la familia
-    family_members_data: Optional[str] = None
+    family_members_data: Optional[list[FamilyMember]] = None
     
     # Datos extendidos
-    parents_data: Optional[str] = None
-    education_data: Optional[str] = None
-    work_data: Optional[str] = None
+    parents_data: Optional[ParentsData] = None
+    education_data: Optional[list[EducationEntry]] = None
+    work_data: Optional[list[WorkEntry]] = None
+
+    @field_validator(*JSON_SECTIONS, mode="before")
+    @classmethod
+    def _parse_legacy_json(cls, v):
+        # Clientes antiguos envían estas secciones serializadas como string JSON
+        if isinstance(v, str):
+            return json.loads(v) if v.strip() else None
+        return v
 
 class IntakeFormCreate(IntakeFormBase):
     is_completed: bool = False
@@ -46,6 +95,7 @@ class IntakeFormUpdate(IntakeFormBase):
 class IntakeFormResponse(IntakeFormBase):
     id: int
     user_id: int
+    version: int
     is_completed: bool
     completed_at: Optional[datetime] = None
     created_at: datetime
@@ -53,3 +103,11 @@ class IntakeFormResponse(IntakeFormBase):
     
     class Config:
         from_attributes = True
+
+class IntakeFormAutosave(BaseModel):
+    version: int  # versión sobre la que el cliente hizo los cambios
+    changes: dict  # merge patch (RFC 7386) con los campos del paso
+
+class IntakeFormAutosaveResult(BaseModel):
+    version: int
+    pending: bool  # True si el cambio quedó en intake_forms.autosave_draft esperando a volcarse al formulario
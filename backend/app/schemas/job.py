@@ -0,0 +1,21 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Optional, Any
+
+# Job Schemas
+class JobOut(BaseModel):
+    id: int
+    kind: str
+    status: str
+    priority: int
+    attempts: int
+    max_attempts: int
+    payload: Optional[dict[str, Any]] = None
+    result: Optional[dict[str, Any]] = None
+    last_error: Optional[str] = None
+    run_after: datetime
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,11 @@
+from pydantic import BaseModel
+from typing import Optional
+
+# Search Schemas
+class SearchHit(BaseModel):
+    kind: str  # user|client|form|document
+    id: int
+    user_id: int
+    email: Optional[str] = None
+    title: Optional[str] = None
+    score: float
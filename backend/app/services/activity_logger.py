@@ -1,5 +1,7 @@
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 from app.models.activity import Activity
+from datetime import datetime
 
 def log_activity(
     db: Session,
@@ -26,3 +28,17 @@ def log_activity(
     db.commit()
     
     return activity
+
+def log_activities(db: Session, activities: list[dict]):
+    """Registrar varias actividades con un solo INSERT (sin commit: van en la transacción del llamador)
+
+    Cada elemento lleva las mismas claves que los argumentos de log_activity.
+    """
+    if not activities:
+        return
+    # Todas las filas con las mismas columnas para que sea un único executemany
+    defaults = {
+        "description": None, "user_id": None, "performed_by_id": None,
+        "performed_by_email": None, "extra_data": None, "created_at": datetime.utcnow(),
+    }
+    db.execute(insert(Activity), [{**defaults, **activity} for activity in activities])
@@ -0,0 +1,34 @@
+"""
+Reconciliación de los contadores de documentos de cada cliente
+"""
+from sqlalchemy import select, update, func
+from sqlalchemy.orm import Session
+from app.models.client import Client
+from app.models.document import Document
+
+def recompute_client_counters(db: Session, user_ids: list[int] | None = None, commit: bool = True) -> int:
+    """Recalcula total_documents y pending_documents en un solo UPDATE.
+
+    Si no se indican user_ids se reconcilian todos los clientes. Con
+    commit=False el UPDATE queda en la transacción del llamador.
+    Devuelve el número de clientes actualizados.
+    """
+    total_sq = (
+        select(func.count(Document.id))
+        .where(Document.user_id == Client.user_id)
+        .scalar_subquery()
+    )
+    pending_sq = (
+        select(func.count(Document.id))
+        .where(Document.user_id == Client.user_id, Document.status == "pending")
+        .scalar_subquery()
+    )
+    stmt = update(Client).values(total_documents=total_sq, pending_documents=pending_sq)
+    if user_ids is not None:
+        if not user_ids:
+            return 0
+        stmt = stmt.where(Client.user_id.in_(user_ids))
+    result = db.execute(stmt.execution_options(synchronize_session=False))
+    if commit:
+        db.commit()
+    return result.rowcount
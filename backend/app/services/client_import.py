@@ -0,0 +1,157 @@
+"""
+Importación masiva de clientes desde CSV.
+
+El archivo se lee en streaming y se procesa por lotes: se validan las filas,
+los hashes bcrypt se calculan en paralelo en un pool de hilos (bcrypt libera el
+GIL) y cada lote se inserta en su propia transacción con un INSERT múltiple de
+usuarios y otro de clientes. Los errores se reportan por número de fila.
+
+Columnas: email, password (obligatorias) y opcionalmente first_name, last_name,
+phone, destination_country, visa_type, application_type,
+family_members_count, status, notes.
+"""
+import csv
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, TextIO
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.core.security import hash_password
+from app.models.client import Client
+from app.models.user import User
+from app.schemas.client import ClientCreateRequest
+
+BATCH_SIZE = 500
+MIN_PASSWORD_LENGTH = 6
+CLIENT_FIELDS = tuple(f for f in ClientCreateRequest.model_fields if f not in ("email", "password"))
+ERROR_HEADERS = ["fila", "email", "error"]
+
+@dataclass
+class ImportReport:
+    total: int = 0
+    created: int = 0
+    errors: list[tuple[int, str, str]] = field(default_factory=list)  # (fila, email, error)
+    seconds: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.total / self.seconds if self.seconds else 0.0
+
+    def summary(self, max_errors: int = 100) -> dict:
+        return {
+            "total": self.total,
+            "created": self.created,
+            "failed": len(self.errors),
+            "seconds": round(self.seconds, 2),
+            "rows_per_second": round(self.rows_per_second, 1),
+            "errors": [{"row": r, "email": e, "error": m} for r, e, m in self.errors[:max_errors]],
+        }
+
+    def write_errors(self, path: str):
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(ERROR_HEADERS)
+            writer.writerows(self.errors)
+
+def _validate(row_number: int, raw: dict) -> ClientCreateRequest | str:
+    data = {k.strip().lower(): (v.strip() if isinstance(v, str) else v) for k, v in raw.items() if k}
+    # Celdas vacías = valor por defecto del schema
+    data = {k: v for k, v in data.items() if v not in ("", None)}
+    try:
+        parsed = ClientCreateRequest(**data)
+    except ValidationError as e:
+        first = e.errors(include_url=False)[0]
+        return f"{'.'.join(str(p) for p in first['loc'])}: {first['msg']}"
+    if len(parsed.password) < MIN_PASSWORD_LENGTH:
+        return f"password: mínimo {MIN_PASSWORD_LENGTH} caracteres"
+    return parsed
+
+def _insert_batch(db: Session, batch: list[tuple[int, ClientCreateRequest, str]]) -> int:
+    """Insertar usuarios y clientes de un lote en una transacción; devuelve los creados"""
+    db.execute(insert(User), [
+        {"email": row.email, "hashed_password": hashed, "role": "customer", "is_active": True}
+        for _, row, hashed in batch
+    ])
+    # MySQL no tiene RETURNING: los ids se recuperan por email (único)
+    ids = dict(db.execute(select(User.email, User.id).where(User.email.in_([row.email for _, row, _ in batch]))).all())
+    db.execute(insert(Client), [
+        {"user_id": ids[row.email], **row.model_dump(include=set(CLIENT_FIELDS))}
+        for _, row, _ in batch
+    ])
+    db.commit()
+    return len(batch)
+
+def _insert_one_by_one(db: Session, batch, report: ImportReport):
+    """Si el lote choca (p.ej. un email registrado mientras tanto) se reintenta fila a fila"""
+    for item in batch:
+        try:
+            report.created += _insert_batch(db, [item])
+        except IntegrityError:
+            db.rollback()
+            report.errors.append((item[0], item[1].email, "El email ya está registrado"))
+
+def import_clients(
+    db: Session,
+    lines: Iterable[str] | TextIO,
+    *,
+    batch_size: int = BATCH_SIZE,
+    workers: int | None = None,
+    progress: Callable[[ImportReport], None] | None = None,
+) -> ImportReport:
+    """Importar clientes desde un CSV (iterable de líneas de texto)"""
+    report = ImportReport()
+    started = time.perf_counter()
+    reader = csv.DictReader(lines)
+    seen: set[str] = set()
+    workers = workers or os.cpu_count() or 4
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt") as pool:
+        pending: list[tuple[int, ClientCreateRequest]] = []
+
+        def flush():
+            if not pending:
+                return
+            emails = [row.email for _, row in pending]
+            existing = set(db.scalars(select(User.email).where(User.email.in_(emails))).all())
+            valid = []
+            for row_number, row in pending:
+                if row.email in existing:
+                    report.errors.append((row_number, row.email, "El email ya está registrado"))
+                else:
+                    valid.append((row_number, row))
+            hashes = pool.map(hash_password, [row.password for _, row in valid])
+            batch = [(n, row, hashed) for (n, row), hashed in zip(valid, hashes)]
+            if batch:
+                try:
+                    report.created += _insert_batch(db, batch)
+                except IntegrityError:
+                    db.rollback()
+                    _insert_one_by_one(db, batch, report)
+            pending.clear()
+            if progress:
+                progress(report)
+
+        # La fila 1 es la cabecera
+        for row_number, raw in enumerate(reader, start=2):
+            report.total += 1
+            parsed = _validate(row_number, raw)
+            if isinstance(parsed, str):
+                report.errors.append((row_number, (raw.get("email") or "").strip(), parsed))
+                continue
+            email = parsed.email.lower()
+            if email in seen:
+                report.errors.append((row_number, email, "Email repetido en el archivo"))
+                continue
+            seen.add(email)
+            parsed.email = email
+            pending.append((row_number, parsed))
+            if len(pending) >= batch_size:
+                flush()
+        flush()
+
+    report.seconds = time.perf_counter() - started
+    return report
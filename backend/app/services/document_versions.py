@@ -0,0 +1,174 @@
+"""
+Versiones anteriores de documentos (tabla document_versions).
+
+Reemplazar un documento no lo borra: la fila de documents pasa a la versión
+nueva (mismo id, version + 1) y la anterior queda en document_versions con su
+archivo en UPLOAD_DIR. La tarea archive_document_versions mueve después los
+archivos de las versiones con más de VERSION_ARCHIVE_AFTER_DAYS a ARCHIVE_DIR
+(otro volumen, más barato), con el mismo reparto en carpetas que UPLOAD_DIR:
+- PDF: comprimidos con gzip, salvo que apenas ahorren (PDFs ya comprimidos)
+- imágenes: tal cual (JPG/PNG ya van comprimidos)
+La miniatura de una versión anterior no se conserva.
+
+Cada lote se copia a ARCHIVE_DIR, se confirma en la BD y solo entonces se
+borran los archivos de UPLOAD_DIR: si el proceso cae entre medias la versión
+sigue "hot" y se vuelve a archivar en la próxima pasada.
+
+Una versión archivada cuenta en la cuota lo que ocupa en ARCHIVE_DIR
+(stored_size): al archivarla se libera la diferencia en la misma transacción.
+Las versiones de documentos en la papelera no se archivan (las purga el GC).
+"""
+import gzip
+import logging
+import os
+import shutil
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Iterator
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.metrics import REGISTRY
+from app.models.document import Document
+from app.models.document_version import DocumentVersion
+from app.services.storage_quota import UNCHARGED_STATUSES, release as release_storage
+from app.services.storage import (
+    ORIGINAL_SUFFIX, delete_document_files, document_file_paths, document_path, ensure_parent, shard_parts,
+)
+
+logger = logging.getLogger(__name__)
+
+COMPRESSIBLE_MIME_TYPES = {"application/pdf"}
+# gzip solo compensa si ahorra al menos esto (si no, se guarda sin comprimir)
+MIN_GZIP_SAVING = 0.05
+_CHUNK = 1024 * 1024
+
+versions_archived = REGISTRY.counter("document_versions_archived_total", "Versiones anteriores movidas a ARCHIVE_DIR", ("compression",))
+archive_saved_bytes = REGISTRY.counter("document_versions_archive_saved_bytes_total", "Bytes ahorrados comprimiendo versiones archivadas")
+
+def archive_path(name: str, compression: str | None = None) -> str:
+    """Ruta de un archivo en ARCHIVE_DIR (mismas carpetas que en UPLOAD_DIR)"""
+    suffix = ".gz" if compression == "gzip" else ""
+    return os.path.join(settings.ARCHIVE_DIR, *shard_parts(name), name + suffix)
+
+def version_path(version: DocumentVersion) -> str:
+    """Ruta del archivo de una versión, esté donde esté"""
+    if version.storage_tier == "archive":
+        return archive_path(version.stored_name, version.compression)
+    return document_path(version.stored_name)
+
+def iter_version_file(version: DocumentVersion) -> Iterator[bytes]:
+    """Contenido original de una versión por bloques (descomprimiendo si hace falta)"""
+    path = version_path(version)
+    opener = gzip.open if version.compression == "gzip" else open
+    with opener(path, "rb") as f:
+        while chunk := f.read(_CHUNK):
+            yield chunk
+
+def version_file_paths(stored_name: str, storage_tier: str, compression: str | None) -> list[str]:
+    """Todas las rutas posibles de los archivos de una versión (para borrarla)"""
+    if storage_tier == "archive":
+        return [archive_path(stored_name, compression), archive_path(stored_name + ORIGINAL_SUFFIX)]
+    return document_file_paths(stored_name)
+
+def list_versions(db: Session, document_id: int) -> list[DocumentVersion]:
+    return list(db.scalars(
+        select(DocumentVersion)
+        .where(DocumentVersion.document_id == document_id)
+        .order_by(DocumentVersion.version.desc())
+    ))
+
+def get_version(db: Session, document_id: int, version: int) -> DocumentVersion | None:
+    return db.scalars(
+        select(DocumentVersion)
+        .where(DocumentVersion.document_id == document_id, DocumentVersion.version == version)
+    ).first()
+
+def _copy(src: str, dest: str, compress: bool) -> int:
+    """Copiar src a dest (vía .part + rename); devuelve el tamaño escrito"""
+    tmp = ensure_parent(dest) + ".part"
+    with open(src, "rb") as fin:
+        if compress:
+            with gzip.open(tmp, "wb", compresslevel=6) as fout:
+                shutil.copyfileobj(fin, fout, _CHUNK)
+        else:
+            with open(tmp, "wb") as fout:
+                shutil.copyfileobj(fin, fout, _CHUNK)
+    os.replace(tmp, dest)
+    return os.path.getsize(dest)
+
+def _archive_one(version: DocumentVersion) -> bool:
+    """Copiar los archivos de una versión a ARCHIVE_DIR; False si ya no están en UPLOAD_DIR"""
+    src = document_path(version.stored_name)
+    if not os.path.exists(src):
+        return False
+    compression, stored_size = None, None
+    if version.mime_type in COMPRESSIBLE_MIME_TYPES:
+        dest = archive_path(version.stored_name, "gzip")
+        stored_size = _copy(src, dest, compress=True)
+        if stored_size <= os.path.getsize(src) * (1 - MIN_GZIP_SAVING):
+            compression = "gzip"
+        else:
+            os.remove(dest)
+    if compression is None:
+        stored_size = _copy(src, archive_path(version.stored_name), compress=False)
+
+    original = document_path(version.stored_name + ORIGINAL_SUFFIX)
+    if os.path.exists(original):
+        _copy(original, archive_path(version.stored_name + ORIGINAL_SUFFIX), compress=False)
+
+    version.storage_tier = "archive"
+    version.compression = compression
+    version.stored_size = stored_size
+    return True
+
+def archive_versions(db: Session, older_than: timedelta, batch_size: int) -> dict:
+    """Mover a ARCHIVE_DIR los archivos de las versiones reemplazadas antes de older_than"""
+    started = time.perf_counter()
+    cutoff = datetime.utcnow() - older_than
+    archived = missing = hot_bytes = stored_bytes = 0
+    last_id = 0
+    while True:
+        # Índice (storage_tier, replaced_at); se avanza por id para no volver a
+        # leer las que no tienen archivo (infectadas o borradas a mano)
+        rows = db.execute(
+            select(DocumentVersion, Document.user_id)
+            .join(Document, Document.id == DocumentVersion.document_id)
+            .where(DocumentVersion.storage_tier == "hot", DocumentVersion.replaced_at < cutoff,
+                   DocumentVersion.id > last_id, Document.deleted_at.is_(None))
+            .order_by(DocumentVersion.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1][0].id
+        done = []
+        freed: dict[int, int] = defaultdict(int)
+        for version, user_id in rows:
+            if _archive_one(version):
+                done.append(version.stored_name)
+                hot_bytes += version.size_bytes
+                stored_bytes += version.stored_size
+                if version.status not in UNCHARGED_STATUSES:
+                    freed[user_id] += version.size_bytes - version.stored_size
+                versions_archived.inc(compression=version.compression or "none")
+            else:
+                missing += 1
+        for user_id, size in freed.items():
+            release_storage(db, user_id, size)
+        db.commit()
+        for stored_name in done:
+            delete_document_files(stored_name)
+        archived += len(done)
+
+    archive_saved_bytes.inc(max(0, hot_bytes - stored_bytes))
+    report = {
+        "archived": archived,
+        "missing_files": missing,
+        "hot_bytes": hot_bytes,
+        "archived_bytes": stored_bytes,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
+    logger.info("Archivado de versiones: %s", report)
+    return report
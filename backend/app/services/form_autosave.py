@@ -0,0 +1,218 @@
+"""
+Autoguardado del formulario de solicitud con escrituras agrupadas.
+
+Cada guardado aceptado sube la versión del formulario en la BD y deja sus
+cambios en un borrador dentro de la misma fila (intake_forms.autosave_draft):
+un UPDATE pequeño, sin tocar las columnas del formulario. Las columnas se
+escriben como mucho una vez por ventana (AUTOSAVE_WINDOW_SECONDS), cuando vence
+autosave_due_at. Un guardado con una versión vieja se rechaza.
+
+Todo el estado está en la fila, así que vale igual con varios workers de
+gunicorn o varios servidores: la versión la comprueba la BD (version_id_col de
+IntakeForm) y cualquier proceso puede aplicar un borrador vencido (con
+SELECT ... FOR UPDATE para no aplicarlo dos veces). Antes de leer o escribir el
+formulario por otra vía se aplica el borrador pendiente (flush_user).
+"""
+import logging
+import threading
+from datetime import datetime, timedelta
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import StaleDataError
+from app.core.config import settings
+from app.core.db import SessionLocal
+from app.models.activity import Activity
+from app.models.intake_form import IntakeForm
+from app.models.user import User
+from app.schemas.intake_form import IntakeFormUpdate
+from app.services.activity_logger import log_activity
+from app.services.intake_forms import assign_form_values, form_snapshot, form_values, merge_form_patch
+
+logger = logging.getLogger(__name__)
+
+FORM_ACTIVITY_TYPES = ("form_updated", "form_submitted")
+
+class StaleVersion(Exception):
+    """El cliente guardó sobre una versión que ya no es la actual"""
+    def __init__(self, current_version: int):
+        super().__init__(f"Versión desactualizada (actual: {current_version})")
+        self.current_version = current_version
+
+class FormNotFound(Exception):
+    pass
+
+def _to_draft(values: dict) -> dict:
+    # Fechas y secciones en forma JSON para guardarlas en la columna del borrador
+    return IntakeFormUpdate.model_validate(values).model_dump(mode="json", include=set(values))
+
+def _from_draft(draft: dict | None) -> dict:
+    if not draft:
+        return {}
+    return form_values(IntakeFormUpdate.model_validate(draft), fields=draft.keys())
+
+def current_version(db: Session, user_id: int) -> int | None:
+    """Versión guardada del formulario de un usuario (para responder a un 409)"""
+    return db.scalar(select(IntakeForm.version).where(IntakeForm.user_id == user_id))
+
+class AutosaveBuffer:
+    def __init__(self, window: float | None = None, session_minutes: int | None = None, session_factory=SessionLocal):
+        self.window = settings.AUTOSAVE_WINDOW_SECONDS if window is None else window
+        self.session_seconds = (settings.AUTOSAVE_SESSION_MINUTES if session_minutes is None else session_minutes) * 60
+        self.session_factory = session_factory
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def save(self, db: Session, user_id: int, email: str, version: int, patch: dict) -> tuple[int, bool]:
+        """Registrar un guardado; devuelve (versión nueva, queda pendiente de escribir).
+
+        Lanza StaleVersion, FormNotFound, ValueError o pydantic.ValidationError.
+        """
+        form = db.scalars(
+            select(IntakeForm).where(IntakeForm.user_id == user_id),
+            execution_options={"populate_existing": True},
+        ).first()
+        if form is None:
+            raise FormNotFound()
+        if version != form.version:
+            raise StaleVersion(form.version)
+
+        draft = dict(form.autosave_draft or {})
+        values = merge_form_patch({**form_snapshot(form), **_from_draft(draft)}, patch)
+        if not values:
+            return form.version, bool(draft)
+
+        draft.update(_to_draft(values))
+        form.autosave_draft = draft
+        if form.autosave_due_at is None:
+            form.autosave_due_at = datetime.utcnow() + timedelta(seconds=max(0, self.window))
+        new_version = form.version = form.version + 1
+
+        # Enviar el formulario se escribe de inmediato, igual que sin ventana
+        immediate = self.window <= 0 or bool(values.get("is_completed"))
+        submitted = self._apply_draft(form) if immediate else False
+        try:
+            db.commit()
+        except StaleDataError:
+            # Otro guardado (en este u otro proceso) subió la versión entre medias
+            db.rollback()
+            raise StaleVersion(current_version(db, user_id))
+
+        if immediate:
+            self._log_activity(db, user_id, email, submitted)
+        return new_version, not immediate
+
+    @staticmethod
+    def _apply_draft(form: IntakeForm) -> bool:
+        """Copiar el borrador a las columnas (sin subir la versión); devuelve si se envió el formulario"""
+        values = _from_draft(form.autosave_draft)
+        changed = assign_form_values(form, values, bump_version=False)
+        form.autosave_draft = None
+        form.autosave_due_at = None
+        return "is_completed" in changed and bool(values.get("is_completed"))
+
+    def flush_user(self, db: Session, user_id: int) -> bool:
+        """Escribir los cambios pendientes de un usuario (antes de leer o escribir su formulario)"""
+        pending = db.scalar(
+            select(IntakeForm.id).where(IntakeForm.user_id == user_id, IntakeForm.autosave_due_at.is_not(None))
+        )
+        if pending is None:
+            return False
+        return self._flush(db, user_id)
+
+    def _flush(self, db: Session, user_id: int) -> bool:
+        # FOR UPDATE: si otro proceso está aplicando el mismo borrador, se espera
+        # y después ya no hay nada pendiente
+        form = db.scalars(
+            select(IntakeForm)
+            .where(IntakeForm.user_id == user_id, IntakeForm.autosave_due_at.is_not(None))
+            .with_for_update(),
+            execution_options={"populate_existing": True},
+        ).first()
+        if form is None:
+            db.rollback()
+            return False
+        submitted = self._apply_draft(form)
+        try:
+            db.commit()
+        except StaleDataError:
+            db.rollback()
+            logger.warning("Autoguardado del usuario %s no aplicado: conflicto de versión (se reintenta)", user_id)
+            return False
+        email = db.scalar(select(User.email).where(User.id == user_id))
+        self._log_activity(db, user_id, email, submitted)
+        return True
+
+    def _log_activity(self, db: Session, user_id: int, email: str | None, submitted: bool):
+        # Una actividad "form_updated" por sesión de edición, no por guardado: se
+        # mira la última actividad del formulario en la BD (vale entre procesos)
+        if not submitted:
+            since = datetime.utcnow() - timedelta(seconds=self.session_seconds)
+            recent = db.scalar(
+                select(Activity.id)
+                .where(Activity.user_id == user_id, Activity.activity_type.in_(FORM_ACTIVITY_TYPES),
+                       Activity.created_at >= since)
+                .limit(1)
+            )
+            if recent is not None:
+                return
+        log_activity(
+            db=db,
+            activity_type="form_submitted" if submitted else "form_updated",
+            title="Formulario enviado" if submitted else "Formulario actualizado",
+            description=f"{email} {'completó' if submitted else 'actualizó'} su formulario",
+            user_id=user_id,
+            performed_by_id=user_id,
+            performed_by_email=email
+        )
+
+    def flush_due(self, force: bool = False) -> int:
+        """Aplicar los borradores vencidos (todos con force=True)"""
+        flushed = 0
+        db = self.session_factory()
+        try:
+            stmt = select(IntakeForm.user_id).where(IntakeForm.autosave_due_at.is_not(None))
+            if not force:
+                stmt = stmt.where(IntakeForm.autosave_due_at <= datetime.utcnow())
+            due = list(db.scalars(stmt))
+            db.rollback()
+            for user_id in due:
+                try:
+                    flushed += self._flush(db, user_id)
+                except Exception:
+                    db.rollback()
+                    logger.exception("Error escribiendo el autoguardado del usuario %s", user_id)
+        finally:
+            db.close()
+        return flushed
+
+    def flush_all(self) -> int:
+        return self.flush_due(force=True)
+
+    def stats(self, db: Session) -> dict:
+        pending = db.scalar(select(func.count()).select_from(IntakeForm).where(IntakeForm.autosave_due_at.is_not(None)))
+        return {"pending": pending, "window_seconds": self.window}
+
+    def _run(self):
+        # Cada proceso revisa los vencidos (consulta por índice sobre autosave_due_at)
+        interval = max(1.0, self.window / 2)
+        while not self._stop.wait(interval):
+            try:
+                self.flush_due()
+            except Exception:
+                logger.exception("Error revisando los autoguardados pendientes")
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="form-autosave", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Detener el temporizador. Los borradores siguen en la BD: los aplica
+        otro proceso o la próxima lectura del formulario"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+autosave_buffer = AutosaveBuffer()
@@ -0,0 +1,104 @@
+"""
+Comprobaciones de dependencias para /readyz y el diagnóstico de admin.
+
+- database: sacar una conexión del pool y ejecutar SELECT 1
+- storage: UPLOAD_DIR existe y se puede escribir
+- disk: espacio libre en UPLOAD_DIR por encima de HEALTH_MIN_FREE_DISK_MB
+- worker: latido reciente de algún worker (solo cuenta para la readiness si
+  HEALTH_REQUIRE_WORKER)
+
+readiness() guarda el resultado HEALTH_CACHE_SECONDS: los orquestadores sondean
+cada pocos segundos desde varios sitios y no hace falta ir a MySQL cada vez.
+"""
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from sqlalchemy import text
+from app.core.config import settings
+from app.core.db import SessionLocal, get_engine
+from app.core.metrics import REGISTRY
+from app.services import heartbeats
+
+logger = logging.getLogger(__name__)
+
+check_failures = REGISTRY.counter("health_check_failures_total", "Comprobaciones de /readyz fallidas", ("check",))
+
+def _timed(fn) -> dict:
+    started = time.perf_counter()
+    try:
+        result = fn()
+    except Exception as e:
+        result = {"ok": False, "error": str(e)[:200]}
+    result["ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return result
+
+def check_database() -> dict:
+    with get_engine().connect() as conn:
+        conn.execute(text("SELECT 1"))
+    return {"ok": True}
+
+def check_storage() -> dict:
+    os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=settings.UPLOAD_DIR, prefix=".health-") as f:
+        f.write(b"ok")
+        f.flush()
+    return {"ok": True}
+
+def check_disk() -> dict:
+    usage = shutil.disk_usage(settings.UPLOAD_DIR)
+    free_mb = usage.free // (1024 * 1024)
+    return {
+        "ok": free_mb >= settings.HEALTH_MIN_FREE_DISK_MB,
+        "free_mb": free_mb,
+        "used_percent": round(usage.used / usage.total * 100, 1) if usage.total else None,
+        "min_free_mb": settings.HEALTH_MIN_FREE_DISK_MB,
+    }
+
+def check_worker() -> dict:
+    db = SessionLocal()
+    try:
+        age = heartbeats.last_seen_seconds(db)
+    finally:
+        db.close()
+    return {
+        "ok": age is not None and age <= settings.HEALTH_WORKER_STALE_SECONDS,
+        "last_seen_seconds": None if age is None else round(age, 1),
+        "required": settings.HEALTH_REQUIRE_WORKER,
+    }
+
+CHECKS = {
+    "database": check_database,
+    "storage": check_storage,
+    "disk": check_disk,
+    "worker": check_worker,
+}
+
+def run_checks() -> dict:
+    """Ejecutar todas las comprobaciones ahora (sin caché)"""
+    checks = {name: _timed(fn) for name, fn in CHECKS.items()}
+    ok = True
+    for name, result in checks.items():
+        if result["ok"]:
+            continue
+        check_failures.inc(check=name)
+        if name == "worker" and not settings.HEALTH_REQUIRE_WORKER:
+            continue
+        ok = False
+        logger.warning("readyz: %s falla: %s", name, result)
+    return {"status": "ok" if ok else "unavailable", "checks": checks}
+
+_cache: tuple[float, dict] | None = None
+_cache_lock = threading.Lock()
+
+def readiness() -> dict:
+    """Resultado de run_checks() con HEALTH_CACHE_SECONDS de caché (una sola comprobación a la vez)"""
+    global _cache
+    with _cache_lock:
+        now = time.monotonic()
+        if _cache is None or now - _cache[0] >= settings.HEALTH_CACHE_SECONDS:
+            _cache = (now, run_checks())
+        checked_at, report = _cache
+    return {**report, "age_seconds": round(now - checked_at, 1)}
@@ -0,0 +1,44 @@
+"""
+Latidos de los workers de la cola de trabajos.
+
+Cada proceso worker actualiza su fila en worker_heartbeats cada
+WORKER_HEARTBEAT_SECONDS y la borra al terminar limpiamente. /readyz y el
+diagnóstico de admin leen la tabla para saber si hay workers vivos.
+"""
+import os
+import socket
+from datetime import datetime, timedelta
+from sqlalchemy import delete, select, update
+from sqlalchemy.orm import Session
+from app.models.worker_heartbeat import WorkerHeartbeat
+
+# Filas de workers que murieron sin borrar la suya: se limpian pasado este tiempo
+FORGET_AFTER = timedelta(days=1)
+
+def beat(db: Session, worker_id: str, concurrency: int):
+    """Registrar que el worker sigue vivo (UPDATE y, si no existía, INSERT)"""
+    now = datetime.utcnow()
+    res = db.execute(
+        update(WorkerHeartbeat)
+        .where(WorkerHeartbeat.worker_id == worker_id)
+        .values(last_seen_at=now, concurrency=concurrency)
+    )
+    if res.rowcount == 0:
+        db.add(WorkerHeartbeat(
+            worker_id=worker_id, hostname=socket.gethostname(), pid=os.getpid(),
+            concurrency=concurrency, started_at=now, last_seen_at=now,
+        ))
+        db.execute(delete(WorkerHeartbeat).where(WorkerHeartbeat.last_seen_at < now - FORGET_AFTER))
+    db.commit()
+
+def remove(db: Session, worker_id: str):
+    db.execute(delete(WorkerHeartbeat).where(WorkerHeartbeat.worker_id == worker_id))
+    db.commit()
+
+def list_workers(db: Session) -> list[WorkerHeartbeat]:
+    return list(db.scalars(select(WorkerHeartbeat).order_by(WorkerHeartbeat.last_seen_at.desc())))
+
+def last_seen_seconds(db: Session) -> float | None:
+    """Segundos desde el último latido de cualquier worker (None si no hay ninguno)"""
+    last = db.scalar(select(WorkerHeartbeat.last_seen_at).order_by(WorkerHeartbeat.last_seen_at.desc()).limit(1))
+    return None if last is None else (datetime.utcnow() - last).total_seconds()
@@ -0,0 +1,112 @@
+"""
+Normalización de fotos al subirlas.
+
+Quita EXIF (incluida la ubicación GPS), aplica la orientación, reduce al tamaño
+máximo de la categoría y recompresa. Solo se activa con IMAGE_INGEST_ENABLED.
+
+Se ejecuta antes del antivirus, sobre lo que mande el cliente: las imágenes de
+más de IMAGE_INGEST_MAX_PIXELS se rechazan con ImageTooLarge sin decodificarlas.
+"""
+import os
+from dataclasses import dataclass
+from app.core.config import settings
+
+@dataclass(frozen=True)
+class IngestPolicy:
+    max_size: int  # px del lado mayor
+    quality: int   # calidad JPEG
+
+# Políticas por categoría; el resto de categorías usa la política por defecto
+CATEGORY_POLICIES: dict[str, IngestPolicy] = {
+    # Foto tipo carné: el consulado pide buena calidad, pero no 12 MP
+    "FOTO": IngestPolicy(max_size=2000, quality=90),
+    # Texto pequeño: se conserva más resolución para que siga siendo legible
+    "DNI": IngestPolicy(max_size=2400, quality=85),
+    "SELLOS PASAPORTE": IngestPolicy(max_size=3000, quality=85),
+}
+
+INGEST_MIME_TYPES = ("image/jpeg", "image/png")
+
+class ImageTooLarge(Exception):
+    """La imagen tiene más píxeles de los permitidos (posible bomba de descompresión)"""
+
+@dataclass
+class IngestResult:
+    bytes_before: int
+    bytes_after: int
+    resized: bool = False
+    rewritten: bool = False
+
+    @property
+    def saved_bytes(self) -> int:
+        return self.bytes_before - self.bytes_after
+
+def policy_for(category: str) -> IngestPolicy:
+    return CATEGORY_POLICIES.get(
+        category,
+        IngestPolicy(max_size=settings.IMAGE_INGEST_MAX_SIZE, quality=settings.IMAGE_INGEST_QUALITY),
+    )
+
+def normalize_image(path: str, mime_type: str, category: str, keep_original_at: str | None = None) -> IngestResult:
+    """Normalizar en sitio la imagen guardada en path.
+
+    El formato se conserva (JPEG sigue JPEG, PNG sigue PNG) para no cambiar el
+    mime_type ni la extensión del documento. Si se indica keep_original_at, el
+    archivo original se mueve ahí en lugar de descartarse.
+    """
+    from PIL import Image, ImageOps
+
+    # Pillow solo avisa entre 1x y 2x de este límite; por encima lanza DecompressionBombError
+    Image.MAX_IMAGE_PIXELS = settings.IMAGE_INGEST_MAX_PIXELS
+    size_before = os.path.getsize(path)
+    result = IngestResult(bytes_before=size_before, bytes_after=size_before)
+    if mime_type not in INGEST_MIME_TYPES:
+        return result
+
+    policy = policy_for(category)
+
+    try:
+        img = Image.open(path)
+    except Image.DecompressionBombError as e:
+        raise ImageTooLarge(str(e)) from e
+    with img:
+        # Image.open solo lee la cabecera: el tamaño se conoce sin decodificar
+        if img.width * img.height > settings.IMAGE_INGEST_MAX_PIXELS:
+            raise ImageTooLarge(f"{img.width}x{img.height} px supera el máximo de {settings.IMAGE_INGEST_MAX_PIXELS} píxeles")
+        has_metadata = bool(img.info.get("exif")) or bool(img.getexif())
+        target = (policy.max_size, policy.max_size)
+        result.resized = max(img.size) > policy.max_size
+        if result.resized and mime_type == "image/jpeg":
+            # Decodificar a escala reducida cuando el factor lo permite
+            img.draft("RGB", target)
+        out = ImageOps.exif_transpose(img)
+        if max(out.size) > policy.max_size:
+            out.thumbnail(target, Image.Resampling.LANCZOS)
+            result.resized = True
+
+        tmp = path + ".ingest"
+        try:
+            if mime_type == "image/jpeg":
+                if out.mode != "RGB":
+                    out = out.convert("RGB")
+                # Sin exif=... Pillow no copia los metadatos al guardar
+                out.save(tmp, "JPEG", quality=policy.quality, optimize=True, progressive=True)
+            else:
+                out.save(tmp, "PNG", optimize=True)
+        except Exception:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    size_after = os.path.getsize(tmp)
+    # Recompresión sin beneficio: se descarta salvo que haya que quitar metadatos
+    if size_after >= size_before and not result.resized and not has_metadata:
+        os.remove(tmp)
+        return result
+
+    if keep_original_at:
+        os.replace(path, keep_original_at)
+    os.replace(tmp, path)
+    result.bytes_after = size_after
+    result.rewritten = True
+    return result
@@ -0,0 +1,178 @@
+"""
+Lógica de escritura del formulario de solicitud (actualizaciones parciales)
+"""
+from datetime import datetime
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.models.intake_form import IntakeForm
+from app.schemas.intake_form import IntakeFormBase, IntakeFormCreate, IntakeFormUpdate, JSON_SECTIONS
+
+FORM_FIELDS = frozenset(IntakeFormUpdate.model_fields)
+
+def json_merge_patch(target, patch):
+    """Aplicar un JSON Merge Patch (RFC 7386): null borra, objetos se mezclan, el resto reemplaza"""
+    if not isinstance(patch, dict):
+        return patch
+    result = dict(target) if isinstance(target, dict) else {}
+    for key, value in patch.items():
+        if value is None:
+            result.pop(key, None)
+        else:
+            result[key] = json_merge_patch(result.get(key), value)
+    return result
+
+def _dump_section(value):
+    # Las secciones se guardan sin claves vacías para que comparar con lo
+    # almacenado no detecte cambios falsos
+    if value is None:
+        return None
+    if isinstance(value, list):
+        return [item.model_dump(exclude_none=True) for item in value]
+    return value.model_dump(exclude_none=True)
+
+def form_values(data: IntakeFormBase, fields=None) -> dict:
+    """Valores listos para asignar al modelo a partir de un schema validado"""
+    fields = data.model_fields_set if fields is None else fields
+    values = {}
+    for field in fields:
+        value = getattr(data, field)
+        values[field] = _dump_section(value) if field in JSON_SECTIONS else value
+    return values
+
+def assign_form_values(form: IntakeForm, values: dict, bump_version: bool = True) -> list[str]:
+    """Asignar solo los campos que realmente cambian; devuelve sus nombres.
+
+    bump_version=False al aplicar un borrador del autoguardado, cuya versión ya se subió.
+    """
+    changed = []
+    for field, value in values.items():
+        if getattr(form, field) != value:
+            setattr(form, field, value)
+            changed.append(field)
+    if values.get("is_completed") and not form.completed_at:
+        form.completed_at = datetime.utcnow()
+    if changed and bump_version and form.version is not None:
+        form.version += 1
+    return changed
+
+def form_snapshot(form: IntakeForm) -> dict:
+    """Valores actuales de los campos editables del formulario"""
+    return {field: getattr(form, field) for field in FORM_FIELDS}
+
+def merge_form_patch(current: dict, patch: dict) -> dict:
+    """Aplicar un merge patch sobre `current` (campo -> valor) sin tocar la BD.
+
+    Devuelve solo los campos cuyo valor cambia. Lanza ValueError con campos
+    desconocidos y pydantic.ValidationError si el resultado no cumple el
+    esquema. Las secciones JSON se mezclan con lo guardado (un paso del
+    formulario puede enviar solo lo que cambió); las listas se reemplazan
+    completas, como indica el RFC.
+    """
+    unknown = set(patch) - FORM_FIELDS
+    if unknown:
+        raise ValueError(f"Campos desconocidos: {', '.join(sorted(unknown))}")
+
+    merged = json_merge_patch({field: current.get(field) for field in patch}, patch)
+    validated = IntakeFormUpdate.model_validate({field: merged.get(field) for field in patch})
+    values = form_values(validated, fields=patch.keys())
+    if values.get("is_completed") is None:
+        values.pop("is_completed", None)
+    return {field: value for field, value in values.items() if current.get(field) != value}
+
+def apply_form_patch(form: IntakeForm, patch: dict) -> list[str]:
+    """Aplicar un merge patch al formulario; devuelve los campos modificados"""
+    return assign_form_values(form, merge_form_patch(form_snapshot(form), patch))
+
+def _upsert_statement(dialect: str, values: dict):
+    """INSERT con actualización en conflicto de user_id; devuelve (stmt, valores propuestos).
+
+    None si la base no tiene upsert nativo (se usa _upsert_locked).
+    """
+    if dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert
+        stmt = insert(IntakeForm).values(**values)
+        return stmt, stmt.inserted
+    if dialect in ("sqlite", "postgresql"):
+        from sqlalchemy.dialects import postgresql, sqlite
+        insert = sqlite.insert if dialect == "sqlite" else postgresql.insert
+        stmt = insert(IntakeForm).values(**values)
+        return stmt, stmt.excluded
+    return None
+
+def _locked_form(db: Session, user_id: int) -> IntakeForm | None:
+    return db.scalars(
+        select(IntakeForm).where(IntakeForm.user_id == user_id).with_for_update(),
+        execution_options={"populate_existing": True},
+    ).first()
+
+def _upsert_locked(db: Session, user_id: int, data: IntakeFormCreate, insert_values: dict, now: datetime) -> IntakeForm:
+    """Upsert genérico: SELECT ... FOR UPDATE y después UPDATE o INSERT.
+
+    Si otro envío inserta entre el SELECT y el INSERT, la clave única de
+    user_id rechaza el segundo (IntegrityError dentro de un SAVEPOINT) y se
+    actualiza la fila que ganó.
+    """
+    form = _locked_form(db, user_id)
+    if form is None:
+        try:
+            with db.begin_nested():
+                form = IntakeForm(**insert_values)
+                db.add(form)
+            return form
+        except IntegrityError:
+            form = _locked_form(db, user_id)
+    for field in data.model_fields_set:
+        setattr(form, field, insert_values[field])
+    if data.is_completed and form.completed_at is None:
+        form.completed_at = now
+    form.version += 1
+    form.updated_at = now
+    db.flush()
+    return form
+
+def upsert_form(db: Session, user_id: int, data: IntakeFormCreate) -> IntakeForm:
+    """Crear o actualizar el formulario del usuario en una sola sentencia.
+
+    INSERT ... ON DUPLICATE KEY UPDATE en MySQL y ON CONFLICT (user_id) en
+    SQLite/PostgreSQL: no hay ventana entre comprobar y escribir, así que dos
+    envíos simultáneos no crean dos formularios. En otras bases, fila
+    bloqueada y UPDATE o INSERT (_upsert_locked). Si ya existe solo se
+    actualizan los campos enviados. No hace commit.
+    """
+    now = datetime.utcnow()
+    values = form_values(data, fields=IntakeFormCreate.model_fields)
+    insert_values = {
+        **values,
+        "user_id": user_id,
+        "version": 1,
+        "completed_at": now if data.is_completed else None,
+        "created_at": now,
+        "updated_at": now,
+    }
+    dialect = db.get_bind().dialect
+    upsert = _upsert_statement(dialect.name, insert_values)
+    if upsert is None:
+        return _upsert_locked(db, user_id, data, insert_values, now)
+    stmt, proposed = upsert
+
+    table = IntakeForm.__table__
+    updates = {field: proposed[field] for field in data.model_fields_set}
+    if data.is_completed:
+        updates["completed_at"] = func.coalesce(table.c.completed_at, now)
+    updates["version"] = table.c.version + 1
+    updates["updated_at"] = now
+    if dialect.name == "mysql":
+        stmt = stmt.on_duplicate_key_update(**updates)
+    else:
+        stmt = stmt.on_conflict_do_update(index_elements=["user_id"], set_=updates)
+
+    if dialect.insert_returning:
+        # La fila viene en la misma sentencia (RETURNING), sin SELECT adicional
+        return db.scalars(stmt.returning(IntakeForm), execution_options={"populate_existing": True}).one()
+    # MySQL no tiene RETURNING: una lectura por clave única
+    db.execute(stmt)
+    return db.scalars(
+        select(IntakeForm).where(IntakeForm.user_id == user_id),
+        execution_options={"populate_existing": True},
+    ).one()
@@ -0,0 +1,181 @@
+"""
+Cola de trabajos durable respaldada por la tabla `jobs`.
+
+Los handlers se registran con @job_handler("tipo") y se ejecutan en un proceso
+aparte (python -m app.worker). La reserva usa un UPDATE condicional, por lo que
+funciona igual en MySQL y SQLite sin bloqueos explícitos.
+"""
+import logging
+import traceback
+from datetime import datetime, timedelta
+from typing import Callable
+from sqlalchemy import select, update, and_, or_, func
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.tracing import CONSUMER, span
+from app.models.job import Job
+
+logger = logging.getLogger(__name__)
+
+JobHandler = Callable[[Session, dict], dict | None]
+
+_HANDLERS: dict[str, JobHandler] = {}
+
+MAX_BACKOFF_SECONDS = 600
+
+def job_handler(kind: str):
+    """Decorador para registrar el handler de un tipo de trabajo"""
+    def decorator(fn: JobHandler) -> JobHandler:
+        _HANDLERS[kind] = fn
+        return fn
+    return decorator
+
+def registered_kinds() -> list[str]:
+    return sorted(_HANDLERS)
+
+def enqueue(
+    db: Session,
+    kind: str,
+    payload: dict | None = None,
+    *,
+    priority: int = 0,
+    delay_seconds: int = 0,
+    max_attempts: int = 3,
+    created_by_id: int | None = None,
+    commit: bool = True,
+) -> Job:
+    """Encolar un trabajo. Con commit=False se une a la transacción del llamador."""
+    job = Job(
+        kind=kind,
+        payload=payload or {},
+        priority=priority,
+        max_attempts=max_attempts,
+        run_after=datetime.utcnow() + timedelta(seconds=delay_seconds),
+        created_by_id=created_by_id,
+    )
+    db.add(job)
+    if commit:
+        db.commit()
+        db.refresh(job)
+    else:
+        db.flush()
+    return job
+
+def has_pending(db: Session, kind: str) -> bool:
+    """¿Hay un trabajo de este tipo esperando o en ejecución?"""
+    return db.scalar(
+        select(Job.id).where(Job.kind == kind, Job.status.in_(("queued", "running"))).limit(1)
+    ) is not None
+
+def queue_stats(db: Session) -> dict:
+    """Trabajos por estado y tipo, antigüedad del más viejo en espera y leases vencidos"""
+    now = datetime.utcnow()
+    by_status: dict[str, int] = {}
+    by_kind: dict[str, dict[str, int]] = {}
+    for kind, job_status, count in db.execute(
+        select(Job.kind, Job.status, func.count(Job.id)).group_by(Job.kind, Job.status)
+    ):
+        by_status[job_status] = by_status.get(job_status, 0) + count
+        by_kind.setdefault(kind, {})[job_status] = count
+    oldest = db.scalar(select(func.min(Job.run_after)).where(Job.status == "queued", Job.run_after <= now))
+    expired = db.scalar(
+        select(func.count(Job.id)).where(Job.status == "running", Job.locked_until < now)
+    )
+    return {
+        "by_status": by_status,
+        "by_kind": by_kind,
+        "oldest_queued_seconds": None if oldest is None else round((now - oldest).total_seconds(), 1),
+        "expired_leases": expired,
+    }
+
+def _claimable(now: datetime):
+    return or_(
+        and_(Job.status == "queued", Job.run_after <= now),
+        # Lease vencido: el worker murió o se colgó a mitad de trabajo
+        and_(Job.status == "running", Job.locked_until < now),
+    )
+
+def claim_next(db: Session, worker_id: str, lease_seconds: int | None = None, batch: int = 10) -> Job | None:
+    """Reservar el siguiente trabajo disponible por prioridad.
+
+    Lee unos pocos candidatos y reserva el primero cuyo UPDATE condicional
+    afecte una fila; si otro worker lo tomó antes, prueba con el siguiente.
+    """
+    lease = timedelta(seconds=lease_seconds or settings.JOB_LEASE_SECONDS)
+    now = datetime.utcnow()
+    candidates = db.scalars(
+        select(Job.id)
+        .where(_claimable(now), Job.kind.in_(list(_HANDLERS)))
+        .order_by(Job.priority.desc(), Job.id)
+        .limit(batch)
+    ).all()
+
+    for job_id in candidates:
+        res = db.execute(
+            update(Job)
+            .where(Job.id == job_id, _claimable(now))
+            .values(
+                status="running",
+                locked_by=worker_id,
+                locked_until=now + lease,
+                attempts=Job.attempts + 1,
+                updated_at=now,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        if res.rowcount == 1:
+            return db.get(Job, job_id, populate_existing=True)
+    return None
+
+def _backoff(attempts: int) -> timedelta:
+    return timedelta(seconds=min(5 * 2 ** attempts, MAX_BACKOFF_SECONDS))
+
+def run_job(db: Session, job: Job) -> Job:
+    """Ejecutar un trabajo reservado y registrar el resultado o el reintento"""
+    handler = _HANDLERS.get(job.kind)
+    now = datetime.utcnow()
+
+    if handler is None:
+        job.status = "failed"
+        job.last_error = f"Tipo de trabajo desconocido: {job.kind}"
+    elif job.attempts > job.max_attempts:
+        job.status = "failed"
+        job.last_error = job.last_error or "Se agotaron los reintentos (lease vencido)"
+    else:
+        # Cada ejecución es una traza propia (con TRACING_EXPORTER activo)
+        with span(f"job {job.kind}", kind=CONSUMER, root=True, **{"job.id": job.id, "job.attempt": job.attempts}) as s:
+            try:
+                # El handler recibe el payload más el id del trabajo (útil para nombrar archivos)
+                job.result = handler(db, {**(job.payload or {}), "job_id": job.id}) or {}
+                job.status = "done"
+                job.last_error = None
+            except Exception as e:
+                db.rollback()
+                job.last_error = traceback.format_exc(limit=5)
+                if job.attempts >= job.max_attempts:
+                    job.status = "failed"
+                else:
+                    job.status = "queued"
+                    job.run_after = now + _backoff(job.attempts)
+                logger.warning("Trabajo %s (%s) falló en el intento %s", job.id, job.kind, job.attempts)
+                s.record_error(e)
+            s.set("job.status", job.status)
+
+    if job.status in ("done", "failed"):
+        job.finished_at = datetime.utcnow()
+    job.locked_by = None
+    job.locked_until = None
+    db.commit()
+    return job
+
+def run_pending(db: Session, worker_id: str, limit: int = 100) -> int:
+    """Procesar trabajos pendientes hasta vaciar la cola (o llegar a limit)"""
+    done = 0
+    while done < limit:
+        job = claim_next(db, worker_id)
+        if job is None:
+            break
+        run_job(db, job)
+        done += 1
+    return done
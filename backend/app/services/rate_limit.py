@@ -0,0 +1,296 @@
+"""
+Límite de intentos para /login y /register.
+
+Cada intento consume un token de dos cubetas (token bucket): una por IP y otra
+por email, y se rechaza con 429 antes de llegar a bcrypt si alguna está vacía.
+Además, los logins fallidos seguidos de un mismo email bloquean ese email
+durante un tiempo que se duplica con cada fallo extra (LOGIN_LOCKOUT_*).
+
+El estado vive en un backend intercambiable (RATE_LIMIT_BACKEND): "memory"
+(por proceso) o "redis" (compartido entre procesos y servidores; cliente RESP
+mínimo, sin dependencias). Si Redis no responde se deja pasar la petición.
+"""
+import logging
+import math
+import socket
+import threading
+import time
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from urllib.parse import urlsplit
+from app.core.config import settings
+from app.core.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+rate_limited = REGISTRY.counter(
+    "auth_rate_limited_total", "Peticiones de autenticación rechazadas por límite de intentos", ("endpoint", "reason")
+)
+login_failures = REGISTRY.counter("auth_login_failures_total", "Logins con credenciales inválidas")
+lockouts = REGISTRY.counter("auth_lockouts_total", "Bloqueos de email por logins fallidos")
+backend_errors = REGISTRY.counter("rate_limit_backend_errors_total", "Errores del backend de límites (se deja pasar)")
+
+class RateLimited(Exception):
+    """Demasiados intentos; retry_after en segundos"""
+    def __init__(self, retry_after: float, reason: str):
+        super().__init__(reason)
+        self.retry_after = max(1, math.ceil(retry_after))
+        self.reason = reason
+
+class RateLimiter(ABC):
+    name = "base"
+
+    @abstractmethod
+    def take(self, key: str, capacity: int, per_second: float) -> float:
+        """Consumir un token; devuelve 0 si se permite o los segundos hasta el próximo token"""
+
+    @abstractmethod
+    def locked_for(self, key: str) -> float:
+        """Segundos que le quedan al bloqueo de key (0 si no está bloqueada)"""
+
+    @abstractmethod
+    def record_failure(self, key: str, *, threshold: int, base: float, maximum: float, window: float) -> float:
+        """Contar un fallo; a partir de `threshold` bloquea base * 2^(fallos - threshold) s (máx. `maximum`)"""
+
+    @abstractmethod
+    def clear_failures(self, key: str):
+        """Olvidar los fallos de key (login correcto)"""
+
+def lockout_seconds(failures: int, *, threshold: int, base: float, maximum: float) -> float:
+    if failures < threshold:
+        return 0.0
+    return min(maximum, base * 2 ** min(failures - threshold, 32))
+
+class MemoryRateLimiter(RateLimiter):
+    """Estado en memoria del proceso (con varios workers, cada uno cuenta aparte)"""
+    name = "memory"
+    PRUNE_EVERY = 1000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets: dict[str, tuple[float, float, float]] = {}  # key -> (tokens, actualizado, segundos hasta llenarse)
+        self._failures: dict[str, tuple[int, float]] = {}  # key -> (fallos, expira)
+        self._locks: dict[str, float] = {}  # key -> bloqueado hasta
+        self._ops = 0
+
+    def _prune(self, now: float):
+        # Cubetas llenas de nuevo, fallos vencidos y bloqueos terminados no aportan nada
+        self._buckets = {k: v for k, v in self._buckets.items() if now - v[1] < v[2]}
+        self._failures = {k: v for k, v in self._failures.items() if v[1] > now}
+        self._locks = {k: v for k, v in self._locks.items() if v > now}
+
+    def take(self, key: str, capacity: int, per_second: float) -> float:
+        now = time.monotonic()
+        with self._lock:
+            self._ops += 1
+            if self._ops % self.PRUNE_EVERY == 0:
+                self._prune(now)
+            tokens, updated, _ = self._buckets.get(key, (capacity, now, 0))
+            tokens = min(capacity, tokens + (now - updated) * per_second)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now, capacity / per_second)
+                return 0.0
+            self._buckets[key] = (tokens, now, capacity / per_second)
+            return (1 - tokens) / per_second
+
+    def locked_for(self, key: str) -> float:
+        with self._lock:
+            return max(0.0, self._locks.get(key, 0) - time.monotonic())
+
+    def record_failure(self, key: str, *, threshold: int, base: float, maximum: float, window: float) -> float:
+        now = time.monotonic()
+        with self._lock:
+            count, expires = self._failures.get(key, (0, 0))
+            count = count + 1 if expires > now else 1
+            self._failures[key] = (count, now + window)
+            seconds = lockout_seconds(count, threshold=threshold, base=base, maximum=maximum)
+            if seconds:
+                self._locks[key] = now + seconds
+            return seconds
+
+    def clear_failures(self, key: str):
+        with self._lock:
+            self._failures.pop(key, None)
+            self._locks.pop(key, None)
+
+class RedisError(Exception):
+    pass
+
+class ConnectionClosed(RedisError):
+    pass
+
+class _RespConnection:
+    """Conexión mínima a Redis (protocolo RESP2)"""
+
+    def __init__(self, host: str, port: int, db: int, password: str | None, timeout: float):
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.file = self.sock.makefile("rb")
+        if password:
+            self.call("AUTH", password)
+        if db:
+            self.call("SELECT", db)
+
+    def call(self, *args):
+        parts = [f"*{len(args)}\r\n".encode()]
+        for arg in args:
+            data = str(arg).encode("utf-8")
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        self.sock.sendall(b"".join(parts))
+        return self._read()
+
+    def _read(self):
+        line = self.file.readline()
+        if not line:
+            raise ConnectionClosed("Conexión cerrada por Redis")
+        kind, rest = line[:1], line[1:-2]
+        if kind == b"+":
+            return rest.decode()
+        if kind == b"-":
+            raise RedisError(rest.decode())
+        if kind == b":":
+            return int(rest)
+        if kind == b"$":
+            size = int(rest)
+            if size < 0:
+                return None
+            data = self.file.read(size + 2)
+            return data[:-2].decode("utf-8")
+        if kind == b"*":
+            size = int(rest)
+            return None if size < 0 else [self._read() for _ in range(size)]
+        raise RedisError(f"Respuesta RESP inesperada: {line!r}")
+
+    def close(self):
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+
+# Cubeta en un hash {tokens, ts}; usa el reloj de Redis para que todos los
+# servidores vean el mismo tiempo
+_TAKE_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local data = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(data[1]) or capacity
+local ts = tonumber(data[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= 1 then tokens = tokens - 1 else wait = (1 - tokens) / rate end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return tostring(wait)
+"""
+
+class RedisRateLimiter(RateLimiter):
+    """Estado compartido en Redis (operaciones atómicas con un script Lua e INCR)"""
+    name = "redis"
+
+    def __init__(self, url: str, prefix: str = "rl:", timeout: float = 0.5):
+        parsed = urlsplit(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.password = parsed.password
+        self.prefix = prefix
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _call(self, *args):
+        # Una conexión por hilo; si se cayó se reabre una vez
+        for attempt in range(2):
+            conn = getattr(self._local, "conn", None)
+            if conn is None:
+                conn = self._local.conn = _RespConnection(self.host, self.port, self.db, self.password, self.timeout)
+            try:
+                return conn.call(*args)
+            except (OSError, ConnectionClosed):
+                conn.close()
+                self._local.conn = None
+                if attempt:
+                    raise
+
+    def take(self, key: str, capacity: int, per_second: float) -> float:
+        return float(self._call("EVAL", _TAKE_SCRIPT, 1, self.prefix + "b:" + key, capacity, per_second))
+
+    def locked_for(self, key: str) -> float:
+        ms = self._call("PTTL", self.prefix + "l:" + key)
+        return ms / 1000 if ms and ms > 0 else 0.0
+
+    def record_failure(self, key: str, *, threshold: int, base: float, maximum: float, window: float) -> float:
+        failures_key = self.prefix + "f:" + key
+        count = self._call("INCR", failures_key)
+        self._call("EXPIRE", failures_key, math.ceil(window))
+        seconds = lockout_seconds(count, threshold=threshold, base=base, maximum=maximum)
+        if seconds:
+            self._call("SET", self.prefix + "l:" + key, 1, "PX", int(seconds * 1000))
+        return seconds
+
+    def clear_failures(self, key: str):
+        self._call("DEL", self.prefix + "f:" + key, self.prefix + "l:" + key)
+
+@lru_cache
+def get_rate_limiter() -> RateLimiter:
+    if settings.RATE_LIMIT_BACKEND == "redis":
+        return RedisRateLimiter(settings.RATE_LIMIT_REDIS_URL)
+    return MemoryRateLimiter()
+
+def _safe(fn, *args, default=0.0, **kwargs):
+    """Ejecutar una operación del backend; si falla se deja pasar (no bloquear a todos)"""
+    try:
+        return fn(*args, **kwargs)
+    except (OSError, RedisError) as e:
+        backend_errors.inc()
+        logger.warning("Backend de límites no disponible: %s", e)
+        return default
+
+def _reject(endpoint: str, reason: str, retry_after: float):
+    rate_limited.inc(endpoint=endpoint, reason=reason)
+    raise RateLimited(retry_after, reason)
+
+def _email_key(email: str) -> str:
+    return email.strip().lower()
+
+def guard_login(ip: str, email: str):
+    """Comprobar IP, email y bloqueo antes de verificar la contraseña (lanza RateLimited)"""
+    if not settings.RATE_LIMIT_ENABLED:
+        return
+    limiter = get_rate_limiter()
+    email = _email_key(email)
+    locked = _safe(limiter.locked_for, f"login:{email}")
+    if locked:
+        _reject("login", "lockout", locked)
+    wait = _safe(limiter.take, f"login-ip:{ip}", settings.LOGIN_IP_BURST, settings.LOGIN_IP_PER_MINUTE / 60)
+    if wait:
+        _reject("login", "ip", wait)
+    wait = _safe(limiter.take, f"login-email:{email}", settings.LOGIN_EMAIL_BURST, settings.LOGIN_EMAIL_PER_MINUTE / 60)
+    if wait:
+        _reject("login", "email", wait)
+
+def login_failed(email: str):
+    login_failures.inc()
+    if not settings.RATE_LIMIT_ENABLED:
+        return
+    seconds = _safe(
+        get_rate_limiter().record_failure, f"login:{_email_key(email)}",
+        threshold=settings.LOGIN_LOCKOUT_THRESHOLD,
+        base=settings.LOGIN_LOCKOUT_BASE_SECONDS,
+        maximum=settings.LOGIN_LOCKOUT_MAX_SECONDS,
+        window=settings.LOGIN_LOCKOUT_WINDOW_SECONDS,
+    )
+    if seconds:
+        lockouts.inc()
+        logger.warning("Email %s bloqueado %.0f s por logins fallidos", _email_key(email), seconds)
+
+def login_succeeded(email: str):
+    if settings.RATE_LIMIT_ENABLED:
+        _safe(get_rate_limiter().clear_failures, f"login:{_email_key(email)}", default=None)
+
+def guard_register(ip: str):
+    if not settings.RATE_LIMIT_ENABLED:
+        return
+    wait = _safe(get_rate_limiter().take, f"register-ip:{ip}", settings.REGISTER_IP_BURST, settings.REGISTER_IP_PER_MINUTE / 60)
+    if wait:
+        _reject("register", "ip", wait)
@@ -0,0 +1,113 @@
+"""
+Cola de revisión de documentos para los admins.
+
+Solo documentos en "pending", con el nombre y email del cliente en la misma
+consulta. Un admin puede reservar documentos durante REVIEW_CLAIM_MINUTES para
+que no aparezcan en la cola de los demás; la reserva se toma con un UPDATE
+condicional, así dos admins nunca obtienen el mismo documento.
+"""
+from datetime import datetime, timedelta
+from sqlalchemy import func, or_, select, update
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.client import Client
+from app.models.document import Document
+from app.models.user import User
+
+# "oldest": lo que más lleva esperando (usa ix_documents_status_created);
+# "client": primero los clientes más antiguos
+ORDERS = {
+    "oldest": (Document.created_at, Document.id),
+    "client": (func.coalesce(Client.join_date, User.created_at), Document.created_at, Document.id),
+}
+
+def _available_to(admin_id: int, now: datetime):
+    """Sin reserva, con la reserva vencida o reservado por este mismo admin"""
+    return or_(
+        Document.claimed_until.is_(None),
+        Document.claimed_until < now,
+        Document.claimed_by_id == admin_id,
+    )
+
+def claimed_by_other(doc: Document, admin_id: int) -> bool:
+    return (
+        doc.claimed_by_id is not None
+        and doc.claimed_by_id != admin_id
+        and doc.claimed_until is not None
+        and doc.claimed_until >= datetime.utcnow()
+    )
+
+def _queue_select(admin_id: int, order: str, now: datetime):
+    return (
+        select(
+            Document,
+            User.email,
+            func.trim(func.coalesce(Client.first_name, "") + " " + func.coalesce(Client.last_name, "")).label("client_name"),
+            Client.join_date,
+        )
+        .join(User, User.id == Document.user_id)
+        .outerjoin(Client, Client.user_id == Document.user_id)
+        .where(Document.status == "pending", _available_to(admin_id, now))
+        .order_by(*ORDERS[order])
+    )
+
+def list_queue(db: Session, admin_id: int, order: str = "oldest", limit: int = 50, offset: int = 0) -> list[dict]:
+    now = datetime.utcnow()
+    rows = db.execute(_queue_select(admin_id, order, now).offset(offset).limit(limit)).all()
+    return [
+        {
+            "id": doc.id,
+            "user_id": doc.user_id,
+            "email": email,
+            "client_name": client_name or None,
+            "client_since": join_date,
+            "category": doc.category,
+            "original_name": doc.original_name,
+            "mime_type": doc.mime_type,
+            "size_bytes": doc.size_bytes,
+            "family_member_name": doc.family_member_name,
+            "has_preview": doc.has_preview,
+            "created_at": doc.created_at,
+            "claimed_until": doc.claimed_until if doc.claimed_by_id == admin_id else None,
+        }
+        for doc, email, client_name, join_date in rows
+    ]
+
+def claim(db: Session, doc_id: int, admin_id: int, now: datetime | None = None) -> bool:
+    """Reservar (o renovar) un documento pendiente; False si no está disponible"""
+    now = now or datetime.utcnow()
+    res = db.execute(
+        update(Document)
+        .where(Document.id == doc_id, Document.status == "pending", _available_to(admin_id, now))
+        .values(claimed_by_id=admin_id, claimed_until=now + timedelta(minutes=settings.REVIEW_CLAIM_MINUTES))
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return res.rowcount == 1
+
+def claim_next(db: Session, admin_id: int, count: int = 1, order: str = "oldest") -> list[int]:
+    """Reservar los siguientes `count` documentos de la cola que nadie tenga reservados"""
+    now = datetime.utcnow()
+    candidates = db.scalars(
+        _queue_select(admin_id, order, now)
+        .with_only_columns(Document.id)
+        .where(or_(Document.claimed_by_id.is_(None), Document.claimed_by_id != admin_id, Document.claimed_until < now))
+        .limit(count * 2 + 5)
+    ).all()
+    claimed = []
+    for doc_id in candidates:
+        if len(claimed) == count:
+            break
+        if claim(db, doc_id, admin_id, now):
+            claimed.append(doc_id)
+    return claimed
+
+def release(db: Session, doc_id: int, admin_id: int) -> bool:
+    res = db.execute(
+        update(Document)
+        .where(Document.id == doc_id, Document.claimed_by_id == admin_id)
+        .values(claimed_by_id=None, claimed_until=None)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return res.rowcount == 1
@@ -0,0 +1,111 @@
+"""
+Escaneo antivirus de documentos subidos.
+
+El escáner es intercambiable (SCANNER_BACKEND): "none" no escanea y "clamd"
+habla el protocolo INSTREAM de clamd por socket Unix o TCP.
+"""
+import socket
+import struct
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from functools import lru_cache
+from app.core.config import settings
+
+# Estados de documento que aún no se pueden descargar ni revisar
+BLOCKED_STATUSES = {"quarantined", "infected"}
+
+@dataclass
+class ScanResult:
+    clean: bool
+    signature: str | None = None  # nombre de la firma detectada, si hay
+
+class ScannerError(Exception):
+    """El escáner no respondió o devolvió un error; el escaneo debe reintentarse"""
+
+class Scanner(ABC):
+    name = "base"
+
+    @abstractmethod
+    def scan(self, path: str) -> ScanResult:
+        """Escanear el archivo; lanza ScannerError si no se pudo escanear"""
+
+class NullScanner(Scanner):
+    """Sin antivirus configurado: todo se considera limpio"""
+    name = "none"
+
+    def scan(self, path: str) -> ScanResult:
+        return ScanResult(clean=True)
+
+class ClamdScanner(Scanner):
+    """Cliente mínimo de clamd (comando INSTREAM)"""
+    name = "clamd"
+
+    def __init__(self, *, socket_path: str | None = None, host: str = "localhost", port: int = 3310,
+                 timeout: float = 30.0, chunk_size: int = 64 * 1024):
+        self.socket_path = socket_path
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.chunk_size = chunk_size
+
+    def _connect(self) -> socket.socket:
+        try:
+            if self.socket_path:
+                sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                sock.settimeout(self.timeout)
+                sock.connect(self.socket_path)
+            else:
+                sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        except OSError as e:
+            raise ScannerError(f"No se pudo conectar a clamd: {e}") from e
+        return sock
+
+    @staticmethod
+    def _read_reply(sock: socket.socket) -> str:
+        data = b""
+        while not data.endswith(b"\0"):
+            part = sock.recv(4096)
+            if not part:
+                break
+            data += part
+        return data.rstrip(b"\0").decode("utf-8", "replace").strip()
+
+    def ping(self) -> bool:
+        with self._connect() as sock:
+            sock.sendall(b"zPING\0")
+            return self._read_reply(sock) == "PONG"
+
+    def scan(self, path: str) -> ScanResult:
+        try:
+            with self._connect() as sock, open(path, "rb") as f:
+                sock.sendall(b"zINSTREAM\0")
+                while chunk := f.read(self.chunk_size):
+                    sock.sendall(struct.pack("!L", len(chunk)) + chunk)
+                sock.sendall(struct.pack("!L", 0))
+                reply = self._read_reply(sock)
+        except OSError as e:
+            raise ScannerError(f"Error comunicándose con clamd: {e}") from e
+
+        # Respuestas: "stream: OK", "stream: <firma> FOUND", "... ERROR"
+        if reply.endswith("OK"):
+            return ScanResult(clean=True)
+        if reply.endswith("FOUND"):
+            signature = reply.split(":", 1)[-1].removesuffix("FOUND").strip()
+            return ScanResult(clean=False, signature=signature)
+        raise ScannerError(f"Respuesta inesperada de clamd: {reply!r}")
+
+def scanning_enabled() -> bool:
+    return settings.SCANNER_BACKEND != "none"
+
+@lru_cache
+def get_scanner() -> Scanner:
+    if settings.SCANNER_BACKEND == "clamd":
+        return ClamdScanner(
+            socket_path=settings.CLAMD_SOCKET,
+            host=settings.CLAMD_HOST,
+            port=settings.CLAMD_PORT,
+            timeout=settings.CLAMD_TIMEOUT,
+        )
+    if settings.SCANNER_BACKEND == "none":
+        return NullScanner()
+    raise ValueError(f"SCANNER_BACKEND desconocido: {settings.SCANNER_BACKEND!r} (usa 'none' o 'clamd')")
@@ -0,0 +1,136 @@
+"""
+Búsqueda de texto completo para el panel de admin (clientes, formularios y documentos).
+
+MySQL usa los índices FULLTEXT de cada tabla en modo booleano; la insensibilidad
+a tildes ("Garcia" encuentra "García") la da la colación *_ai_ci de las
+columnas. SQLite usa la tabla FTS5 search_fts (tokenizador unicode61 con
+remove_diacritics) que mantienen los triggers de models/search_index.py.
+Cada término se busca como prefijo y todos deben aparecer.
+
+Otras bases (p.ej. PostgreSQL) usan una búsqueda genérica con LIKE: cada
+término debe aparecer dentro de alguna columna, sin ignorar tildes ni ordenar
+por relevancia (los más recientes primero) y recorriendo las tablas.
+"""
+import re
+from sqlalchemy import func, literal, or_, select, text
+from sqlalchemy.orm import Session
+from app.models.client import Client
+from app.models.document import Document
+from app.models.intake_form import IntakeForm
+from app.models.search_index import SOURCES
+from app.models.user import User
+
+KINDS = tuple(SOURCES)
+MAX_TERMS = 8
+_TERM_RE = re.compile(r"\w+", re.UNICODE)
+
+# innodb_ft_min_token_size (3 por defecto) y la lista de stopwords de InnoDB:
+# un término obligatorio que el índice no guarda dejaría la búsqueda vacía
+_MYSQL_MIN_TOKEN = 3
+_MYSQL_STOPWORDS = {
+    "about", "are", "com", "for", "from", "how", "the", "that", "this", "was",
+    "what", "when", "where", "who", "will", "with", "und", "www",
+}
+
+# tipo -> (tabla, columnas del índice FULLTEXT, título, user_id)
+_MYSQL_SOURCES = {
+    "user": ("users", "email", "email", "id"),
+    "client": ("clients", "first_name, last_name, phone", "TRIM(CONCAT_WS(' ', first_name, last_name))", "user_id"),
+    "form": ("intake_forms", "nombres, apellidos, pasaporte", "TRIM(CONCAT_WS(' ', nombres, apellidos))", "user_id"),
+    "document": ("documents", "original_name", "original_name", "user_id"),
+}
+# Condición extra por origen: los documentos en la papelera no aparecen
+_MYSQL_LIVE = {"document": " AND deleted_at IS NULL"}
+
+def _full_name(first, last):
+    return func.trim(func.coalesce(first, "").concat(" ").concat(func.coalesce(last, "")))
+
+# tipo -> (modelo, columnas buscadas, título, user_id) para la búsqueda genérica
+_GENERIC_SOURCES = {
+    "user": (User, (User.email,), User.email, User.id),
+    "client": (Client, (Client.first_name, Client.last_name, Client.phone),
+               _full_name(Client.first_name, Client.last_name), Client.user_id),
+    "form": (IntakeForm, (IntakeForm.nombres, IntakeForm.apellidos, IntakeForm.pasaporte),
+             _full_name(IntakeForm.nombres, IntakeForm.apellidos), IntakeForm.user_id),
+    "document": (Document, (Document.original_name,), Document.original_name, Document.user_id),
+}
+_GENERIC_LIVE = {"document": Document.deleted_at.is_(None)}
+
+def query_terms(q: str) -> list[str]:
+    return _TERM_RE.findall(q.lower())[:MAX_TERMS]
+
+def _search_mysql(db: Session, terms: list[str], kinds: list[str], limit: int):
+    terms = [t for t in terms if len(t) >= _MYSQL_MIN_TOKEN and t not in _MYSQL_STOPWORDS]
+    if not terms:
+        return []
+    match_query = " ".join(f"+{t}*" for t in terms)
+    parts = []
+    for kind in kinds:
+        table, columns, title, user_id = _MYSQL_SOURCES[kind]
+        match = f"MATCH({columns}) AGAINST (:q IN BOOLEAN MODE)"
+        # Cada parte usa su índice FULLTEXT y aporta como mucho `limit` filas
+        parts.append(
+            f"(SELECT '{kind}' AS kind, id, {user_id} AS user_id, {title} AS title, {match} AS score "
+            f"FROM {table} WHERE {match}{_MYSQL_LIVE.get(kind, '')} ORDER BY score DESC LIMIT :limit)"
+        )
+    sql = " UNION ALL ".join(parts) + " ORDER BY score DESC LIMIT :limit"
+    return db.execute(text(sql), {"q": match_query, "limit": limit}).all()
+
+def _search_sqlite(db: Session, terms: list[str], kinds: list[str], limit: int):
+    match_query = " ".join('"{}"*'.format(t.replace('"', "")) for t in terms)
+    params = {"q": match_query, "limit": limit}
+    kind_filter = ""
+    if set(kinds) != set(KINDS):
+        params.update({f"k{i}": kind for i, kind in enumerate(kinds)})
+        kind_filter = " AND kind IN ({})".format(", ".join(f":k{i}" for i in range(len(kinds))))
+    # "ORDER BY rank" (bm25) lo optimiza FTS5; rank es menor cuanto más relevante
+    sql = (
+        "SELECT kind, rowid / 4 AS id, user_id, title, -rank AS score "
+        f"FROM search_fts WHERE search_fts MATCH :q{kind_filter} "
+        "ORDER BY rank LIMIT :limit"
+    )
+    return db.execute(text(sql), params).all()
+
+def _search_generic(db: Session, terms: list[str], kinds: list[str], limit: int):
+    rows = []
+    for kind in kinds:
+        model, columns, title, user_id = _GENERIC_SOURCES[kind]
+        stmt = select(literal(kind).label("kind"), model.id, user_id.label("user_id"), title.label("title"),
+                      literal(1.0).label("score"))
+        for term in terms:
+            # autoescape: "_" es un carácter de palabra pero también comodín de LIKE
+            stmt = stmt.where(or_(*(func.lower(c).contains(term, autoescape=True) for c in columns)))
+        if kind in _GENERIC_LIVE:
+            stmt = stmt.where(_GENERIC_LIVE[kind])
+        rows.extend(db.execute(stmt.order_by(model.id.desc()).limit(limit)).all())
+    return rows[:limit]
+
+def search(db: Session, q: str, kinds: list[str] | None = None, limit: int = 20) -> list[dict]:
+    """Buscar en usuarios, clientes, formularios y documentos; resultados ordenados por relevancia"""
+    terms = query_terms(q)
+    kinds = [k for k in (kinds or KINDS) if k in SOURCES]
+    if not terms or not kinds:
+        return []
+
+    dialect = db.get_bind().dialect.name
+    if dialect == "mysql":
+        rows = _search_mysql(db, terms, kinds, limit)
+    elif dialect == "sqlite":
+        rows = _search_sqlite(db, terms, kinds, limit)
+    else:
+        rows = _search_generic(db, terms, kinds, limit)
+
+    # Email del usuario de cada resultado, en una sola consulta
+    user_ids = {row.user_id for row in rows}
+    emails = dict(db.query(User.id, User.email).filter(User.id.in_(user_ids)).all()) if user_ids else {}
+    return [
+        {
+            "kind": row.kind,
+            "id": row.id,
+            "user_id": row.user_id,
+            "email": emails.get(row.user_id),
+            "title": row.title,
+            "score": float(row.score),
+        }
+        for row in rows
+    ]
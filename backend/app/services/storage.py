@@ -0,0 +1,136 @@
+"""
+Helpers de almacenamiento de archivos subidos
+
+Los archivos se reparten en dos niveles de carpetas según el principio del
+stored_name, que empieza por el uuid de la subida:
+    UPLOAD_DIR/3f/a2/3fa2..._pasaporte.pdf
+Los derivados (<stored_name><sufijo>) caen en la misma carpeta. Los archivos de
+antes de este layout están en la raíz de UPLOAD_DIR: se siguen encontrando ahí
+hasta que migrate_upload_layout.py los mueve, con la app funcionando.
+"""
+import hashlib
+import os
+from string import hexdigits
+from typing import Iterator
+from app.core.config import settings
+
+# Archivos derivados que se guardan junto al original: <stored_name><sufijo>
+PREVIEW_SUFFIX = ".preview.webp"
+ORIGINAL_SUFFIX = ".orig"  # original conservado cuando la foto se normaliza al subir
+DERIVED_SUFFIXES = (PREVIEW_SUFFIX, ORIGINAL_SUFFIX)
+
+SHARD_LEVELS = 2  # carpetas de 2 caracteres hex: 256 * 256 = 65536 carpetas
+_HEX = set(hexdigits)
+
+def shard_parts(name: str) -> tuple[str, ...]:
+    """Carpetas de un archivo según su nombre; () si no empieza por hex (se queda en la raíz)"""
+    prefix = name[: 2 * SHARD_LEVELS].lower()
+    if len(prefix) < 2 * SHARD_LEVELS or not _HEX.issuperset(prefix):
+        return ()
+    return tuple(prefix[i:i + 2] for i in range(0, 2 * SHARD_LEVELS, 2))
+
+def sharded_path(name: str) -> str:
+    """Ruta de un archivo en el layout por carpetas (donde se escriben los nuevos)"""
+    return os.path.join(settings.UPLOAD_DIR, *shard_parts(name), name)
+
+def flat_path(name: str) -> str:
+    """Ruta de un archivo en el layout antiguo, todo en la raíz de UPLOAD_DIR"""
+    return os.path.join(settings.UPLOAD_DIR, name)
+
+def _resolve(name: str) -> str:
+    # Primero el layout nuevo; la raíz solo si el archivo está ahí (aún sin migrar)
+    path = sharded_path(name)
+    if not os.path.exists(path):
+        flat = flat_path(name)
+        if flat != path and os.path.exists(flat):
+            return flat
+    return path
+
+def document_path(stored_name: str) -> str:
+    """Ruta física de un documento a partir de su stored_name.
+
+    Para escribir un archivo nuevo, crear antes su carpeta (ensure_parent).
+    """
+    return _resolve(stored_name)
+
+def preview_path(stored_name: str) -> str:
+    """Ruta de la miniatura WebP generada para un documento"""
+    return _resolve(stored_name + PREVIEW_SUFFIX)
+
+def original_path(stored_name: str) -> str:
+    """Ruta del original sin normalizar (solo con IMAGE_INGEST_KEEP_ORIGINAL)"""
+    return _resolve(stored_name + ORIGINAL_SUFFIX)
+
+def ensure_parent(path: str) -> str:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+def document_file_paths(stored_name: str) -> list[str]:
+    """Todas las rutas posibles del original y sus derivados, en ambos layouts"""
+    paths = []
+    for name in [stored_name] + [stored_name + suffix for suffix in DERIVED_SUFFIXES]:
+        paths.append(sharded_path(name))
+        if flat_path(name) != paths[-1]:
+            paths.append(flat_path(name))
+    return paths
+
+def iter_upload_files(root: str | None = None) -> Iterator[os.DirEntry]:
+    """Archivos de UPLOAD_DIR y sus subcarpetas (sin los ocultos, que son de la app)"""
+    stack = [root or settings.UPLOAD_DIR]
+    while stack:
+        try:
+            entries = os.scandir(stack.pop())
+        except FileNotFoundError:
+            continue
+        with entries:
+            for entry in entries:
+                if entry.name.startswith("."):
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    yield entry
+
+def move_to_shard(name: str) -> str:
+    """Mover un archivo de la raíz a su carpeta; devuelve "moved", "duplicate",
+    "conflict", "missing" o "skipped" (nombre sin carpeta)"""
+    src, dest = flat_path(name), sharded_path(name)
+    if src == dest:
+        return "skipped"
+    if os.path.exists(dest):
+        # Ya copiado (p.ej. una migración interrumpida): la raíz sobra si es igual
+        try:
+            if os.path.getsize(src) != os.path.getsize(dest):
+                return "conflict"
+            os.remove(src)
+        except FileNotFoundError:
+            return "missing"
+        return "duplicate"
+    ensure_parent(dest)
+    try:
+        # Mismo sistema de archivos: rename atómico, sin copiar datos
+        os.replace(src, dest)
+    except FileNotFoundError:
+        return "missing"
+    return "moved"
+
+def file_sha256(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """sha256 (hex) de un archivo, leído por bloques"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def delete_file_if_exists(path: str):
+    try:
+        if os.path.exists(path):
+            os.remove(path)
+    except Exception:
+        # no interrumpir flujo por error de filesystem
+        pass
+
+def delete_document_files(stored_name: str):
+    """Borrar el original y todos sus archivos derivados"""
+    for path in document_file_paths(stored_name):
+        delete_file_if_exists(path)
@@ -0,0 +1,270 @@
+"""
+Consistencia entre la tabla documents y los archivos de UPLOAD_DIR.
+
+Diferencias que se reportan:
+- missing: documento sin su archivo (salvo en la papelera o infectado: esos no
+  tienen por qué tenerlo)
+- orphan: archivo que no pertenece a ningún documento, ni vivo ni en la papelera,
+  ni a una versión anterior
+- size_mismatch: el tamaño del archivo no coincide con size_bytes
+- checksum_mismatch: el sha256 del archivo no coincide con el guardado al subir
+  (solo con checksums=True; los documentos antiguos no tienen sha256)
+Las versiones anteriores que siguen en UPLOAD_DIR se comprueban igual que los
+documentos (con "version" en la diferencia); las ya movidas a ARCHIVE_DIR no.
+
+Pensado para millones de archivos con memoria acotada: el recorrido de
+UPLOAD_DIR (las subcarpetas en paralelo) y las filas de documents (cursor del
+servidor con yield_per) se reparten en `buckets` archivos temporales según el
+hash del stored_name y después se comparan cubeta a cubeta; en memoria solo
+está una cubeta.
+"""
+import json
+import os
+import tempfile
+import threading
+import zlib
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import asdict, dataclass
+from typing import Callable, Iterator
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.document import Document
+from app.models.document_version import DocumentVersion
+from app.services.storage import DERIVED_SUFFIXES, file_sha256, shard_parts
+
+# Documentos cuyo archivo se borra a propósito (ver tasks.scan_document)
+_NO_FILE_STATUSES = {"infected"}
+_FLUSH_EVERY = 1000
+
+@dataclass
+class CheckReport:
+    files: int = 0
+    file_bytes: int = 0
+    documents: int = 0
+    versions: int = 0  # versiones anteriores aún en UPLOAD_DIR
+    missing: int = 0
+    orphan: int = 0
+    size_mismatch: int = 0
+    checksum_mismatch: int = 0
+    checksums_verified: int = 0
+    checksums_unavailable: int = 0
+    unsharded: int = 0  # en la raíz, pendientes de migrate_upload_layout.py (no es un problema)
+
+    @property
+    def problems(self) -> int:
+        return self.missing + self.orphan + self.size_mismatch + self.checksum_mismatch
+
+    def to_dict(self) -> dict:
+        return {**asdict(self), "problems": self.problems}
+
+def _derived_base(name: str) -> str | None:
+    for suffix in DERIVED_SUFFIXES:
+        if name.endswith(suffix):
+            return name[: -len(suffix)]
+    return None
+
+class _Buckets:
+    """Archivos JSONL temporales; cada registro va a la cubeta de su clave"""
+
+    def __init__(self, directory: str, prefix: str, count: int):
+        self.paths = [os.path.join(directory, f"{prefix}{i}.jsonl") for i in range(count)]
+        self._files = [open(path, "w", encoding="utf-8") for path in self.paths]
+        self._lock = threading.Lock()
+
+    def add_many(self, records: list[tuple[str, list]]):
+        count = len(self._files)
+        with self._lock:
+            for key, record in records:
+                self._files[zlib.crc32(key.encode("utf-8")) % count].write(json.dumps(record) + "\n")
+
+    def close(self):
+        for f in self._files:
+            f.close()
+
+    @staticmethod
+    def read(path: str) -> Iterator[list]:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                yield json.loads(line)
+
+def _scan_directory(path: str, root: str, buckets: _Buckets, report: CheckReport, lock: threading.Lock) -> list[str]:
+    """Repartir los archivos de una carpeta en las cubetas; devuelve sus subcarpetas"""
+    subdirs, batch = [], []
+    files = size_total = unsharded = 0
+    with os.scandir(path) as entries:
+        for entry in entries:
+            # Los ocultos son de la app (p.ej. la prueba de escritura de /readyz)
+            if entry.name.startswith("."):
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                subdirs.append(entry.path)
+                continue
+            if not entry.is_file(follow_symlinks=False):
+                continue
+            size = entry.stat(follow_symlinks=False).st_size
+            rel = os.path.relpath(entry.path, root)
+            files += 1
+            size_total += size
+            if path == root and shard_parts(entry.name):
+                unsharded += 1
+            batch.append((entry.name, ["file", entry.name, size, rel]))
+            base = _derived_base(entry.name)
+            if base is not None:
+                batch.append((base, ["derived", entry.name, size, rel, base]))
+            if len(batch) >= _FLUSH_EVERY:
+                buckets.add_many(batch)
+                batch = []
+    if batch:
+        buckets.add_many(batch)
+    with lock:
+        report.files += files
+        report.file_bytes += size_total
+        report.unsharded += unsharded
+    return subdirs
+
+def _walk_parallel(root: str, buckets: _Buckets, report: CheckReport, workers: int):
+    lock = threading.Lock()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="storage-check") as pool:
+        pending = {pool.submit(_scan_directory, root, root, buckets, report, lock)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                for subdir in future.result():
+                    pending.add(pool.submit(_scan_directory, subdir, root, buckets, report, lock))
+
+def _spill_documents(db: Session, buckets: _Buckets, report: CheckReport, batch_size: int):
+    documents = (
+        select(Document.id, Document.stored_name, Document.size_bytes, Document.sha256,
+               Document.status, Document.deleted_at.is_not(None))
+        .execution_options(include_deleted=True, stream_results=True, yield_per=batch_size)
+    )
+    versions = (
+        select(DocumentVersion.document_id, DocumentVersion.stored_name, DocumentVersion.size_bytes,
+               DocumentVersion.sha256, DocumentVersion.status, DocumentVersion.version)
+        .where(DocumentVersion.storage_tier == "hot")
+        .execution_options(stream_results=True, yield_per=batch_size)
+    )
+    # Registro: [document_id, stored_name, size_bytes, sha256, status, deleted, version]
+    # (version None para la actual)
+    batch = []
+    for stmt, is_version in ((documents, False), (versions, True)):
+        for doc_id, stored_name, size_bytes, sha256, status, extra in db.execute(stmt):
+            deleted, version = (False, extra) if is_version else (bool(extra), None)
+            batch.append((stored_name, [doc_id, stored_name, size_bytes, sha256, status, deleted, version]))
+            if is_version:
+                report.versions += 1
+            else:
+                report.documents += 1
+            if len(batch) >= batch_size:
+                buckets.add_many(batch)
+                batch = []
+    if batch:
+        buckets.add_many(batch)
+
+def _verify_checksum(job: tuple) -> tuple:
+    _ref, path, _expected = job
+    try:
+        return job, file_sha256(path)
+    except OSError:
+        return job, None
+
+def check_storage(
+    db: Session,
+    *,
+    buckets: int = 64,
+    workers: int = 8,
+    batch_size: int = 5000,
+    checksums: bool = False,
+    on_issue: Callable[[dict], None] | None = None,
+) -> CheckReport:
+    """Comparar documents con UPLOAD_DIR; cada diferencia se pasa a on_issue"""
+    report = CheckReport()
+    root = settings.UPLOAD_DIR
+
+    def _issue(kind: str, **data):
+        setattr(report, kind, getattr(report, kind) + 1)
+        if on_issue is not None:
+            on_issue({"issue": kind, **data})
+
+    with tempfile.TemporaryDirectory(prefix="storage-check-") as tmp, \
+            ThreadPoolExecutor(max_workers=workers, thread_name_prefix="storage-hash") as hashers:
+        file_buckets = _Buckets(tmp, "files", buckets)
+        doc_buckets = _Buckets(tmp, "docs", buckets)
+        try:
+            if os.path.isdir(root):
+                _walk_parallel(root, file_buckets, report, workers)
+            _spill_documents(db, doc_buckets, report, batch_size)
+        finally:
+            file_buckets.close()
+            doc_buckets.close()
+
+        # Archivos derivados cuyo documento no está en su cubeta: se resuelven al
+        # final contra la BD (puede que el archivo sea un documento con ese sufijo)
+        unresolved_path = os.path.join(tmp, "unresolved.jsonl")
+        with open(unresolved_path, "w", encoding="utf-8") as unresolved:
+            for files_path, docs_path in zip(file_buckets.paths, doc_buckets.paths):
+                docs = {rec[1]: rec for rec in _Buckets.read(docs_path)}
+                files, derived = {}, []
+                for rec in _Buckets.read(files_path):
+                    if rec[0] == "file":
+                        files[rec[1]] = rec
+                    else:
+                        derived.append(rec)
+
+                hash_jobs = []
+                for name, (doc_id, _, size_bytes, sha256, status, deleted, version) in docs.items():
+                    ref = {"document_id": doc_id} if version is None else {"document_id": doc_id, "version": version}
+                    found = files.get(name)
+                    if found is None:
+                        if not deleted and status not in _NO_FILE_STATUSES:
+                            _issue("missing", **ref, stored_name=name)
+                        continue
+                    if deleted:
+                        continue
+                    if found[2] != size_bytes:
+                        _issue("size_mismatch", **ref, path=found[3], size_bytes=size_bytes, file_size=found[2])
+                    elif checksums:
+                        if sha256:
+                            hash_jobs.append((ref, os.path.join(root, found[3]), sha256))
+                        else:
+                            report.checksums_unavailable += 1
+
+                for name, (_, _, size, rel) in files.items():
+                    # Un derivado se decide por su registro "derived" (cubeta de su documento)
+                    if name not in docs and _derived_base(name) is None:
+                        _issue("orphan", path=rel, size=size)
+                for _, name, size, rel, base in derived:
+                    if base not in docs:
+                        unresolved.write(json.dumps([name, size, rel]) + "\n")
+
+                for (ref, path, expected), actual in hashers.map(_verify_checksum, hash_jobs):
+                    report.checksums_verified += 1
+                    if actual != expected:
+                        _issue("checksum_mismatch", **ref, path=os.path.relpath(path, root),
+                               sha256=expected, file_sha256=actual)
+
+        _resolve_derived(db, unresolved_path, batch_size, _issue)
+    return report
+
+def _resolve_derived(db: Session, path: str, batch_size: int, issue: Callable):
+    def _check(batch):
+        names = [name for name, _, _ in batch]
+        known = set(db.scalars(
+            select(Document.stored_name)
+            .where(Document.stored_name.in_(names))
+            .execution_options(include_deleted=True)
+        ))
+        known.update(db.scalars(select(DocumentVersion.stored_name).where(DocumentVersion.stored_name.in_(names))))
+        for name, size, rel in batch:
+            if name not in known:
+                issue("orphan", path=rel, size=size)
+
+    batch = []
+    for rec in _Buckets.read(path):
+        batch.append(rec)
+        if len(batch) >= min(batch_size, 1000):
+            _check(batch)
+            batch = []
+    if batch:
+        _check(batch)
@@ -0,0 +1,165 @@
+"""
+Recolección de archivos de UPLOAD_DIR (tarea gc_uploads).
+
+1. Purga: los documentos en la papelera con más de DOCUMENT_PURGE_AFTER_MINUTES
+   se borran de la BD, con sus versiones anteriores, y después sus archivos (si
+   el proceso cae entre medias, los archivos quedan huérfanos y los recoge el
+   paso 2; los de ARCHIVE_DIR no).
+2. Huérfanos: se recorre UPLOAD_DIR con sus carpetas y se borra todo archivo
+   que no pertenezca a ningún documento (ni vivo ni en la papelera) ni a una
+   versión anterior, p.ej. los
+   de un cliente eliminado o un .part de una subida interrumpida. Solo cuenta lo que tiene más
+   de GC_ORPHAN_MIN_AGE_MINUTES: una subida escribe el archivo antes de su fila.
+3. Lo mismo en ARCHIVE_DIR contra las versiones anteriores: al eliminar un
+   cliente la BD borra en cascada sus filas de document_versions, pero no los
+   archivos ya archivados.
+
+Ambos pasos trabajan en lotes de GC_BATCH_SIZE para no cargar toda la tabla.
+"""
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.metrics import REGISTRY
+from app.models.document import Document
+from app.models.document_version import DocumentVersion
+from app.services.document_versions import version_file_paths
+from app.services.storage import DERIVED_SUFFIXES, ORIGINAL_SUFFIX, document_file_paths, iter_upload_files
+
+logger = logging.getLogger(__name__)
+
+gc_files = REGISTRY.counter("storage_gc_files_deleted_total", "Archivos borrados por el GC de subidas", ("reason",))
+gc_bytes = REGISTRY.counter("storage_gc_reclaimed_bytes_total", "Bytes liberados por el GC de subidas", ("reason",))
+
+# Sufijos de los archivos de una versión en ARCHIVE_DIR (ver document_versions.archive_path)
+ARCHIVE_SUFFIXES = (".gz", ORIGINAL_SUFFIX)
+
+def _remove(path: str) -> int | None:
+    """Borrar un archivo; devuelve su tamaño o None si ya no existía"""
+    try:
+        size = os.stat(path).st_size
+        os.remove(path)
+    except FileNotFoundError:
+        return None
+    return size
+
+def _candidate_names(filename: str, suffixes: tuple[str, ...] = DERIVED_SUFFIXES) -> list[str]:
+    # "<stored_name>.preview.webp" pertenece a <stored_name>; se prueba también el
+    # nombre completo porque el archivo subido puede terminar igual que un sufijo
+    names = [filename]
+    for suffix in suffixes:
+        if filename.endswith(suffix):
+            names.append(filename[: -len(suffix)])
+    return names
+
+def purge_deleted(db: Session, older_than: timedelta, batch_size: int) -> dict:
+    """Borrar definitivamente los documentos en la papelera desde antes de older_than"""
+    cutoff = datetime.utcnow() - older_than
+    documents = files = reclaimed = 0
+    while True:
+        rows = db.execute(
+            select(Document.id, Document.stored_name)
+            .where(Document.deleted_at.is_not(None), Document.deleted_at < cutoff)
+            .order_by(Document.id)
+            .limit(batch_size)
+            .execution_options(include_deleted=True)
+        ).all()
+        if not rows:
+            break
+        ids = [row.id for row in rows]
+        versions = db.execute(
+            select(DocumentVersion.stored_name, DocumentVersion.storage_tier, DocumentVersion.compression)
+            .where(DocumentVersion.document_id.in_(ids))
+        ).all()
+        # Explícito aunque la FK tenga ON DELETE CASCADE (SQLite no la aplica sin PRAGMA)
+        db.execute(delete(DocumentVersion).where(DocumentVersion.document_id.in_(ids)))
+        db.execute(
+            delete(Document)
+            .where(Document.id.in_(ids))
+            .execution_options(include_deleted=True, synchronize_session=False)
+        )
+        db.commit()
+        documents += len(rows)
+        paths = [path for row in rows for path in document_file_paths(row.stored_name)]
+        for v in versions:
+            paths += version_file_paths(v.stored_name, v.storage_tier, v.compression)
+        for path in paths:
+            size = _remove(path)
+            if size is not None:
+                files += 1
+                reclaimed += size
+    gc_files.inc(files, reason="purged")
+    gc_bytes.inc(reclaimed, reason="purged")
+    return {"documents": documents, "files": files, "bytes": reclaimed}
+
+def _orphans_in_batch(db: Session, batch: list[os.DirEntry], archive: bool = False) -> list[os.DirEntry]:
+    suffixes = ARCHIVE_SUFFIXES if archive else DERIVED_SUFFIXES
+    names = {name for entry in batch for name in _candidate_names(entry.name, suffixes)}
+    # En ARCHIVE_DIR solo hay versiones anteriores
+    known = set() if archive else set(db.scalars(
+        select(Document.stored_name)
+        .where(Document.stored_name.in_(names))
+        .execution_options(include_deleted=True)
+    ))
+    known.update(db.scalars(select(DocumentVersion.stored_name).where(DocumentVersion.stored_name.in_(names))))
+    return [entry for entry in batch if not known.intersection(_candidate_names(entry.name, suffixes))]
+
+def remove_orphans(db: Session, min_age: timedelta, batch_size: int, archive: bool = False) -> dict:
+    """Borrar los archivos de UPLOAD_DIR (o ARCHIVE_DIR) que no pertenecen a
+    ningún documento ni versión anterior"""
+    root = settings.ARCHIVE_DIR if archive else settings.UPLOAD_DIR
+    if not os.path.isdir(root):
+        return {"scanned": 0, "files": 0, "bytes": 0}
+    threshold = time.time() - min_age.total_seconds()
+    scanned = files = reclaimed = 0
+
+    def _collect(batch):
+        nonlocal files, reclaimed
+        for entry in _orphans_in_batch(db, batch, archive):
+            size = _remove(entry.path)
+            if size is not None:
+                files += 1
+                reclaimed += size
+
+    batch = []
+    for entry in iter_upload_files(root):
+        scanned += 1
+        if entry.stat(follow_symlinks=False).st_mtime > threshold:
+            continue
+        batch.append(entry)
+        if len(batch) >= batch_size:
+            _collect(batch)
+            batch = []
+    if batch:
+        _collect(batch)
+
+    reason = "archive_orphan" if archive else "orphan"
+    gc_files.inc(files, reason=reason)
+    gc_bytes.inc(reclaimed, reason=reason)
+    return {"scanned": scanned, "files": files, "bytes": reclaimed}
+
+def collect_garbage(db: Session) -> dict:
+    """Purga de la papelera + huérfanos (UPLOAD_DIR y ARCHIVE_DIR); devuelve lo borrado y el espacio liberado"""
+    started = time.perf_counter()
+    batch_size = max(1, settings.GC_BATCH_SIZE)
+    purged = purge_deleted(db, timedelta(minutes=settings.DOCUMENT_PURGE_AFTER_MINUTES), batch_size)
+    min_age = timedelta(minutes=settings.GC_ORPHAN_MIN_AGE_MINUTES)
+    orphans = remove_orphans(db, min_age, batch_size)
+    archive_orphans = remove_orphans(db, min_age, batch_size, archive=True)
+    reclaimed = purged["bytes"] + orphans["bytes"] + archive_orphans["bytes"]
+    report = {
+        "purged_documents": purged["documents"],
+        "purged_files": purged["files"],
+        "scanned_files": orphans["scanned"],
+        "orphan_files": orphans["files"],
+        "archive_scanned_files": archive_orphans["scanned"],
+        "archive_orphan_files": archive_orphans["files"],
+        "reclaimed_bytes": reclaimed,
+        "reclaimed_mb": round(reclaimed / (1024 * 1024), 2),
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
+    logger.info("GC de subidas: %s", report)
+    return report
@@ -0,0 +1,164 @@
+"""
+Cuotas de almacenamiento por usuario.
+
+El uso se guarda en users.storage_used_bytes y se actualiza en la misma
+transacción que el documento (subida, reemplazo, borrado) con un UPDATE
+relativo, así que comprobar la cuota es leer una fila y no sumar size_bytes.
+La reconciliación periódica (reconcile_client_counters) corrige cualquier
+deriva.
+
+Las versiones anteriores (document_versions) también cuentan: size_bytes
+mientras su archivo está en UPLOAD_DIR y stored_size (lo que ocupa comprimido)
+una vez archivada. Reemplazar no libera nada; mandar un documento a la
+papelera libera el documento y todas sus versiones.
+
+La cuota es users.storage_quota_bytes si el admin la fijó; si no,
+STORAGE_QUOTA_MB por persona de la solicitud del cliente (family_members_count):
+una solicitud familiar sube los documentos de todos. STORAGE_QUOTA_MB=0 desactiva
+el límite por defecto.
+"""
+from dataclasses import dataclass
+from sqlalchemy import case, func, select, update
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.client import Client
+from app.models.document import Document
+from app.models.document_version import DocumentVersion
+from app.models.user import User
+
+MB = 1024 * 1024
+
+# Documentos cuyo archivo ya se borró (tasks.scan_document): no ocupan cuota
+UNCHARGED_STATUSES = {"infected"}
+
+def charged_bytes(status: str, size_bytes: int) -> int:
+    """Bytes que un documento descuenta de la cuota según su estado"""
+    return 0 if status in UNCHARGED_STATUSES else size_bytes
+
+def _version_size():
+    # Lo que ocupa cada versión en disco según dónde esté su archivo
+    return case(
+        (DocumentVersion.storage_tier == "archive", func.coalesce(DocumentVersion.stored_size, DocumentVersion.size_bytes)),
+        else_=DocumentVersion.size_bytes,
+    )
+
+def history_bytes(db: Session, document_id: int) -> int:
+    """Bytes que descuentan de la cuota las versiones anteriores de un documento"""
+    return db.scalar(
+        select(func.coalesce(func.sum(_version_size()), 0))
+        .where(DocumentVersion.document_id == document_id, DocumentVersion.status.not_in(UNCHARGED_STATUSES))
+    )
+
+@dataclass
+class StorageUsage:
+    used_bytes: int
+    quota_bytes: int | None  # None = sin límite
+
+    @property
+    def remaining_bytes(self) -> int | None:
+        if self.quota_bytes is None:
+            return None
+        return max(0, self.quota_bytes - self.used_bytes)
+
+    @property
+    def used_percent(self) -> float | None:
+        if not self.quota_bytes:
+            return None
+        return round(self.used_bytes / self.quota_bytes * 100, 1)
+
+def effective_quota(override: int | None, family_members: int | None) -> int | None:
+    if override is not None:
+        return override
+    if settings.STORAGE_QUOTA_MB <= 0:
+        return None
+    return settings.STORAGE_QUOTA_MB * MB * max(1, family_members or 1)
+
+def _usage_query():
+    return (
+        select(User.id, User.email, User.storage_used_bytes, User.storage_quota_bytes, Client.family_members_count,
+               Client.first_name, Client.last_name)
+        .outerjoin(Client, Client.user_id == User.id)
+    )
+
+def get_usage(db: Session, user_id: int) -> StorageUsage:
+    row = db.execute(_usage_query().where(User.id == user_id)).first()
+    if row is None:
+        return StorageUsage(used_bytes=0, quota_bytes=effective_quota(None, None))
+    return StorageUsage(used_bytes=row.storage_used_bytes, quota_bytes=effective_quota(row.storage_quota_bytes, row.family_members_count))
+
+def reserve(db: Session, user_id: int, size: int, quota: int | None) -> bool:
+    """Sumar size al uso si cabe en la cuota (atómico: dos subidas a la vez no la
+    pasan). Sin commit: va en la transacción del documento."""
+    stmt = update(User).where(User.id == user_id)
+    if quota is not None and size > 0:
+        stmt = stmt.where(User.storage_used_bytes + size <= quota)
+    result = db.execute(
+        stmt.values(storage_used_bytes=User.storage_used_bytes + size).execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
+
+def release(db: Session, user_id: int, size: int):
+    """Restar size del uso (documento borrado o versión archivada). Sin commit"""
+    if size <= 0:
+        return
+    db.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(storage_used_bytes=case((User.storage_used_bytes > size, User.storage_used_bytes - size), else_=0))
+        .execution_options(synchronize_session=False)
+    )
+
+def recompute_storage_usage(db: Session, user_ids: list[int] | None = None, commit: bool = True) -> int:
+    """Recalcular storage_used_bytes desde los documentos vivos y sus versiones (reconciliación)"""
+    used_sq = (
+        select(func.coalesce(func.sum(Document.size_bytes), 0))
+        .where(Document.user_id == User.id, Document.status.not_in(UNCHARGED_STATUSES))
+        .scalar_subquery()
+    )
+    history_sq = (
+        select(func.coalesce(func.sum(_version_size()), 0))
+        .join(Document, Document.id == DocumentVersion.document_id)
+        .where(Document.user_id == User.id, Document.deleted_at.is_(None),
+               DocumentVersion.status.not_in(UNCHARGED_STATUSES))
+        .scalar_subquery()
+    )
+    stmt = update(User).values(storage_used_bytes=used_sq + history_sq)
+    if user_ids is not None:
+        if not user_ids:
+            return 0
+        stmt = stmt.where(User.id.in_(user_ids))
+    result = db.execute(stmt.execution_options(synchronize_session=False))
+    if commit:
+        db.commit()
+    return result.rowcount
+
+def set_quota(db: Session, user_id: int, quota_bytes: int | None) -> bool:
+    result = db.execute(
+        update(User).where(User.id == user_id).values(storage_quota_bytes=quota_bytes)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount == 1
+
+def top_consumers(db: Session, limit: int = 20) -> list[dict]:
+    """Usuarios con más espacio usado, leído de los contadores (índice en storage_used_bytes)"""
+    rows = db.execute(
+        _usage_query()
+        .where(User.storage_used_bytes > 0)
+        .order_by(User.storage_used_bytes.desc())
+        .limit(limit)
+    ).all()
+    result = []
+    for row in rows:
+        usage = StorageUsage(row.storage_used_bytes, effective_quota(row.storage_quota_bytes, row.family_members_count))
+        name = " ".join(p for p in (row.first_name, row.last_name) if p) or None
+        result.append({
+            "user_id": row.id,
+            "email": row.email,
+            "client_name": name,
+            "used_bytes": usage.used_bytes,
+            "quota_bytes": usage.quota_bytes,
+            "used_percent": usage.used_percent,
+            "custom_quota": row.storage_quota_bytes is not None,
+        })
+    return result
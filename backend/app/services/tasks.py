@@ -0,0 +1,226 @@
+"""
+Handlers de trabajos en segundo plano.
+
+Importar este módulo registra los handlers en la cola (ver app.services.job_queue).
+"""
+import csv
+import os
+import time
+import zipfile
+from datetime import datetime, timedelta
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.metrics import REGISTRY
+from app.models.client import Client
+from app.models.document import Document
+from app.models.user import User
+from app.services.activity_logger import log_activity
+from app.services.client_counters import recompute_client_counters
+from app.services.client_import import import_clients as run_client_import
+from app.services.document_versions import archive_versions
+from app.services.job_queue import enqueue, job_handler
+from app.services.previews import generate_preview as render_preview
+from app.services.scanner import BLOCKED_STATUSES, get_scanner
+from app.services.storage import document_path, ensure_parent, preview_path, delete_document_files
+from app.services.storage_gc import collect_garbage
+from app.services.storage_quota import recompute_storage_usage, release as release_storage
+
+scan_latency = REGISTRY.histogram(
+    "document_scan_seconds", "Duración del escaneo antivirus por documento", ("scanner", "result")
+)
+
+DASHBOARD_HEADERS = [
+    "ID", "Nombres", "Apellidos", "Email", "Teléfono",
+    "Destino", "Visa", "Estado", "Progreso (%)",
+    "Docs Totales", "Docs Pendientes", "Fecha Registro"
+]
+
+def dashboard_rows(db: Session):
+    """Filas del reporte de clientes, leídas en lotes para no cargar toda la tabla"""
+    results = (
+        db.query(Client, User.email)
+        .join(User, Client.user_id == User.id)
+        .order_by(Client.id)
+        .yield_per(500)
+    )
+    for client, email in results:
+        yield [
+            client.id,
+            client.first_name or "",
+            client.last_name or "",
+            email,
+            client.phone or "",
+            client.destination_country or "",
+            client.visa_type or "",
+            client.status,
+            client.progress,
+            client.total_documents,
+            client.pending_documents,
+            client.created_at.strftime("%Y-%m-%d %H:%M")
+        ]
+
+def _export_path(filename: str) -> str:
+    os.makedirs(settings.EXPORT_DIR, exist_ok=True)
+    return os.path.join(settings.EXPORT_DIR, filename)
+
+@job_handler("reconcile_client_counters")
+def reconcile_client_counters(db: Session, payload: dict) -> dict:
+    updated = recompute_client_counters(db, payload.get("user_ids"))
+    # El uso de almacenamiento también es un contador: se corrige en la misma pasada
+    users = recompute_storage_usage(db, payload.get("user_ids"))
+    return {"clients_updated": updated, "users_storage_updated": users}
+
+@job_handler("export_dashboard_csv")
+def export_dashboard_csv(db: Session, payload: dict) -> dict:
+    filename = payload.get("filename") or "reporte_clientes.csv"
+    path = _export_path(f"job{payload['job_id']}_{filename}")
+    rows = 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(DASHBOARD_HEADERS)
+        for row in dashboard_rows(db):
+            writer.writerow(row)
+            rows += 1
+    return {"path": path, "filename": filename, "media_type": "text/csv", "rows": rows}
+
+@job_handler("dossier_zip")
+def dossier_zip(db: Session, payload: dict) -> dict:
+    """Empaquetar los documentos de un cliente en un ZIP.
+
+    Los que están en cuarentena o bloqueados por el antivirus no se incluyen
+    (igual que en las descargas del admin); sus ids van en blocked_document_ids.
+    """
+    user_id = payload["user_id"]
+    docs = db.query(Document).filter(Document.user_id == user_id).order_by(Document.id).all()
+    filename = f"expediente_{user_id}.zip"
+    path = _export_path(f"job{payload['job_id']}_{filename}")
+
+    used_names: set[str] = set()
+    missing, blocked = [], []
+    # PDF/JPG/PNG ya vienen comprimidos: ZIP_STORED evita gastar CPU sin ganar espacio
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_STORED) as zf:
+        for doc in docs:
+            if doc.status in BLOCKED_STATUSES:
+                blocked.append(doc.id)
+                continue
+            src = document_path(doc.stored_name)
+            if not os.path.exists(src):
+                missing.append(doc.id)
+                continue
+            folder = doc.category if not doc.family_member_name else f"{doc.family_member_name}/{doc.category}"
+            arcname = f"{folder}/{doc.original_name}"
+            n = 1
+            while arcname in used_names:
+                n += 1
+                base, ext = os.path.splitext(doc.original_name)
+                arcname = f"{folder}/{base} ({n}){ext}"
+            used_names.add(arcname)
+            zf.write(src, arcname)
+
+    return {
+        "path": path,
+        "filename": filename,
+        "media_type": "application/zip",
+        "documents": len(used_names),
+        "missing_document_ids": missing,
+        "blocked_document_ids": blocked,
+    }
+
+@job_handler("delete_files")
+def delete_files(db: Session, payload: dict) -> dict:
+    names = payload.get("stored_names", [])
+    for name in names:
+        delete_document_files(name)
+    return {"deleted": len(names)}
+
+@job_handler("gc_uploads")
+def gc_uploads(db: Session, payload: dict) -> dict:
+    """Purgar la papelera de documentos y borrar los archivos huérfanos de UPLOAD_DIR"""
+    return collect_garbage(db)
+
+@job_handler("archive_document_versions")
+def archive_document_versions(db: Session, payload: dict) -> dict:
+    """Mover a ARCHIVE_DIR los archivos de las versiones anteriores con más de VERSION_ARCHIVE_AFTER_DAYS"""
+    days = payload.get("older_than_days", settings.VERSION_ARCHIVE_AFTER_DAYS)
+    return archive_versions(db, timedelta(days=days), max(1, settings.GC_BATCH_SIZE))
+
+@job_handler("generate_preview")
+def generate_preview(db: Session, payload: dict) -> dict:
+    doc = db.query(Document).filter(Document.id == payload["document_id"]).first()
+    if not doc:
+        return {"skipped": "documento eliminado"}
+    dest = ensure_parent(preview_path(doc.stored_name))
+    if not render_preview(document_path(doc.stored_name), doc.mime_type, dest):
+        return {"skipped": f"tipo sin vista previa: {doc.mime_type}"}
+    doc.has_preview = True
+    db.commit()
+    return {"document_id": doc.id, "preview_bytes": os.path.getsize(dest)}
+
+@job_handler("scan_document")
+def scan_document(db: Session, payload: dict) -> dict:
+    """Escanear un documento en cuarentena y liberarlo (o marcarlo infectado)"""
+    doc = db.query(Document).filter(Document.id == payload["document_id"]).first()
+    if not doc or doc.status != "quarantined":
+        return {"skipped": "documento eliminado o ya escaneado"}
+
+    scanner = get_scanner()
+    started = time.perf_counter()
+    # ScannerError se propaga: el trabajo se reintenta y el documento sigue en cuarentena
+    result = scanner.scan(document_path(doc.stored_name))
+    elapsed = time.perf_counter() - started
+    scan_latency.observe(elapsed, scanner=scanner.name, result="clean" if result.clean else "infected")
+
+    doc.scanned_at = datetime.utcnow()
+    if result.clean:
+        doc.status = "pending"
+        doc.scan_result = "clean"
+        # La miniatura solo se genera sobre archivos ya verificados
+        enqueue(db, "generate_preview", {"document_id": doc.id}, priority=10, commit=False)
+        db.commit()
+    else:
+        doc.status = "infected"
+        doc.scan_result = (result.signature or "desconocido")[:200]
+        # El archivo se borra: deja de contar en la cuota (charged_bytes lo ignora desde ahora)
+        release_storage(db, doc.user_id, doc.size_bytes)
+        db.commit()
+        delete_document_files(doc.stored_name)
+        log_activity(
+            db=db,
+            activity_type="document_infected",
+            title="Documento infectado bloqueado",
+            description=f"{doc.category}: {doc.scan_result}",
+            user_id=doc.user_id,
+        )
+    return {"document_id": doc.id, "clean": result.clean, "signature": result.signature, "scan_ms": round(elapsed * 1000, 1)}
+
+@job_handler("import_clients")
+def import_clients(db: Session, payload: dict) -> dict:
+    """Importar clientes desde el CSV subido; el resultado descargable son los errores por fila"""
+    source = payload["path"]
+    # El CSV lleva contraseñas en claro: se borra también si la importación
+    # falla (el trabajo no se reintenta, max_attempts=1)
+    try:
+        with open(source, newline="", encoding="utf-8-sig") as f:
+            report = run_client_import(db, f)
+    finally:
+        if os.path.exists(source):
+            os.remove(source)
+
+    errors_name = "errores_importacion.csv"
+    errors_path = _export_path(f"job{payload['job_id']}_{errors_name}")
+    report.write_errors(errors_path)
+
+    log_activity(
+        db=db,
+        activity_type="clients_imported",
+        title="Importación de clientes",
+        description=f"{report.created} de {report.total} clientes importados desde {payload.get('filename') or 'CSV'}",
+        performed_by_id=payload.get("performed_by_id"),
+        performed_by_email=payload.get("performed_by_email")
+    )
+    return {
+        **report.summary(),
+        "path": errors_path,
+        "filename": errors_name,
+        "media_type": "text/csv",
+    }
@@ -0,0 +1,165 @@
+"""
+Validación en streaming de archivos subidos.
+
+El tipo real se detecta por la firma (magic bytes) del primer bloque, no por el
+Content-Type que envía el cliente, y el resto de comprobaciones (tamaño,
+archivo truncado, número de páginas del PDF) se hacen mientras se copia el
+archivo a disco, en una sola pasada (también el sha256 que se guarda en el
+documento para las comprobaciones de consistencia).
+"""
+import hashlib
+import os
+import re
+import time
+from app.core.tracing import span
+
+CHUNK_SIZE = 1024 * 1024  # 1 MB
+
+SIGNATURES = (
+    (b"%PDF-", "application/pdf"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+)
+
+# Objetos de página ("/Type /Page", no "/Type /Pages") y contadores del árbol de páginas
+_PDF_PAGE_RE = re.compile(rb"/Type\s*/Page(?![a-zA-Z])")
+_PDF_COUNT_RE = re.compile(rb"/Count\s+(\d+)")
+# Margen entre bloques para no perder coincidencias partidas en el borde
+_OVERLAP = 64
+_TAIL_SIZE = 1024
+
+class UploadRejected(Exception):
+    """Archivo rechazado; lleva el status HTTP y el mensaje para el cliente"""
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+def sniff_mime(head: bytes) -> str | None:
+    for signature, mime in SIGNATURES:
+        if head.startswith(signature):
+            return mime
+    return None
+
+class StreamValidator:
+    """Valida un archivo bloque a bloque: feed() por cada bloque y finish() al final"""
+
+    def __init__(self, *, max_size: int, max_pdf_pages: int, allowed: set[str] | None = None,
+                 max_size_detail: str | None = None):
+        self.max_size = max_size
+        # Mensaje del 413 cuando el límite no es el de tamaño de archivo (p.ej. la cuota)
+        self.max_size_detail = max_size_detail
+        self.max_pdf_pages = max_pdf_pages
+        self.allowed = allowed
+        self.mime_type: str | None = None
+        self.size = 0
+        self.pdf_pages = 0
+        self._pdf_count = 0
+        self._carry = b""
+        self._tail = b""
+        self._hash = hashlib.sha256()
+
+    def feed(self, chunk: bytes):
+        # Un bloque vacío no tiene firma que mirar: el archivo vacío lo rechaza finish() con 422
+        if not chunk:
+            return
+        if self.mime_type is None:
+            self.mime_type = sniff_mime(chunk)
+            if self.mime_type is None or (self.allowed is not None and self.mime_type not in self.allowed):
+                raise UploadRejected(415, "Tipo de archivo no permitido (PDF, JPG o PNG)")
+
+        self.size += len(chunk)
+        if self.size > self.max_size:
+            raise UploadRejected(413, self.max_size_detail or f"Archivo demasiado grande (máx {self.max_size // (1024 * 1024)}MB)")
+
+        if self.mime_type == "application/pdf":
+            self._scan_pdf(chunk)
+        self._tail = (self._tail + chunk)[-_TAIL_SIZE:]
+        self._hash.update(chunk)
+
+    @property
+    def sha256(self) -> str:
+        """Hex del sha256 de los bytes recibidos hasta ahora"""
+        return self._hash.hexdigest()
+
+    def _scan_pdf(self, chunk: bytes):
+        window = self._carry + chunk
+        # Solo se cuentan coincidencias que terminan fuera del solapamiento ya revisado
+        skip = len(self._carry)
+        self.pdf_pages += sum(1 for m in _PDF_PAGE_RE.finditer(window) if m.end() > skip)
+        for m in _PDF_COUNT_RE.finditer(window):
+            if m.end() > skip:
+                self._pdf_count = max(self._pdf_count, int(m.group(1)))
+        self._carry = window[-_OVERLAP:]
+        if self.page_count > self.max_pdf_pages:
+            raise UploadRejected(422, f"El PDF tiene demasiadas páginas (máx {self.max_pdf_pages})")
+
+    @property
+    def page_count(self) -> int:
+        # En PDFs con object streams las páginas van comprimidas y no se ven;
+        # ahí el /Count del árbol de páginas es la mejor estimación
+        return self.pdf_pages or self._pdf_count
+
+    def finish(self) -> str:
+        """Comprobar que el archivo está completo; devuelve el mime detectado"""
+        if self.size == 0 or self.mime_type is None:
+            raise UploadRejected(422, "Archivo vacío")
+        tail = self._tail
+        complete = {
+            "application/pdf": b"%%EOF" in tail,
+            "image/jpeg": b"\xff\xd9" in tail,
+            "image/png": b"IEND\xaeB`\x82" in tail[-32:],
+        }[self.mime_type]
+        if not complete:
+            raise UploadRejected(422, "Archivo dañado o incompleto")
+        return self.mime_type
+
+def stream_to_disk(src, dest: str, validator: StreamValidator, chunk_size: int = CHUNK_SIZE) -> str:
+    """Copiar src (archivo binario) a dest validando en la misma pasada.
+
+    El primer bloque se valida antes de crear el archivo de destino; se escribe
+    en dest + ".part" y solo se renombra a dest si todo es válido. El span
+    "storage.stream_to_disk" separa el tiempo de lectura del spool, de
+    validación y de escritura (las tres se intercalan bloque a bloque).
+    """
+    read_s = validate_s = write_s = 0.0
+    with span("storage.stream_to_disk", **{"file.path": dest}) as s:
+        t0 = time.perf_counter()
+        first = src.read(chunk_size)
+        t1 = time.perf_counter()
+        validator.feed(first)
+        if not first:
+            validator.finish()  # archivo vacío: 422, sin crear nada en disco
+        read_s += t1 - t0
+        validate_s += time.perf_counter() - t1
+
+        part = dest + ".part"
+        try:
+            with open(part, "wb") as out:
+                t0 = time.perf_counter()
+                out.write(first)
+                write_s += time.perf_counter() - t0
+                while True:
+                    t0 = time.perf_counter()
+                    chunk = src.read(chunk_size)
+                    t1 = time.perf_counter()
+                    read_s += t1 - t0
+                    if not chunk:
+                        break
+                    validator.feed(chunk)
+                    t2 = time.perf_counter()
+                    out.write(chunk)
+                    validate_s += t2 - t1
+                    write_s += time.perf_counter() - t2
+            mime_type = validator.finish()
+            os.replace(part, dest)
+        except BaseException:
+            if os.path.exists(part):
+                os.remove(part)
+            raise
+        finally:
+            s.set("file.size", validator.size)
+            s.set("storage.read_ms", round(read_s * 1000, 3))
+            s.set("storage.validate_ms", round(validate_s * 1000, 3))
+            s.set("storage.write_ms", round(write_s * 1000, 3))
+    return mime_type
@@ -0,0 +1,157 @@
+"""
+Worker de la cola de trabajos.
+
+Se ejecuta como proceso aparte junto a uvicorn:
+    python -m app.worker --concurrency 2
+"""
+import argparse
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from app.core.config import settings
+from app.core.metrics import REGISTRY
+from app.core.db import SessionLocal
+from app.core.tracing import setup_tracing, shutdown_tracing
+from app.services import heartbeats, job_queue
+from app.services import tasks  # noqa: F401  (registra los handlers)
+
+logger = logging.getLogger("app.worker")
+
+def _worker_loop(worker_id: str, stop: threading.Event, poll_interval: float):
+    while not stop.is_set():
+        db = SessionLocal()
+        try:
+            job = job_queue.claim_next(db, worker_id)
+            if job is None:
+                stop.wait(poll_interval)
+                continue
+            started = time.perf_counter()
+            job = job_queue.run_job(db, job)
+            logger.info(
+                "%s: trabajo %s (%s) -> %s en %.0f ms",
+                worker_id, job.id, job.kind, job.status, (time.perf_counter() - started) * 1000,
+            )
+        except Exception:
+            logger.exception("%s: error inesperado en el loop del worker", worker_id)
+            stop.wait(poll_interval)
+        finally:
+            db.close()
+
+# Trabajos periódicos: (tipo, minutos entre ejecuciones; 0 = desactivado)
+PERIODIC_JOBS = (
+    ("reconcile_client_counters", settings.JOB_RECONCILE_INTERVAL_MINUTES),
+    ("gc_uploads", settings.GC_INTERVAL_MINUTES),
+    ("archive_document_versions", settings.VERSION_ARCHIVE_INTERVAL_MINUTES),
+)
+
+def _schedule_periodic(kind: str, minutes: int, stop: threading.Event):
+    """Encola `kind` cada `minutes` minutos si no hay ya uno pendiente"""
+    interval = minutes * 60
+    if interval <= 0:
+        return
+    while not stop.is_set():
+        db = SessionLocal()
+        try:
+            if not job_queue.has_pending(db, kind):
+                job_queue.enqueue(db, kind, priority=-10)
+        except Exception:
+            logger.exception("No se pudo encolar el trabajo periódico %s", kind)
+        finally:
+            db.close()
+        stop.wait(interval)
+
+def _heartbeat_loop(worker_id: str, concurrency: int, stop: threading.Event):
+    """Actualizar el latido del worker (lo consultan /readyz y el diagnóstico de admin)"""
+    while True:
+        db = SessionLocal()
+        try:
+            if stop.is_set():
+                heartbeats.remove(db, worker_id)
+                return
+            heartbeats.beat(db, worker_id, concurrency)
+        except Exception:
+            logger.exception("No se pudo registrar el latido del worker")
+        finally:
+            db.close()
+        stop.wait(settings.WORKER_HEARTBEAT_SECONDS)
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = REGISTRY.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def _serve_metrics(port: int):
+    """Exponer las métricas del worker (p.ej. latencia de escaneo) para Prometheus"""
+    server = ThreadingHTTPServer(("0.0.0.0", port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    logger.info("Métricas del worker en http://0.0.0.0:%s/metrics", port)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Worker de trabajos en segundo plano")
+    parser.add_argument("--concurrency", type=int, default=1, help="Hilos procesando trabajos")
+    parser.add_argument("--poll-interval", type=float, default=settings.JOB_POLL_INTERVAL)
+    parser.add_argument("--once", action="store_true", help="Vaciar la cola y salir")
+    parser.add_argument("--no-schedule", action="store_true", help="No encolar trabajos periódicos")
+    parser.add_argument("--metrics-port", type=int, default=0, help="Puerto para exponer métricas (0 = desactivado)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=settings.LOG_LEVEL, format="%(asctime)s %(levelname)s %(name)s %(message)s")
+    setup_tracing(f"{settings.TRACING_SERVICE_NAME}-worker")
+    base_id = f"{socket.gethostname()}:{os.getpid()}"
+
+    if args.once:
+        db = SessionLocal()
+        try:
+            processed = job_queue.run_pending(db, base_id, limit=10_000)
+        finally:
+            db.close()
+        logger.info("Procesados %s trabajos", processed)
+        shutdown_tracing()
+        return
+
+    if args.metrics_port:
+        _serve_metrics(args.metrics_port)
+
+    stop = threading.Event()
+
+    def _handle_signal(signum, frame):
+        logger.info("Señal %s recibida, terminando trabajos en curso...", signum)
+        stop.set()
+
+    signal.signal(signal.SIGTERM, _handle_signal)
+    signal.signal(signal.SIGINT, _handle_signal)
+
+    threads = [
+        threading.Thread(target=_worker_loop, args=(f"{base_id}-{i}", stop, args.poll_interval), daemon=True)
+        for i in range(max(1, args.concurrency))
+    ]
+    if not args.no_schedule:
+        threads.extend(
+            threading.Thread(target=_schedule_periodic, args=(kind, minutes, stop), daemon=True)
+            for kind, minutes in PERIODIC_JOBS
+        )
+    threads.append(threading.Thread(target=_heartbeat_loop, args=(base_id, args.concurrency, stop), daemon=True))
+
+    logger.info("Worker %s iniciado (%s hilos), tipos: %s", base_id, args.concurrency, job_queue.registered_kinds())
+    for t in threads:
+        t.start()
+    while not stop.is_set():
+        stop.wait(1)
+    for t in threads:
+        t.join()
+    shutdown_tracing()
+    logger.info("Worker %s detenido", base_id)
+
+if __name__ == "__main__":
+    main()
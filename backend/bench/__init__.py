@@ -0,0 +1,11 @@
+"""
+Benchmarks de la API.
+
+- seed.py: siembra un conjunto de datos realista y reproducible (semilla fija).
+- client.py: cliente HTTP mínimo (stdlib) con conexiones keep-alive por hilo.
+- scenarios.py: escenarios de carga registrados con @scenario("nombre").
+- run.py: levanta la API contra la BD de benchmark, ejecuta los escenarios y
+  guarda throughput, p50/p95/p99 y RSS en JSON, comparando con una línea base.
+
+Ejecutar con: python -m bench.run --scale small
+"""
@@ -0,0 +1,72 @@
+"""
+Cliente HTTP mínimo para los benchmarks (solo stdlib).
+
+Cada hilo usa su propio BenchClient, que mantiene una conexión keep-alive con
+el servidor, igual que un navegador o un balanceador.
+"""
+import http.client
+import json
+import uuid
+from urllib.parse import urlencode, urlsplit
+
+class BenchClient:
+    def __init__(self, base_url: str, timeout: float = 60.0):
+        url = urlsplit(base_url)
+        self.host = url.hostname
+        self.port = url.port or (443 if url.scheme == "https" else 80)
+        self.https = url.scheme == "https"
+        self.prefix = url.path.rstrip("/")
+        self.timeout = timeout
+        self._conn = None
+
+    def _connection(self):
+        if self._conn is None:
+            cls = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+            self._conn = cls(self.host, self.port, timeout=self.timeout)
+        return self._conn
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def request(self, method: str, path: str, *, token: str | None = None, params: dict | None = None,
+                json_body=None, body: bytes | None = None, content_type: str | None = None) -> tuple[int, bytes]:
+        """Hacer una petición y leer la respuesta completa; devuelve (status, cuerpo)"""
+        url = self.prefix + path + (f"?{urlencode(params)}" if params else "")
+        headers = {}
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        if json_body is not None:
+            body = json.dumps(json_body).encode("utf-8")
+            content_type = "application/json"
+        if content_type:
+            headers["Content-Type"] = content_type
+        for attempt in range(2):
+            conn = self._connection()
+            try:
+                conn.request(method, url, body=body, headers=headers)
+                response = conn.getresponse()
+                return response.status, response.read()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                # El servidor cerró la conexión keep-alive: reconectar una vez
+                self.close()
+                if attempt:
+                    raise
+
+    def upload(self, path: str, *, token: str, fields: dict, filename: str, content: bytes,
+               mime_type: str, params: dict | None = None) -> tuple[int, bytes]:
+        """POST multipart/form-data con un archivo"""
+        boundary = uuid.uuid4().hex
+        parts = []
+        for name, value in fields.items():
+            parts.append(
+                f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode("utf-8")
+            )
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+            f"Content-Type: {mime_type}\r\n\r\n".encode("utf-8") + content + b"\r\n"
+        )
+        parts.append(f"--{boundary}--\r\n".encode("utf-8"))
+        return self.request("POST", path, token=token, params=params, body=b"".join(parts),
+                            content_type=f"multipart/form-data; boundary={boundary}")
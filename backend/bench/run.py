@@ -0,0 +1,320 @@
+"""
+Runner de benchmarks.
+
+Sin --url crea (o reutiliza) una BD SQLite sembrada en --workdir, levanta
+uvicorn contra ella en un puerto libre, ejecuta los escenarios y apaga el
+servidor. Con --url mide un servidor ya levantado (p.ej. contra MySQL,
+sembrado antes con python -m bench.seed); en ese caso el RSS solo se mide si
+se indica --server-pid.
+
+Los resultados (throughput, p50/p95/p99 por escenario y por endpoint, RSS del
+servidor) se guardan en JSON y se comparan con la línea base: si el p95 sube o
+el throughput baja más de --tolerance, o aparecen errores, sale con código 1.
+
+Ejemplos:
+    python -m bench.run --scale small --save-baseline
+    python -m bench.run --scale small                  # compara con bench/baseline.json
+    python -m bench.run --url http://localhost:8000 --scenarios admin_dashboard,exports
+"""
+import argparse
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE = os.path.join(BACKEND_DIR, "bench", "baseline.json")
+DEFAULT_RESULTS_DIR = os.path.join(BACKEND_DIR, "bench", "results")
+TOKEN_USERS = 8  # clientes con sesión para los escenarios autenticados
+
+def percentile(values: list[float], p: float) -> float:
+    """Percentil por rango más cercano (p en 0..100)"""
+    if not values:
+        return 0.0
+    values = sorted(values)
+    rank = max(1, int(round(p / 100 * len(values) + 0.5)))
+    return values[min(rank, len(values)) - 1]
+
+def _latency_summary(latencies: list[float]) -> dict:
+    return {
+        "count": len(latencies),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "max_ms": round(max(latencies, default=0) * 1000, 2),
+    }
+
+def read_rss(pid: int | None) -> dict:
+    """RSS actual y pico del proceso (Linux, /proc/<pid>/status) en MB"""
+    if not pid:
+        return {}
+    values = {}
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                key, _, rest = line.partition(":")
+                if key in ("VmRSS", "VmHWM"):
+                    values[key] = round(int(rest.split()[0]) / 1024, 1)
+    except OSError:
+        return {}
+    return {"rss_mb": values.get("VmRSS"), "rss_peak_mb": values.get("VmHWM")}
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+                              capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except Exception:
+        return None
+
+def local_env(workdir: str, scale: str) -> dict:
+    """Variables de entorno para levantar la API contra la BD SQLite de benchmark"""
+    db_path = os.path.join(workdir, f"bench_{scale}.db")
+    return {
+        "DB_URL": f"sqlite:///{db_path}",
+        "UPLOAD_DIR": os.path.join(workdir, f"uploads_{scale}"),
+        "EXPORT_DIR": os.path.join(workdir, f"exports_{scale}"),
+        "SECRET_KEY": os.environ.get("SECRET_KEY", "bench-secret"),
+        "LOG_LEVEL": "ERROR",  # sin los avisos de peticiones lentas (el login siempre lo es)
+        "TRACING_EXPORTER": "none",
+        # login_storm mide bcrypt bajo carga, no el límite de intentos (todo sale de una IP)
+        "RATE_LIMIT_ENABLED": "false",
+        "FORWARDED_ALLOW_IPS": "127.0.0.1",
+        # Sin MySQL no hacen falta, pero Settings los exige
+        "DB_HOST": os.environ.get("DB_HOST", "-"), "DB_USER": os.environ.get("DB_USER", "-"),
+        "DB_PASSWORD": os.environ.get("DB_PASSWORD", "-"), "DB_NAME": os.environ.get("DB_NAME", "-"),
+    }
+
+def prepare_local(workdir: str, scale: str, reseed: bool) -> dict:
+    """Variables de entorno de la BD de benchmark; siembra si hace falta"""
+    db_path = os.path.join(workdir, f"bench_{scale}.db")
+    env = local_env(workdir, scale)
+    os.makedirs(workdir, exist_ok=True)
+    if reseed and os.path.exists(db_path):
+        os.remove(db_path)
+    if not os.path.exists(db_path):
+        print(f"🌱 Sembrando escala '{scale}' en {db_path}...")
+        # La siembra corre en un proceso aparte para que use la BD de benchmark
+        subprocess.run([sys.executable, "-m", "bench.seed", "--scale", scale],
+                       cwd=BACKEND_DIR, env={**os.environ, **env}, check=True)
+    return env
+
+def start_server(env: dict, port: int) -> subprocess.Popen:
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning", "--no-access-log"],
+        cwd=BACKEND_DIR, env={**os.environ, **env},
+    )
+    from bench.client import BenchClient
+    client = BenchClient(f"http://127.0.0.1:{port}")
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("El servidor terminó al arrancar")
+        try:
+            if client.request("GET", "/openapi.json")[0] == 200:
+                client.close()
+                return process
+        except OSError:
+            client.close()
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("El servidor no respondió en 60s")
+
+def _login(client, email: str, password: str) -> str:
+    status, body = client.request("POST", "/api/v1/login", json_body={"email": email, "password": password})
+    if status != 200:
+        raise RuntimeError(f"Login de {email} falló ({status}): {body[:200]!r}")
+    return json.loads(body)["access_token"]
+
+def run_scenario(base_url: str, sc, ctx, requests: int, pid: int | None, warmup: bool = True) -> dict:
+    from bench.client import BenchClient
+    local = threading.local()
+    clients = []
+    lock = threading.Lock()
+
+    def get_client():
+        if not hasattr(local, "client"):
+            local.client = BenchClient(base_url)
+            with lock:
+                clients.append(local.client)
+        return local.client
+
+    def call(i: int):
+        started = time.perf_counter()
+        try:
+            label, status = sc.op(get_client(), i, ctx)
+        except Exception as e:
+            return "error", f"{type(e).__name__}", time.perf_counter() - started
+        return label, status, time.perf_counter() - started
+
+    with ThreadPoolExecutor(max_workers=sc.concurrency) as pool:
+        if warmup:
+            # Una ronda sin medir: conexiones abiertas y cachés calientes
+            list(pool.map(call, range(requests, requests + sc.concurrency)))
+        rss_before = read_rss(pid)
+        started = time.perf_counter()
+        results = list(pool.map(call, range(requests)))
+        elapsed = time.perf_counter() - started
+    for client in clients:
+        client.close()
+
+    by_label = defaultdict(list)
+    statuses = defaultdict(int)
+    errors = 0
+    for label, status, latency in results:
+        by_label[label].append(latency)
+        statuses[str(status)] += 1
+        if not isinstance(status, int) or status >= 400:
+            errors += 1
+    latencies = [latency for _, _, latency in results]
+    return {
+        "description": sc.description,
+        "requests": requests,
+        "concurrency": sc.concurrency,
+        "errors": errors,
+        "statuses": dict(statuses),
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(requests / elapsed, 2) if elapsed else 0.0,
+        **_latency_summary(latencies),
+        "endpoints": {label: _latency_summary(values) for label, values in sorted(by_label.items())},
+        "rss_before_mb": rss_before.get("rss_mb"),
+        **read_rss(pid),
+    }
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Regresiones respecto a la línea base (lista vacía si no hay)"""
+    problems = []
+    for name, current in results["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name)
+        if current["errors"]:
+            problems.append(f"{name}: {current['errors']} peticiones con error {current['statuses']}")
+        if not base:
+            continue
+        if base["p95_ms"] and current["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            problems.append(f"{name}: p95 {current['p95_ms']} ms vs {base['p95_ms']} ms en la línea base")
+        if base["throughput_rps"] and current["throughput_rps"] < base["throughput_rps"] * (1 - tolerance):
+            problems.append(f"{name}: {current['throughput_rps']} req/s vs {base['throughput_rps']} req/s en la línea base")
+        base_peak, peak = base.get("rss_peak_mb"), current.get("rss_peak_mb")
+        if base_peak and peak and peak > base_peak * (1 + tolerance):
+            problems.append(f"{name}: RSS pico {peak} MB vs {base_peak} MB en la línea base")
+    return problems
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks de la API")
+    parser.add_argument("--scale", default="small", help="Escala de datos sembrados (small, medium, large)")
+    parser.add_argument("--scenarios", default="all", help="Lista separada por comas (por defecto, todos)")
+    parser.add_argument("--factor", type=float, default=1.0, help="Multiplicador del número de peticiones")
+    parser.add_argument("--url", help="Medir un servidor ya levantado en lugar de arrancar uno")
+    parser.add_argument("--server-pid", type=int, help="PID del servidor (con --url) para medir su RSS")
+    parser.add_argument("--admin-email", default=None, help="Admin para los escenarios de panel (con --url)")
+    parser.add_argument("--workdir", default=os.path.join(tempfile.gettempdir(), "visas-bench"))
+    parser.add_argument("--reseed", action="store_true", help="Borrar la BD de benchmark y sembrar de nuevo")
+    parser.add_argument("--output", help="Archivo JSON de resultados (por defecto bench/results/<fecha>.json)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="Guardar estos resultados como línea base")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Margen antes de marcar una regresión (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, BACKEND_DIR)
+    process = None
+    if args.url:
+        base_url, pid = args.url, args.server_pid
+    else:
+        env = prepare_local(args.workdir, args.scale, args.reseed)
+        os.environ.update(env)
+        port = _free_port()
+        process = start_server(env, port)
+        base_url, pid = f"http://127.0.0.1:{port}", process.pid
+
+    try:
+        # Importar después de fijar el entorno: seed/scenarios cargan la configuración de la app
+        from bench.client import BenchClient
+        from bench.scenarios import SCENARIOS, BenchContext
+        from bench.seed import ADMIN_EMAIL, BENCH_PASSWORD, SCALES, user_email
+
+        names = list(SCENARIOS) if args.scenarios == "all" else [n.strip() for n in args.scenarios.split(",")]
+        unknown = [n for n in names if n not in SCENARIOS]
+        if unknown:
+            parser.error(f"Escenarios desconocidos: {', '.join(unknown)} (disponibles: {', '.join(SCENARIOS)})")
+
+        setup = BenchClient(base_url)
+        n_clients = SCALES[args.scale][0]
+        ctx = BenchContext(
+            clients=n_clients,
+            admin_token=_login(setup, args.admin_email or ADMIN_EMAIL, BENCH_PASSWORD),
+            user_tokens=[_login(setup, user_email(i), BENCH_PASSWORD) for i in range(min(TOKEN_USERS, n_clients))],
+        )
+        setup.close()
+
+        results = {
+            "meta": {
+                "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "commit": _git_commit(),
+                "scale": args.scale,
+                "factor": args.factor,
+                "url": args.url or "local",
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpus": os.cpu_count(),
+            },
+            "scenarios": {},
+        }
+        for name in names:
+            sc = SCENARIOS[name]
+            requests = max(1, int(sc.requests * args.factor))
+            print(f"▶️  {name}: {requests} peticiones, {sc.concurrency} concurrentes...")
+            r = run_scenario(base_url, sc, ctx, requests, pid)
+            results["scenarios"][name] = r
+            print(f"   {r['throughput_rps']} req/s | p50 {r['p50_ms']} ms | p95 {r['p95_ms']} ms | "
+                  f"p99 {r['p99_ms']} ms | errores {r['errors']} | RSS {r.get('rss_mb')} MB (pico {r.get('rss_peak_mb')})")
+            for label, summary in r["endpoints"].items():
+                if len(r["endpoints"]) > 1:
+                    print(f"      {label:<32} p50 {summary['p50_ms']:>8} ms | p95 {summary['p95_ms']:>8} ms")
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=30)
+
+    output = args.output or os.path.join(DEFAULT_RESULTS_DIR, datetime.now().strftime("%Y%m%d-%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+    print(f"\n📄 Resultados en {output}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"📌 Línea base actualizada: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("ℹ️  Sin línea base; guárdala con --save-baseline")
+        return 0
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline["meta"].get("scale") != args.scale:
+        print(f"⚠️  La línea base es de la escala '{baseline['meta'].get('scale')}'; la comparación no es fiable")
+    problems = compare(results, baseline, args.tolerance)
+    if problems:
+        print(f"❌ Regresiones respecto a {args.baseline} (commit {baseline['meta'].get('commit')}):")
+        for problem in problems:
+            print(f"   - {problem}")
+        return 1
+    print(f"✅ Sin regresiones respecto a la línea base (tolerancia {args.tolerance:.0%})")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+"""
+Escenarios de carga.
+
+Cada escenario se registra con @scenario("nombre", requests=..., concurrency=...)
+y define una operación op(client, i, ctx) -> (etiqueta, status) que el runner
+ejecuta `requests` veces repartidas en `concurrency` hilos. La etiqueta agrupa
+las latencias por endpoint dentro del escenario. Las decisiones aleatorias se
+toman con random.Random(i), así que la secuencia de peticiones es siempre la misma.
+"""
+import random
+from dataclasses import dataclass, field
+from typing import Callable
+from app.core.categories import REQUIRED_CATEGORIES
+from bench.client import BenchClient
+from bench.seed import BENCH_PASSWORD, FIRST_NAMES, LAST_NAMES, SAMPLE_PDF, user_email
+
+API = "/api/v1"
+UPLOAD_SIZE = 256 * 1024
+
+@dataclass
+class BenchContext:
+    clients: int  # clientes sembrados
+    admin_token: str
+    user_tokens: list[str] = field(default_factory=list)
+
+@dataclass
+class Scenario:
+    name: str
+    description: str
+    requests: int
+    concurrency: int
+    op: Callable[[BenchClient, int, BenchContext], tuple[str, int]]
+
+SCENARIOS: dict[str, Scenario] = {}
+
+def scenario(name: str, *, requests: int, concurrency: int):
+    """Decorador para registrar un escenario (la docstring es su descripción)"""
+    def decorator(fn):
+        SCENARIOS[name] = Scenario(name, (fn.__doc__ or "").strip(), requests, concurrency, fn)
+        return fn
+    return decorator
+
+def _padded_pdf(size: int) -> bytes:
+    # Comentario PDF de relleno tras la cabecera: sigue siendo un PDF de 1 página
+    header, rest = SAMPLE_PDF.split(b"\n", 1)
+    return header + b"\n%" + b"0" * max(0, size - len(SAMPLE_PDF) - 2) + b"\n" + rest
+
+UPLOAD_PDF = _padded_pdf(UPLOAD_SIZE)
+
+@scenario("login_storm", requests=40, concurrency=8)
+def login_storm(client: BenchClient, i: int, ctx: BenchContext):
+    """Muchos clientes iniciando sesión a la vez (dominado por bcrypt)"""
+    status, _ = client.request("POST", f"{API}/login", json_body={
+        "email": user_email(i % ctx.clients), "password": BENCH_PASSWORD,
+    })
+    return "POST /login", status
+
+@scenario("uploads", requests=60, concurrency=6)
+def uploads(client: BenchClient, i: int, ctx: BenchContext):
+    """Subidas concurrentes de PDFs de 256 KB (reemplazando el de la categoría)"""
+    token = ctx.user_tokens[i % len(ctx.user_tokens)]
+    status, _ = client.upload(
+        f"{API}/documents", token=token, params={"replace": "true"},
+        fields={"category": REQUIRED_CATEGORIES[i % len(REQUIRED_CATEGORIES)]},
+        filename=f"bench_{i}.pdf", content=UPLOAD_PDF, mime_type="application/pdf",
+    )
+    return "POST /documents", status
+
+def _dashboard_requests(rng: random.Random, ctx: BenchContext) -> list[tuple[str, str, dict]]:
+    page = rng.randrange(max(1, ctx.clients // 50))
+    return [
+        ("GET /admin/clients", f"{API}/admin/clients", {"skip": page * 50, "limit": 50}),
+        ("GET /admin/users/stats", f"{API}/admin/users/stats", {}),
+        ("GET /admin/activities", f"{API}/admin/activities", {"limit": 50}),
+        ("GET /admin/activities/recent", f"{API}/admin/activities/recent", {}),
+        ("GET /admin/review-queue", f"{API}/admin/review-queue", {}),
+        ("GET /forms/admin/all", f"{API}/forms/admin/all", {"skip": page * 50, "limit": 50}),
+        ("GET /admin/search", f"{API}/admin/search", {"q": rng.choice(LAST_NAMES + FIRST_NAMES)}),
+    ]
+
+@scenario("admin_dashboard", requests=280, concurrency=4)
+def admin_dashboard(client: BenchClient, i: int, ctx: BenchContext):
+    """Navegación del panel de admin: listados paginados, estadísticas, actividad, cola y búsqueda"""
+    rng = random.Random(i)
+    requests = _dashboard_requests(rng, ctx)
+    label, path, params = requests[i % len(requests)]
+    status, _ = client.request("GET", path, token=ctx.admin_token, params=params)
+    return label, status
+
+@scenario("exports", requests=10, concurrency=2)
+def exports(client: BenchClient, i: int, ctx: BenchContext):
+    """Descarga del reporte CSV de clientes"""
+    status, _ = client.request("GET", f"{API}/admin/export/dashboard", token=ctx.admin_token)
+    return "GET /admin/export/dashboard", status
@@ -0,0 +1,166 @@
+"""
+Datos de benchmark: usuarios, clientes, formularios, documentos y actividad.
+
+La semilla es fija, así que dos siembras con la misma escala producen los
+mismos datos. Todos los clientes comparten la contraseña BENCH_PASSWORD con
+el coste de bcrypt real (el hash se calcula una sola vez).
+
+Ejecutar con (usa la BD de DB_URL / .env): python -m bench.seed --scale small
+"""
+import argparse
+import os
+import random
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import Session
+from app.core.categories import REQUIRED_CATEGORIES
+from app.core.config import settings
+from app.core.db import Base, SessionLocal, engine
+from app.core.security import hash_password
+from app.models.activity import Activity
+from app.models.client import Client
+from app.models.document import Document
+from app.models.intake_form import IntakeForm
+from app.models.user import User
+from app.services.client_counters import recompute_client_counters
+from app.services.storage_quota import recompute_storage_usage
+import app.models  # noqa: F401  (registra todas las tablas)
+
+BENCH_PASSWORD = "bench1234"
+ADMIN_EMAIL = "bench-admin@bench.example.com"
+SEED = 42
+CHUNK = 2000
+
+# escala -> (clientes, documentos por cliente (máx.), actividades)
+SCALES = {
+    "small": (200, 6, 20_000),
+    "medium": (2_000, 8, 200_000),
+    "large": (10_000, 10, 1_000_000),
+}
+
+FIRST_NAMES = ["María", "José", "Lucía", "Carlos", "Ana", "Luis", "Rosa", "Jorge", "Carmen", "Pedro", "Sofía", "Miguel"]
+LAST_NAMES = ["García", "Rodríguez", "Quispe", "Flores", "Sánchez", "Ramírez", "Torres", "Mendoza", "Castillo", "Vargas"]
+COUNTRIES = ["Estados Unidos", "Canadá", "España", "Reino Unido", "México"]
+VISA_TYPES = ["Turismo", "Estudios", "Trabajo", "Negocios"]
+CLIENT_STATUSES = ["pending", "active", "active", "completed", "inactive"]
+DOC_STATUSES = ["pending", "pending", "approved", "approved", "rejected"]
+ACTIVITY_TYPES = ["document_uploaded", "form_updated", "form_submitted", "document_reviewed", "client_created"]
+
+# PDF mínimo válido (1 página) para los archivos en disco
+SAMPLE_PDF = (
+    b"%PDF-1.4\n1 0 obj<</Type /Catalog /Pages 2 0 R>>endobj\n"
+    b"2 0 obj<</Type /Pages /Kids [3 0 R] /Count 1>>endobj\n"
+    b"3 0 obj<</Type /Page /Parent 2 0 R /MediaBox [0 0 612 792]>>endobj\n"
+    b"trailer<</Root 1 0 R>>\n%%EOF\n"
+)
+
+def user_email(i: int) -> str:
+    return f"bench{i:06d}@bench.example.com"
+
+def _chunks(rows: list, size: int = CHUNK):
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+def is_seeded(db: Session) -> bool:
+    return db.scalar(select(func.count()).select_from(User).where(User.email == ADMIN_EMAIL)) > 0
+
+def seed(db: Session, scale: str = "small", upload_dir: str | None = None) -> dict:
+    """Sembrar la escala indicada; devuelve cuántas filas se crearon de cada tipo"""
+    n_clients, max_docs, n_activities = SCALES[scale]
+    rng = random.Random(SEED)
+    upload_dir = upload_dir or settings.UPLOAD_DIR
+    os.makedirs(upload_dir, exist_ok=True)
+    hashed = hash_password(BENCH_PASSWORD)
+    base_date = datetime(2025, 1, 1)
+
+    users = [{"email": ADMIN_EMAIL, "hashed_password": hashed, "role": "admin", "is_active": True, "created_at": base_date}]
+    users += [
+        {"email": user_email(i), "hashed_password": hashed, "role": "customer", "is_active": True,
+         "created_at": base_date + timedelta(minutes=i)}
+        for i in range(n_clients)
+    ]
+    for chunk in _chunks(users):
+        db.execute(insert(User), chunk)
+    ids = dict(db.execute(select(User.email, User.id).where(User.email.like("%@bench.example.com"))).all())
+    admin_id = ids[ADMIN_EMAIL]
+    customer_ids = [ids[user_email(i)] for i in range(n_clients)]
+
+    clients, forms, documents = [], [], []
+    for i, user_id in enumerate(customer_ids):
+        first, last = rng.choice(FIRST_NAMES), f"{rng.choice(LAST_NAMES)} {rng.choice(LAST_NAMES)}"
+        family = rng.choice([1, 1, 1, 2, 3, 4])
+        clients.append({
+            "user_id": user_id, "first_name": first, "last_name": last, "phone": f"9{rng.randrange(10**8):08d}",
+            "destination_country": rng.choice(COUNTRIES), "visa_type": rng.choice(VISA_TYPES),
+            "application_type": "family" if family > 1 else "individual", "family_members_count": family,
+            "status": rng.choice(CLIENT_STATUSES), "progress": rng.randrange(0, 101, 10),
+            "join_date": base_date + timedelta(minutes=i), "created_at": base_date + timedelta(minutes=i),
+        })
+        # 3 de cada 4 clientes tienen formulario
+        if rng.random() < 0.75:
+            forms.append({
+                "user_id": user_id, "nombres": first, "apellidos": last, "nacionalidad": "Peruana",
+                "pasaporte": f"P{rng.randrange(10**7):07d}", "fecha_nacimiento": f"19{rng.randrange(50, 99)}-0{rng.randrange(1, 9)}-15",
+                "ocupacion": rng.choice(["Ingeniero", "Docente", "Comerciante", "Estudiante"]),
+                "family_members_data": [
+                    {"nombre": rng.choice(FIRST_NAMES), "pasaporte": f"P{rng.randrange(10**7):07d}"}
+                    for _ in range(family - 1)
+                ],
+                "is_completed": rng.random() < 0.5, "version": 1,
+            })
+        for category in rng.sample(REQUIRED_CATEGORIES, rng.randint(0, max_docs)):
+            stored_name = f"bench{user_id:06d}_{len(documents):07d}.pdf"
+            documents.append({
+                "user_id": user_id, "category": category, "original_name": f"{category.lower()}.pdf",
+                "stored_name": stored_name, "mime_type": "application/pdf", "size_bytes": len(SAMPLE_PDF),
+                "status": rng.choice(DOC_STATUSES), "created_at": base_date + timedelta(minutes=rng.randrange(500_000)),
+            })
+
+    for rows, model in ((clients, Client), (forms, IntakeForm), (documents, Document)):
+        for chunk in _chunks(rows):
+            db.execute(insert(model), chunk)
+    for doc in documents:
+        with open(os.path.join(upload_dir, doc["stored_name"]), "wb") as f:
+            f.write(SAMPLE_PDF)
+
+    # Actividad de los últimos ~60 días (el panel filtra por fecha)
+    now = datetime.utcnow()
+    for start in range(0, n_activities, CHUNK):
+        batch = []
+        for _ in range(start, min(start + CHUNK, n_activities)):
+            i = rng.randrange(n_clients)
+            activity_type = rng.choice(ACTIVITY_TYPES)
+            batch.append({
+                "user_id": customer_ids[i], "activity_type": activity_type, "title": activity_type.replace("_", " ").capitalize(),
+                "description": f"{user_email(i)} {activity_type}", "performed_by_id": customer_ids[i],
+                "performed_by_email": user_email(i), "created_at": now - timedelta(seconds=rng.randrange(60 * 86400)),
+            })
+        db.execute(insert(Activity), batch)
+
+    db.commit()
+    recompute_client_counters(db)
+    recompute_storage_usage(db)
+    return {"admins": 1, "clients": len(clients), "forms": len(forms), "documents": len(documents),
+            "activities": n_activities, "admin_id": admin_id}
+
+def main():
+    parser = argparse.ArgumentParser(description="Sembrar datos de benchmark")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(engine)
+    db = SessionLocal()
+    try:
+        if is_seeded(db):
+            print("ℹ️  La BD ya tiene datos de benchmark; usa una BD vacía para volver a sembrar")
+            return
+        started = time.perf_counter()
+        counts = seed(db, args.scale)
+    finally:
+        db.close()
+    print(f"✅ Sembrado '{args.scale}' en {time.perf_counter() - started:.1f}s: "
+          + ", ".join(f"{v} {k}" for k, v in counts.items() if k != "admin_id"))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Tiempo de arranque en frío de la API.
+
+Mide, en procesos nuevos, lo que tarda un contenedor recién levantado en poder
+atender tráfico:
+
+- import: importar app.main (routers, esquemas, modelos)
+- ready: desde lanzar el servidor hasta el primer 200 de /readyz (import,
+  lifespan con la primera conexión a la BD y arranque de los workers)
+
+y muestra el perfil de importación por módulo (python -X importtime): coste
+propio agregado por paquete y los módulos de la app más caros con sus
+dependencias. Si la mediana de ready supera --budget-ms sale con código 1.
+
+Ejemplos:
+    python -m bench.startup
+    python -m bench.startup --server gunicorn --runs 3 --budget-ms 4000
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from bench.client import BenchClient
+from bench.run import BACKEND_DIR, _free_port, _git_commit, local_env
+
+DEFAULT_BUDGET_MS = 3000
+
+def _env(workdir: str) -> dict:
+    """Entorno con una BD SQLite vacía (solo el esquema): el arranque no depende de los datos"""
+    env = {**os.environ, **local_env(workdir, "startup")}
+    db_path = env["DB_URL"].removeprefix("sqlite:///")
+    if not os.path.exists(db_path):
+        os.makedirs(workdir, exist_ok=True)
+        subprocess.run(
+            [sys.executable, "-c", "import app.models; from app.core.db import Base, engine; Base.metadata.create_all(engine)"],
+            cwd=BACKEND_DIR, env=env, check=True,
+        )
+    return env
+
+def import_profile(env: dict) -> list[tuple[str, int, int]]:
+    """(módulo, µs propios, µs acumulados) de `import app.main` en un proceso nuevo"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, name = line.removeprefix("import time:").split("|")
+        modules.append((name.strip(), int(own), int(cumulative)))
+    return modules
+
+def measure_import(env: dict) -> float:
+    code = "import time; t = time.perf_counter(); import app.main; print(time.perf_counter() - t)"
+    result = subprocess.run([sys.executable, "-c", code], cwd=BACKEND_DIR, env=env,
+                            capture_output=True, text=True, check=True)
+    return float(result.stdout.strip().splitlines()[-1]) * 1000
+
+def _server_command(server: str, port: int) -> list[str]:
+    if server == "gunicorn":
+        return [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app.main:app", "--bind", f"127.0.0.1:{port}"]
+    return [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+            "--log-level", "warning", "--no-access-log"]
+
+def measure_ready(env: dict, server: str, timeout: float = 60) -> float:
+    """Milisegundos desde lanzar el servidor hasta que /readyz responde 200"""
+    port = _free_port()
+    started = time.perf_counter()
+    process = subprocess.Popen(_server_command(server, port), cwd=BACKEND_DIR, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    client = BenchClient(f"http://127.0.0.1:{port}", timeout=5)
+    try:
+        while time.perf_counter() - started < timeout:
+            if process.poll() is not None:
+                raise RuntimeError("El servidor terminó al arrancar")
+            try:
+                if client.request("GET", "/readyz")[0] == 200:
+                    return (time.perf_counter() - started) * 1000
+            except OSError:
+                client.close()
+            time.sleep(0.02)
+        raise RuntimeError(f"/readyz no respondió en {timeout:.0f}s")
+    finally:
+        client.close()
+        process.terminate()
+        process.wait(timeout=30)
+
+def _print_profile(modules: list[tuple[str, int, int]], top: int):
+    by_package = defaultdict(int)
+    for name, own, _ in modules:
+        by_package[name.split(".")[0]] += own
+    total = sum(by_package.values())
+    print(f"\n📦 Importación por paquete (coste propio, total {total / 1000:.0f} ms)")
+    for package, own in sorted(by_package.items(), key=lambda item: -item[1])[:top]:
+        print(f"   {own / 1000:8.1f} ms  {own / total:5.1%}  {package}")
+
+    app_modules = [m for m in modules if m[0] == "app" or m[0].startswith("app.")]
+    print("\n🧩 Módulos de la app (acumulado = el módulo y lo que importa por primera vez)")
+    print(f"   {'propio':>9} {'acumulado':>10}  módulo")
+    for name, own, cumulative in sorted(app_modules, key=lambda m: -m[2])[:top]:
+        print(f"   {own / 1000:7.1f} ms {cumulative / 1000:8.1f} ms  {name}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tiempo de arranque en frío de la API")
+    parser.add_argument("--runs", type=int, default=5, help="Arranques a medir (se usa la mediana)")
+    parser.add_argument("--server", choices=("uvicorn", "gunicorn"), default="uvicorn")
+    parser.add_argument("--budget-ms", type=float, default=float(os.environ.get("STARTUP_BUDGET_MS", DEFAULT_BUDGET_MS)),
+                        help="Máximo para la mediana de ready (o STARTUP_BUDGET_MS)")
+    parser.add_argument("--top", type=int, default=15, help="Filas del perfil de importación")
+    parser.add_argument("--no-profile", action="store_true", help="Solo los tiempos, sin el perfil por módulo")
+    parser.add_argument("--workdir", default=os.path.join(tempfile.gettempdir(), "visas-bench"))
+    parser.add_argument("--output", help="Guardar los resultados en este JSON")
+    args = parser.parse_args(argv)
+
+    env = _env(args.workdir)
+    if not args.no_profile:
+        _print_profile(import_profile(env), args.top)
+
+    print(f"\n⏱️  {args.runs} arranques en frío ({args.server})...")
+    imports, readies = [], []
+    for i in range(args.runs):
+        imports.append(measure_import(env))
+        readies.append(measure_ready(env, args.server))
+        print(f"   #{i + 1}: import {imports[-1]:.0f} ms, ready {readies[-1]:.0f} ms")
+
+    results = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "git_commit": _git_commit(),
+        "server": args.server,
+        "runs": args.runs,
+        "import_ms": round(statistics.median(imports), 1),
+        "ready_ms": round(statistics.median(readies), 1),
+        "budget_ms": args.budget_ms,
+    }
+    print(f"\n   Mediana: import {results['import_ms']:.0f} ms, ready {results['ready_ms']:.0f} ms "
+          f"(presupuesto {args.budget_ms:.0f} ms)")
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if results["ready_ms"] > args.budget_ms:
+        print(f"❌ Arranque por encima del presupuesto ({results['ready_ms']:.0f} > {args.budget_ms:.0f} ms)")
+        return 1
+    print("✅ Arranque dentro del presupuesto")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
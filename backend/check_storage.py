@@ -0,0 +1,79 @@
+"""
+Comprobación de consistencia entre la tabla documents y UPLOAD_DIR
+Ejecutar con: python check_storage.py [--checksums] [--output diferencias.jsonl]
+
+Reporta documentos sin archivo, archivos huérfanos y tamaños o sha256 que no
+coinciden. Solo lee: para borrar huérfanos está la tarea gc_uploads. Sale con
+código 1 si encuentra diferencias (útil en cron).
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from app.core.config import settings
+from app.core.db import SessionLocal
+from app.services.storage_check import check_storage
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--checksums", action="store_true", help="Leer cada archivo y comparar su sha256 (lento)")
+    parser.add_argument("--buckets", type=int, default=64,
+                        help="Cubetas temporales; en memoria hay ~(archivos + documentos) / cubetas registros")
+    parser.add_argument("--workers", type=int, default=min(8, (os.cpu_count() or 1) * 2),
+                        help="Hilos recorriendo carpetas y calculando sha256")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Filas por lote del cursor de documents")
+    parser.add_argument("--output", help="Guardar cada diferencia en este JSONL")
+    parser.add_argument("--show", type=int, default=20, help="Diferencias a mostrar en pantalla")
+    args = parser.parse_args(argv)
+
+    print("=" * 70)
+    print(f"🔍 CONSISTENCIA DE ALMACENAMIENTO - {settings.UPLOAD_DIR}")
+    print("=" * 70)
+
+    shown = 0
+    out = open(args.output, "w", encoding="utf-8") if args.output else None
+
+    def on_issue(issue: dict):
+        nonlocal shown
+        if out is not None:
+            out.write(json.dumps(issue, ensure_ascii=False) + "\n")
+        if shown < args.show:
+            shown += 1
+            print(f"   ⚠️  {issue['issue']}: " + ", ".join(f"{k}={v}" for k, v in issue.items() if k != "issue"))
+
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        report = check_storage(
+            db, buckets=max(1, args.buckets), workers=max(1, args.workers),
+            batch_size=args.batch_size, checksums=args.checksums, on_issue=on_issue,
+        )
+    finally:
+        db.close()
+        if out is not None:
+            out.close()
+    elapsed = time.perf_counter() - started
+
+    print(f"\n📁 Archivos: {report.files} ({report.file_bytes / (1024 * 1024):.1f} MB)")
+    if report.unsharded:
+        print(f"   {report.unsharded} todavía en la raíz (python migrate_upload_layout.py)")
+    print(f"📄 Documentos: {report.documents} (+ {report.versions} versiones anteriores en UPLOAD_DIR)")
+    print(f"   Sin archivo:        {report.missing}")
+    print(f"   Huérfanos:          {report.orphan}")
+    print(f"   Tamaño distinto:    {report.size_mismatch}")
+    if args.checksums:
+        print(f"   sha256 distinto:    {report.checksum_mismatch} "
+              f"({report.checksums_verified} verificados, {report.checksums_unavailable} sin sha256)")
+    print(f"\n⏱️  {elapsed:.1f} s")
+    if args.output:
+        print(f"💾 Diferencias guardadas en {args.output}")
+
+    if report.problems:
+        print(f"❌ {report.problems} diferencias")
+        return 1
+    print("✅ Sin diferencias")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
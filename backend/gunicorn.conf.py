@@ -0,0 +1,87 @@
+"""
+Configuración de producción: gunicorn con workers de uvicorn.
+
+    gunicorn -c gunicorn.conf.py app.main:app
+
+La app se importa una sola vez en el proceso maestro (preload_app) y los
+workers la heredan al hacer fork: arrancan más rápido, comparten memoria y un
+error de importación se ve antes de levantar ningún worker. La BD se prepara
+aparte con `python migrate.py` (no en cada arranque).
+
+Variables de entorno:
+    PORT                 puerto (8000)
+    WEB_CONCURRENCY      número de workers (1)
+    WEB_CONCURRENCY_AUTO "true": sin WEB_CONCURRENCY, 2 x CPUs + 1 workers
+    WEB_CONCURRENCY_MAX  tope del cálculo automático (8)
+    GRACEFUL_TIMEOUT     segundos para terminar lo que está en curso al apagar (30)
+    WORKER_TIMEOUT       segundos sin respuesta antes de reiniciar un worker (120)
+
+FORWARDED_ALLOW_IPS (proxies de confianza para X-Forwarded-For) es obligatoria y
+se lee de la configuración de la app (app/core/config.py, también desde .env).
+
+Un solo worker por defecto. Subirlo es seguro para el autoguardado del
+formulario y la revocación de tokens (su estado está en la BD), pero:
+- los límites de login necesitan RATE_LIMIT_BACKEND=redis (con "memory" cada
+  worker cuenta por su lado; se avisa al arrancar)
+- las métricas (/metrics) son de cada worker: cada scrape ve solo el que
+  atendió la petición
+"""
+import os
+import sys
+
+# gunicorn no pone el directorio de trabajo en sys.path antes de leer este archivo
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from app.core.config import settings  # noqa: E402
+
+def _cpus() -> int:
+    # CPUs asignadas al contenedor, no las de la máquina
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+def _workers() -> int:
+    # WEB_CONCURRENCY también lo lee gunicorn por su cuenta: tiene que ser un número
+    if os.environ.get("WEB_CONCURRENCY"):
+        return max(1, int(os.environ["WEB_CONCURRENCY"]))
+    if os.environ.get("WEB_CONCURRENCY_AUTO", "").lower() in ("1", "true", "yes"):
+        return max(1, min(2 * _cpus() + 1, int(os.environ.get("WEB_CONCURRENCY_MAX", "8"))))
+    return 1
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = _workers()
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+
+timeout = int(os.environ.get("WORKER_TIMEOUT", "120"))
+graceful_timeout = int(os.environ.get("GRACEFUL_TIMEOUT", "30"))
+keepalive = 5
+
+# Reciclar workers de vez en cuando (con jitter para que no reinicien todos a la vez)
+max_requests = 2000
+max_requests_jitter = 200
+
+# El latido de los workers en memoria: /tmp en Docker puede ser un overlay lento
+worker_tmp_dir = "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+# IP real del cliente para los límites de login (detrás de un proxy de confianza)
+forwarded_allow_ips = settings.FORWARDED_ALLOW_IPS
+
+accesslog = None
+errorlog = "-"
+loglevel = os.environ.get("LOG_LEVEL", "info").lower()
+
+def post_fork(server, worker):
+    # El engine se crea en cada worker al arrancar; si algo lo creó ya en el
+    # maestro, sus conexiones no pueden compartirse entre procesos
+    from app.core.db import dispose_engine
+    dispose_engine(close=False)
+
+def when_ready(server):
+    server.log.info("Gunicorn listo con %s workers", server.cfg.workers)
+    if server.cfg.workers > 1 and settings.RATE_LIMIT_ENABLED and settings.RATE_LIMIT_BACKEND == "memory":
+        server.log.warning(
+            "RATE_LIMIT_BACKEND=memory con %s workers: cada worker lleva sus propios contadores y "
+            "el límite real de login se multiplica por %s. Usa RATE_LIMIT_BACKEND=redis",
+            server.cfg.workers, server.cfg.workers,
+        )
@@ -0,0 +1,42 @@
+"""
+Importación masiva de clientes desde CSV
+Ejecutar con: python import_clients.py clientes.csv [--errors errores.csv] [--workers 8]
+
+Columnas: email, password y opcionalmente first_name, last_name, phone,
+destination_country, visa_type, application_type, family_members_count,
+status, notes.
+"""
+import argparse
+from app.core.db import SessionLocal
+from app.services.client_import import BATCH_SIZE, import_clients
+
+def main():
+    parser = argparse.ArgumentParser(description="Importar clientes desde un CSV")
+    parser.add_argument("csv_path")
+    parser.add_argument("--errors", help="Guardar los errores por fila en este CSV")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--workers", type=int, default=None, help="Hilos para bcrypt (por defecto, núcleos de CPU)")
+    args = parser.parse_args()
+
+    def progress(report):
+        print(f"   ... {report.total} filas leídas, {report.created} creadas, {len(report.errors)} con error")
+
+    db = SessionLocal()
+    try:
+        with open(args.csv_path, newline="", encoding="utf-8-sig") as f:
+            report = import_clients(db, f, batch_size=args.batch_size, workers=args.workers, progress=progress)
+    finally:
+        db.close()
+
+    print(f"\n✅ {report.created} de {report.total} clientes importados en {report.seconds:.1f}s "
+          f"({report.rows_per_second:.0f} filas/s)")
+    if report.errors:
+        print(f"❌ {len(report.errors)} filas con error")
+        for row, email, error in report.errors[:20]:
+            print(f"   fila {row} ({email}): {error}")
+        if args.errors:
+            report.write_errors(args.errors)
+            print(f"   Detalle completo en {args.errors}")
+
+if __name__ == "__main__":
+    main()
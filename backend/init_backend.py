@@ -59,7 +59,7 @@ def create_tables():
     try:
         from app.core.db import engine, Base
         # Importar todos los modelos
-        from app.models import user, document, client, intake_form, category, activity  # noqa
+        from app.models import user, document, client, intake_form, category, activity, job  # noqa
         
         # Crear todas las tablas
         Base.metadata.create_all(bind=engine)
@@ -0,0 +1,94 @@
+"""
+Inicialización y migración de la BD en un solo paso (se ejecuta una vez por despliegue)
+Ejecutar con: python migrate.py
+
+1. Crea la base de datos y las tablas que falten y los datos semilla (init_backend.py)
+2. Ejecuta los scripts update_db_schema_*.py que aún no se aplicaron, en orden,
+   y los anota en la tabla schema_migrations
+
+Al añadir un script nuevo de migración, agregarlo al final de MIGRATIONS.
+"""
+import runpy
+import sys
+from datetime import datetime
+from pathlib import Path
+from sqlalchemy import text
+import init_backend
+
+MIGRATIONS = [
+    "update_db_schema.py",
+    "update_db_schema_docs.py",
+    "update_db_schema_extra.py",
+    "update_db_schema_forms.py",
+    "update_db_schema_previews.py",
+    "update_db_schema_scan.py",
+    "update_db_schema_forms_json.py",
+    "update_db_schema_form_version.py",
+    "update_db_schema_forms_unique.py",
+    "update_db_schema_search.py",
+    "update_db_schema_review_queue.py",
+    "update_db_schema_token_version.py",
+    "update_db_schema_soft_delete.py",
+    "update_db_schema_checksum.py",
+    "update_db_schema_storage_quota.py",
+    "update_db_schema_versions.py",
+    "update_db_schema_form_autosave.py",
+]
+
+BASE_DIR = Path(__file__).resolve().parent
+
+def applied_migrations(engine) -> set[str]:
+    with engine.connect() as conn:
+        conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS schema_migrations (name VARCHAR(255) PRIMARY KEY, applied_at DATETIME NOT NULL)"
+        ))
+        conn.commit()
+        return {row[0] for row in conn.execute(text("SELECT name FROM schema_migrations"))}
+
+def run_migrations() -> bool:
+    from app.core.db import engine
+
+    print("\n🧱 Aplicando migraciones pendientes...")
+    done = applied_migrations(engine)
+    pending = [name for name in MIGRATIONS if name not in done]
+    if not pending:
+        print("   ✅ No hay migraciones pendientes")
+        return True
+
+    for name in pending:
+        print(f"   ▶️  {name}")
+        try:
+            runpy.run_path(str(BASE_DIR / name), run_name="__main__")
+        except Exception as e:
+            print(f"❌ Falló {name}: {e}")
+            return False
+        with engine.connect() as conn:
+            conn.execute(
+                text("INSERT INTO schema_migrations (name, applied_at) VALUES (:name, :applied_at)"),
+                {"name": name, "applied_at": datetime.utcnow()},
+            )
+            conn.commit()
+    print(f"   ✅ {len(pending)} migraciones aplicadas")
+    return True
+
+def main():
+    print("=" * 70)
+    print("🚀 MIGRANDO BASE DE DATOS")
+    print("=" * 70)
+
+    if not init_backend.create_database():
+        print("⚠️ Advertencia en paso de BD, intentando continuar...")
+    if not init_backend.create_tables():
+        print("❌ Fallo crítico al crear tablas. Abortando.")
+        sys.exit(1)
+    if not run_migrations():
+        sys.exit(1)
+    init_backend.seed_admin_user()
+    init_backend.seed_categories()
+
+    print("\n" + "=" * 70)
+    print("✨ MIGRACIÓN COMPLETADA")
+    print("=" * 70)
+
+if __name__ == "__main__":
+    main()
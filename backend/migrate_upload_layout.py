@@ -0,0 +1,84 @@
+"""
+Migración de UPLOAD_DIR al layout por carpetas (UPLOAD_DIR/ab/cd/<stored_name>)
+Ejecutar con: python migrate_upload_layout.py [--batch-size 1000] [--pause 0.5] [--dry-run]
+
+Se puede lanzar con la app funcionando: cada archivo se mueve con un rename
+atómico y la app busca primero en su carpeta y después en la raíz, así que un
+documento se encuentra antes, durante y después de moverlo. Se puede
+interrumpir y volver a lanzar: solo procesa lo que sigue en la raíz.
+
+No se tocan los archivos ocultos, los temporales de una subida en curso (.part,
+.ingest), los modificados hace menos de --min-age segundos ni los que no
+empiezan por el uuid de la subida.
+"""
+import argparse
+import os
+import sys
+import time
+from collections import Counter
+from app.core.config import settings
+from app.services.storage import move_to_shard, shard_parts
+
+TEMP_SUFFIXES = (".part", ".ingest")
+
+def candidates(min_age: float):
+    """Archivos de la raíz que se pueden mover (en el orden del directorio)"""
+    threshold = time.time() - min_age
+    with os.scandir(settings.UPLOAD_DIR) as entries:
+        for entry in entries:
+            if entry.name.startswith(".") or not entry.is_file(follow_symlinks=False):
+                continue
+            if entry.name.endswith(TEMP_SUFFIXES) or not shard_parts(entry.name):
+                yield entry.name, "skipped"
+            elif entry.stat(follow_symlinks=False).st_mtime > threshold:
+                yield entry.name, "recent"
+            else:
+                yield entry.name, None
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=1000, help="Archivos por lote")
+    parser.add_argument("--pause", type=float, default=0.5, help="Segundos de espera entre lotes (limita la E/S)")
+    parser.add_argument("--min-age", type=float, default=60, help="No mover archivos modificados hace menos de esto (s)")
+    parser.add_argument("--limit", type=int, default=0, help="Mover como mucho estos archivos (0 = todos)")
+    parser.add_argument("--dry-run", action="store_true", help="Solo contar lo que se movería")
+    args = parser.parse_args(argv)
+
+    print("=" * 70)
+    print(f"📂 MIGRACIÓN AL LAYOUT POR CARPETAS - {settings.UPLOAD_DIR}")
+    print("=" * 70)
+    if not os.path.isdir(settings.UPLOAD_DIR):
+        print("   ℹ️  UPLOAD_DIR no existe, nada que migrar")
+        return 0
+
+    counts = Counter()
+    started = time.perf_counter()
+    in_batch = 0
+    for name, reason in candidates(args.min_age):
+        if reason is not None:
+            counts[reason] += 1
+            continue
+        if args.limit and counts["moved"] + counts["would_move"] >= args.limit:
+            break
+        counts["would_move" if args.dry_run else move_to_shard(name)] += 1
+        in_batch += 1
+        if in_batch >= args.batch_size:
+            in_batch = 0
+            done = counts["moved"] + counts["would_move"]
+            print(f"   … {done} archivos ({done / (time.perf_counter() - started):.0f}/s)")
+            if args.pause and not args.dry_run:
+                time.sleep(args.pause)
+
+    print(f"\n✅ Movidos: {counts['moved']}" + (f" (se moverían {counts['would_move']})" if args.dry_run else ""))
+    print(f"   Ya estaban en su carpeta (copia de la raíz borrada): {counts['duplicate']}")
+    print(f"   Borrados mientras tanto: {counts['missing']}")
+    print(f"   Recientes, para la próxima pasada: {counts['recent']}")
+    print(f"   Se quedan en la raíz (temporales o nombre sin uuid): {counts['skipped']}")
+    print(f"⏱️  {time.perf_counter() - started:.1f} s")
+    if counts["conflict"]:
+        print(f"❌ {counts['conflict']} archivos con otra versión distinta en su carpeta: revisar a mano")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
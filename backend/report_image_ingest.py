@@ -0,0 +1,66 @@
+"""
+Reporte de ahorro de almacenamiento de la normalización de fotos
+Ejecutar con: python report_image_ingest.py /ruta/a/muestras [--category DNI]
+
+Trabaja sobre copias temporales: los archivos de la carpeta no se modifican.
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from app.services.image_ingest import normalize_image, policy_for
+
+MIME_BY_EXT = {".jpg": "image/jpeg", ".jpeg": "image/jpeg", ".png": "image/png"}
+
+def _fmt(n: int) -> str:
+    return f"{n / (1024 * 1024):.2f} MB"
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("directory", help="Carpeta con fotos de muestra (JPG/PNG)")
+    parser.add_argument("--category", default="DNI", help="Categoría cuya política se aplica")
+    args = parser.parse_args()
+
+    policy = policy_for(args.category)
+    print("=" * 70)
+    print(f"📷 NORMALIZACIÓN DE FOTOS - categoría {args.category} "
+          f"(máx {policy.max_size}px, calidad {policy.quality})")
+    print("=" * 70)
+
+    total_before = total_after = files = 0
+    elapsed = 0.0
+    with tempfile.TemporaryDirectory() as tmp:
+        for entry in sorted(os.scandir(args.directory), key=lambda e: e.name):
+            mime = MIME_BY_EXT.get(os.path.splitext(entry.name)[1].lower())
+            if not entry.is_file() or not mime:
+                continue
+            work = os.path.join(tmp, entry.name)
+            shutil.copyfile(entry.path, work)
+            started = time.perf_counter()
+            try:
+                result = normalize_image(work, mime, args.category)
+            except Exception as e:
+                print(f"   ❌ {entry.name}: {e}")
+                continue
+            elapsed += time.perf_counter() - started
+            files += 1
+            total_before += result.bytes_before
+            total_after += result.bytes_after
+            print(f"   {entry.name}: {_fmt(result.bytes_before)} -> {_fmt(result.bytes_after)}"
+                  f"{' (redimensionada)' if result.resized else ''}")
+
+    if not files:
+        print("⚠️  No se encontraron imágenes JPG/PNG")
+        return
+
+    saved = total_before - total_after
+    print("-" * 70)
+    print(f"Archivos: {files}")
+    print(f"Antes:    {_fmt(total_before)}")
+    print(f"Después:  {_fmt(total_after)}")
+    print(f"Ahorro:   {_fmt(saved)} ({saved / total_before * 100:.1f}%)")
+    print(f"Tiempo:   {elapsed * 1000 / files:.0f} ms por imagen")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Resumen de las trazas exportadas con TRACING_EXPORTER=file
+Ejecutar con: python trace_report.py /data/traces/spans.jsonl [--root "POST /api/v1/documents"] [--slowest 3]
+
+Por cada tipo de petición (span raíz) muestra la latencia p50/p95 y en qué se
+fue el tiempo: duración media de cada tipo de span hijo y su porcentaje sobre
+el total de la petición (los spans anidados se cuentan también dentro de
+su padre, así que los porcentajes no suman 100).
+"""
+import argparse
+import json
+from collections import defaultdict
+
+def load_spans(path: str) -> list[dict]:
+    spans = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            for resource in json.loads(line).get("resourceSpans", []):
+                for scope in resource.get("scopeSpans", []):
+                    for s in scope.get("spans", []):
+                        spans.append({
+                            "trace_id": s["traceId"],
+                            "span_id": s["spanId"],
+                            "parent_id": s.get("parentSpanId"),
+                            "name": s["name"],
+                            "ms": (int(s["endTimeUnixNano"]) - int(s["startTimeUnixNano"])) / 1e6,
+                            "start": int(s["startTimeUnixNano"]),
+                            "error": s.get("status", {}).get("message"),
+                        })
+    return spans
+
+def percentile(values: list[float], p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))] if values else 0.0
+
+def print_tree(span: dict, children: dict, depth: int = 0):
+    error = f"  ❌ {span['error']}" if span["error"] else ""
+    print(f"   {'  ' * depth}{span['name']}: {span['ms']:.1f} ms{error}")
+    for child in sorted(children[span["span_id"]], key=lambda s: s["start"]):
+        print_tree(child, children, depth + 1)
+
+def main():
+    parser = argparse.ArgumentParser(description="Resumen de trazas exportadas a archivo")
+    parser.add_argument("path")
+    parser.add_argument("--root", help="Solo las trazas cuyo span raíz tiene este nombre")
+    parser.add_argument("--slowest", type=int, default=0, help="Mostrar el árbol de las N trazas más lentas")
+    args = parser.parse_args()
+
+    spans = load_spans(args.path)
+    ids = {s["span_id"] for s in spans}
+    children = defaultdict(list)
+    for s in spans:
+        children[s["parent_id"]].append(s)
+    # Raíz = sin padre o con un padre remoto (traceparent entrante) que no está en el archivo
+    roots = [s for s in spans if s["parent_id"] not in ids]
+    if args.root:
+        roots = [s for s in roots if s["name"] == args.root]
+
+    by_name = defaultdict(list)
+    for root in roots:
+        by_name[root["name"]].append(root)
+
+    for name, group in sorted(by_name.items(), key=lambda kv: -len(kv[1])):
+        durations = [r["ms"] for r in group]
+        total = sum(durations)
+        print(f"\n📊 {name}: {len(group)} trazas, p50 {percentile(durations, 0.5):.1f} ms, "
+              f"p95 {percentile(durations, 0.95):.1f} ms")
+
+        # Tiempo por tipo de span dentro de estas trazas (sin contar la raíz)
+        per_span = defaultdict(float)
+        stack = [c for r in group for c in children[r["span_id"]]]
+        while stack:
+            s = stack.pop()
+            per_span[s["name"]] += s["ms"]
+            stack.extend(children[s["span_id"]])
+        for span_name, ms in sorted(per_span.items(), key=lambda kv: -kv[1])[:15]:
+            print(f"   {span_name:<40} {ms / len(group):8.1f} ms/traza  {ms / total * 100 if total else 0:5.1f}%")
+
+        for root in sorted(group, key=lambda r: -r["ms"])[:args.slowest]:
+            print(f"\n   🐢 traza {root['trace_id']}")
+            print_tree(root, children, 1)
+
+    if not roots:
+        print("❌ No hay trazas que mostrar")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,15 @@
+from app.core.db import engine
+from sqlalchemy import text
+
+def add_columns():
+    with engine.connect() as conn:
+        try:
+            conn.execute(text("ALTER TABLE documents ADD COLUMN sha256 VARCHAR(64) NULL"))
+            print("Added sha256 column")
+        except Exception as e:
+            print(f"Error adding sha256 (maybe exists): {e}")
+
+        conn.commit()
+
+if __name__ == "__main__":
+    add_columns()
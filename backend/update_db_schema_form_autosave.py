@@ -0,0 +1,27 @@
+from app.core.db import engine
+from sqlalchemy import text
+
+def add_columns():
+    with engine.connect() as conn:
+        try:
+            conn.execute(text("ALTER TABLE intake_forms ADD COLUMN autosave_draft JSON NULL"))
+            print("Added autosave_draft column")
+        except Exception as e:
+            print(f"Error adding autosave_draft (maybe exists): {e}")
+
+        try:
+            conn.execute(text("ALTER TABLE intake_forms ADD COLUMN autosave_due_at DATETIME NULL"))
+            print("Added autosave_due_at column")
+        except Exception as e:
+            print(f"Error adding autosave_due_at (maybe exists): {e}")
+
+        try:
+            conn.execute(text("CREATE INDEX ix_intake_forms_autosave_due_at ON intake_forms (autosave_due_at)"))
+            print("Created ix_intake_forms_autosave_due_at")
+        except Exception as e:
+            print(f"Error creating ix_intake_forms_autosave_due_at (maybe exists): {e}")
+
+        conn.commit()
+
+if __name__ == "__main__":
+    add_columns()
@@ -0,0 +1,15 @@
+from app.core.db import engine
+from sqlalchemy import text
+
+def add_columns():
+    with engine.connect() as conn:
+        try:
+            conn.execute(text("ALTER TABLE intake_forms ADD COLUMN version INT NOT NULL DEFAULT 1"))
+            print("Added version column")
+        except Exception as e:
+            print(f"Error adding version (maybe exists): {e}")
+
+        conn.commit()
+
+if __name__ == "__main__":
+    add_columns()
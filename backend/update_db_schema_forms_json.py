@@ -0,0 +1,44 @@
+from app.core.db import engine
+from sqlalchemy import text
+
+JSON_COLUMNS = ("family_members_data", "parents_data", "education_data", "work_data")
+
+def migrate_json_columns():
+    with engine.connect() as conn:
+        for column in JSON_COLUMNS:
+            # Los valores vacíos o que no son JSON válido impedirían el cambio de tipo
+            try:
+                result = conn.execute(text(
+                    f"UPDATE intake_forms SET {column} = NULL "
+                    f"WHERE {column} IS NOT NULL AND (TRIM({column}) = '' OR NOT JSON_VALID({column}))"
+                ))
+                print(f"Cleaned {result.rowcount} invalid values in {column}")
+            except Exception as e:
+                print(f"Error cleaning {column}: {e}")
+
+            try:
+                conn.execute(text(f"ALTER TABLE intake_forms MODIFY COLUMN {column} JSON"))
+                print(f"Converted {column} to JSON")
+            except Exception as e:
+                print(f"Error converting {column} (maybe already JSON): {e}")
+
+        indexes = {
+            "ix_intake_forms_nacionalidad": "CREATE INDEX ix_intake_forms_nacionalidad ON intake_forms (nacionalidad)",
+            "ix_intake_forms_pasaporte": "CREATE INDEX ix_intake_forms_pasaporte ON intake_forms (pasaporte)",
+            # Índice multivaluado (MySQL 8.0.17+) para buscar pasaportes de familiares
+            "ix_intake_forms_family_pasaportes": (
+                "CREATE INDEX ix_intake_forms_family_pasaportes ON intake_forms "
+                "((CAST(family_members_data->'$[*].pasaporte' AS CHAR(50) ARRAY)))"
+            ),
+        }
+        for name, ddl in indexes.items():
+            try:
+                conn.execute(text(ddl))
+                print(f"Created index {name}")
+            except Exception as e:
+                print(f"Error creating {name} (maybe exists): {e}")
+
+        conn.commit()
+
+if __name__ == "__main__":
+    migrate_json_columns()
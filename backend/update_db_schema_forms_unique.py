@@ -0,0 +1,25 @@
+from app.core.db import engine
+from sqlalchemy import text
+
+def add_unique_user():
+    with engine.connect() as conn:
+        # Quedarse con el formulario más reciente de cada usuario antes de crear la clave única
+        try:
+            result = conn.execute(text(
+                "DELETE f FROM intake_forms f JOIN intake_forms g ON f.user_id = g.user_id "
+                "AND (f.updated_at < g.updated_at OR (f.updated_at = g.updated_at AND f.id < g.id))"
+            ))
+            print(f"Removed {result.rowcount} duplicated forms")
+        except Exception as e:
+            print(f"Error removing duplicated forms: {e}")
+
+        try:
+            conn.execute(text("ALTER TABLE intake_forms ADD CONSTRAINT uq_intake_forms_user_id UNIQUE (user_id)"))
+            print("Added uq_intake_forms_user_id")
+        except Exception as e:
+            print(f"Error adding uq_intake_forms_user_id (maybe exists): {e}")
+
+        conn.commit()
+
+if __name__ == "__main__":
+    add_unique_user()
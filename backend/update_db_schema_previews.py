@@ -0,0 +1,29 @@
+from app.core.db import engine
+from sqlalchemy import text
+
+def add_columns():
+    with engine.connect() as conn:
+        try:
+            conn.execute(text("ALTER TABLE documents ADD COLUMN has_preview BOOLEAN NOT NULL DEFAULT 0"))
+            print("Added has_preview column")
+        except Exception as e:
+            print(f"Error adding has_preview (maybe exists): {e}")
+
+        conn.commit()
+
+def backfill_previews():
+    """Encolar miniaturas para los documentos subidos antes de este cambio"""
+    from sqlalchemy.orm import Session
+    from app.models.document import Document
+    from app.services.job_queue import enqueue
+
+    with Session(engine) as session:
+        ids = session.query(Document.id).filter(Document.has_preview == False).all()
+        for (doc_id,) in ids:
+            enqueue(session, "generate_preview", {"document_id": doc_id}, priority=-5, commit=False)
+        session.commit()
+        print(f"Enqueued {len(ids)} preview jobs")
+
+if __name__ == "__main__":
+    add_columns()
+    backfill_previews()
@@ -0,0 +1,31 @@
+from app.core.db import engine
+from sqlalchemy import text
+
+def add_columns():
+    with engine.connect() as conn:
+        try:
+            conn.execute(text("ALTER TABLE documents ADD COLUMN claimed_by_id INT NULL"))
+            conn.execute(text(
+                "ALTER TABLE documents ADD CONSTRAINT fk_documents_claimed_by "
+                "FOREIGN KEY (claimed_by_id) REFERENCES users(id) ON DELETE SET NULL"
+            ))
+            print("Added claimed_by_id column")
+        except Exception as e:
+            print(f"Error adding claimed_by_id (maybe exists): {e}")
+
+        try:
+            conn.execute(text("ALTER TABLE documents ADD COLUMN claimed_until DATETIME"))
+            print("Added claimed_until column")
+        except Exception as e:
+            print(f"Error adding claimed_until (maybe exists): {e}")
+
+        try:
+            conn.execute(text("CREATE INDEX ix_documents_status_created ON documents (status, created_at)"))
+            print("Created ix_documents_status_created")
+        except Exception as e:
+            print(f"Error creating ix_documents_status_created (maybe exists): {e}")
+
+        conn.commit()
+
+if __name__ == "__main__":
+    add_columns()
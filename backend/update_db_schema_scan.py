@@ -0,0 +1,21 @@
+from app.core.db import engine
+from sqlalchemy import text
+
+def add_columns():
+    with engine.connect() as conn:
+        try:
+            conn.execute(text("ALTER TABLE documents ADD COLUMN scan_result VARCHAR(200)"))
+            print("Added scan_result column")
+        except Exception as e:
+            print(f"Error adding scan_result (maybe exists): {e}")
+
+        try:
+            conn.execute(text("ALTER TABLE documents ADD COLUMN scanned_at DATETIME"))
+            print("Added scanned_at column")
+        except Exception as e:
+            print(f"Error adding scanned_at (maybe exists): {e}")
+
+        conn.commit()
+
+if __name__ == "__main__":
+    add_columns()
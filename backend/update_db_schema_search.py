@@ -0,0 +1,31 @@
+from app.core.db import engine
+from app.models import search_index
+from sqlalchemy import text
+
+FULLTEXT_INDEXES = {
+    "ft_users_email": "ALTER TABLE users ADD FULLTEXT INDEX ft_users_email (email)",
+    "ft_clients_search": "ALTER TABLE clients ADD FULLTEXT INDEX ft_clients_search (first_name, last_name, phone)",
+    "ft_intake_forms_search": "ALTER TABLE intake_forms ADD FULLTEXT INDEX ft_intake_forms_search (nombres, apellidos, pasaporte)",
+    "ft_documents_name": "ALTER TABLE documents ADD FULLTEXT INDEX ft_documents_name (original_name)",
+}
+
+def add_search_indexes():
+    with engine.connect() as conn:
+        if conn.dialect.name == "sqlite":
+            # Base local: tabla FTS5 + triggers y carga de los datos existentes
+            search_index.install_sqlite_search(conn)
+            for statement in search_index.rebuild_sql():
+                conn.execute(text(statement))
+            print("Rebuilt search_fts")
+        else:
+            for name, ddl in FULLTEXT_INDEXES.items():
+                try:
+                    conn.execute(text(ddl))
+                    print(f"Created {name}")
+                except Exception as e:
+                    print(f"Error creating {name} (maybe exists): {e}")
+
+        conn.commit()
+
+if __name__ == "__main__":
+    add_search_indexes()
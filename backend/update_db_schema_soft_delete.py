@@ -0,0 +1,29 @@
+from app.core.db import engine
+from app.models import search_index
+from sqlalchemy import text
+
+def add_columns():
+    with engine.connect() as conn:
+        try:
+            conn.execute(text("ALTER TABLE documents ADD COLUMN deleted_at DATETIME NULL"))
+            print("Added deleted_at column")
+        except Exception as e:
+            print(f"Error adding deleted_at (maybe exists): {e}")
+
+        try:
+            conn.execute(text("CREATE INDEX ix_documents_deleted_at ON documents (deleted_at)"))
+            print("Created ix_documents_deleted_at")
+        except Exception as e:
+            print(f"Error creating ix_documents_deleted_at (maybe exists): {e}")
+
+        if conn.dialect.name == "sqlite":
+            # Los triggers de search_fts ahora ignoran los documentos en la papelera
+            for statement in search_index.drop_triggers_sql("document"):
+                conn.execute(text(statement))
+            search_index.install_sqlite_search(conn)
+            print("Reinstalled search_fts triggers for documents")
+
+        conn.commit()
+
+if __name__ == "__main__":
+    add_columns()
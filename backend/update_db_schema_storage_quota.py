@@ -0,0 +1,34 @@
+from app.core.db import engine
+from sqlalchemy import text
+
+def add_columns():
+    with engine.connect() as conn:
+        try:
+            conn.execute(text("ALTER TABLE users ADD COLUMN storage_used_bytes BIGINT NOT NULL DEFAULT 0"))
+            print("Added storage_used_bytes column")
+        except Exception as e:
+            print(f"Error adding storage_used_bytes (maybe exists): {e}")
+
+        try:
+            conn.execute(text("ALTER TABLE users ADD COLUMN storage_quota_bytes BIGINT NULL"))
+            print("Added storage_quota_bytes column")
+        except Exception as e:
+            print(f"Error adding storage_quota_bytes (maybe exists): {e}")
+
+        try:
+            conn.execute(text("CREATE INDEX ix_users_storage_used_bytes ON users (storage_used_bytes)"))
+            print("Created ix_users_storage_used_bytes")
+        except Exception as e:
+            print(f"Error creating ix_users_storage_used_bytes (maybe exists): {e}")
+
+        # Uso inicial a partir de los documentos vivos
+        conn.execute(text(
+            "UPDATE users SET storage_used_bytes = (SELECT COALESCE(SUM(d.size_bytes), 0) FROM documents d "
+            "WHERE d.user_id = users.id AND d.deleted_at IS NULL)"
+        ))
+        print("Backfilled storage_used_bytes")
+
+        conn.commit()
+
+if __name__ == "__main__":
+    add_columns()
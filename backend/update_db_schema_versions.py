@@ -0,0 +1,22 @@
+from app.core.db import engine
+from sqlalchemy import text
+
+def add_columns():
+    # La tabla document_versions la crea create_tables (init_backend)
+    with engine.connect() as conn:
+        try:
+            conn.execute(text("ALTER TABLE documents ADD COLUMN version INTEGER NOT NULL DEFAULT 1"))
+            print("Added version column")
+        except Exception as e:
+            print(f"Error adding version (maybe exists): {e}")
+
+        try:
+            conn.execute(text("CREATE INDEX ix_documents_user_current ON documents (user_id, deleted_at)"))
+            print("Created ix_documents_user_current")
+        except Exception as e:
+            print(f"Error creating ix_documents_user_current (maybe exists): {e}")
+
+        conn.commit()
+
+if __name__ == "__main__":
+    add_columns()
@@ -0,0 +1,66 @@
+"""
+Verificación de concurrencia del upsert de formularios (POST /forms)
+Ejecutar con: python verify_form_upsert.py [hilos]
+
+Lanza N envíos simultáneos del formulario de un usuario temporal y comprueba
+que queda un solo formulario con una versión por envío.
+"""
+import sys
+import threading
+from app.core.db import SessionLocal
+from app.models.user import User
+from app.models.intake_form import IntakeForm
+from app.schemas.intake_form import IntakeFormCreate
+from app.services.intake_forms import upsert_form
+
+def verify_upsert(threads: int = 50):
+    print("=" * 70)
+    print(f"🔍 VERIFICACIÓN DEL UPSERT DE FORMULARIOS ({threads} hilos)")
+    print("=" * 70)
+
+    db = SessionLocal()
+    user = User(email="verify-upsert@example.invalid", hashed_password="-", role="customer")
+    db.add(user)
+    db.commit()
+    user_id = user.id
+
+    barrier = threading.Barrier(threads)
+    errors = []
+
+    def submit(i: int):
+        session = SessionLocal()
+        try:
+            barrier.wait()
+            upsert_form(session, user_id, IntakeFormCreate(nombres=f"Hilo {i}", nacionalidad="CO"))
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            errors.append(e)
+        finally:
+            session.close()
+
+    workers = [threading.Thread(target=submit, args=(i,)) for i in range(threads)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+
+    try:
+        forms = db.query(IntakeForm).filter(IntakeForm.user_id == user_id).all()
+        print(f"\n   Errores: {len(errors)}")
+        for e in errors[:5]:
+            print(f"   ❌ {e!r}")
+        print(f"   Formularios creados: {len(forms)}")
+        if forms:
+            print(f"   Versión final: {forms[0].version}")
+        ok = not errors and len(forms) == 1 and forms[0].version == threads
+        print("\n   ✅ OK" if ok else "\n   ❌ FALLÓ")
+        return ok
+    finally:
+        db.query(IntakeForm).filter(IntakeForm.user_id == user_id).delete()
+        db.query(User).filter(User.id == user_id).delete()
+        db.commit()
+        db.close()
+
+if __name__ == "__main__":
+    sys.exit(0 if verify_upsert(int(sys.argv[1]) if len(sys.argv) > 1 else 50) else 1)
@@ -10,8 +10,8 @@ export function AuthProvider({ children }) {
   // 🔐 Iniciar sesión
   const login = async ({ email, password }) => {
     try {
-      const { access_token } = await api.post('/api/v1/login', { email, password })
-      api.setToken(access_token)
+      const { access_token, refresh_token } = await api.post('/api/v1/login', { email, password })
+      api.setToken(access_token, false, refresh_token)
       const me = await api.get('/api/v1/me')
       setUser(me)
       return { ok: true, user: me }
@@ -24,8 +24,8 @@ export function AuthProvider({ children }) {
   // 🧾 Registro
   const register = async ({ email, password }) => {
     try {
-      const { access_token } = await api.post('/api/v1/register', { email, password })
-      api.setToken(access_token)
+      const { access_token, refresh_token } = await api.post('/api/v1/register', { email, password })
+      api.setToken(access_token, false, refresh_token)
       const me = await api.get('/api/v1/me')
       setUser(me)
       return { ok: true, user: me }
@@ -37,6 +37,8 @@ export function AuthProvider({ children }) {
 
   // 🚪 Cerrar sesión
   const logout = () => {
+    // Revoca los tokens en el servidor; si falla, al menos se olvidan aquí
+    if (api.token) api.post('/api/v1/logout').catch(() => {})
     api.clearToken()
     setUser(null)
   }
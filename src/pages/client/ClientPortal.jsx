@@ -196,7 +196,8 @@ export default function ClientPortal() {
 
       if (f && f.family_members_data) {
         try {
-          setFamilyMembers(JSON.parse(f.family_members_data));
+          const members = f.family_members_data;
+          setFamilyMembers(typeof members === 'string' ? JSON.parse(members) : members);
         } catch (e) { }
       }
 
@@ -100,6 +100,8 @@ export default function IntakeForm() {
   const [loading, setLoading] = React.useState(false)
   const [saving, setSaving] = React.useState(false)
   const [isFamily, setIsFamily] = React.useState(false)
+  // Versión del formulario en el servidor (autoguardado con bloqueo optimista)
+  const versionRef = React.useRef(null)
 
   // Cargar datos existentes del formulario y perfil
   React.useEffect(() => {
@@ -123,11 +125,14 @@ export default function IntakeForm() {
     try {
       const formData = await api.forms.getMy()
       if (formData) {
+        versionRef.current = formData.version
         let family = [], edu = [], work = [], parents = {}, travel = [], relatives = [];
-        try { family = formData.family_members_data ? JSON.parse(formData.family_members_data) : [] } catch (e) { }
-        try { edu = formData.education_data ? JSON.parse(formData.education_data) : [] } catch (e) { }
-        try { work = formData.work_data ? JSON.parse(formData.work_data) : [] } catch (e) { }
-        try { parents = formData.parents_data ? JSON.parse(formData.parents_data) : {} } catch (e) { }
+        // Las secciones llegan como JSON nativo; se aceptan strings de versiones anteriores
+        const section = (value) => (typeof value === 'string' ? JSON.parse(value) : value)
+        try { family = section(formData.family_members_data) || [] } catch (e) { }
+        try { edu = section(formData.education_data) || [] } catch (e) { }
+        try { work = section(formData.work_data) || [] } catch (e) { }
+        try { parents = section(formData.parents_data) || {} } catch (e) { }
 
         try { travel = formData.viajes && formData.viajes.startsWith('[') ? JSON.parse(formData.viajes) : [] } catch (e) { }
         try { relatives = formData.familiares_exterior && formData.familiares_exterior.startsWith('[') ? JSON.parse(formData.familiares_exterior) : [] } catch (e) { }
@@ -168,13 +173,13 @@ export default function IntakeForm() {
         nacionalidad: data.nacionalidad,
         pasaporte: data.pasaporte,
 
-        education_data: JSON.stringify(data.educationHistory || []),
-        work_data: JSON.stringify(data.workHistory || []),
-        parents_data: JSON.stringify({ padre: data.padre, madre: data.madre }),
+        education_data: data.educationHistory || [],
+        work_data: data.workHistory || [],
+        parents_data: { padre: data.padre, madre: data.madre },
 
         viajes: JSON.stringify(data.travelHistory || []),
         familiares_exterior: JSON.stringify(data.relativesHistory || []),
-        family_members_data: JSON.stringify(data.familyMembers || []),
+        family_members_data: data.familyMembers || [],
         is_completed: isCompleted,
       }
 
@@ -185,10 +190,20 @@ export default function IntakeForm() {
         } catch (e) { console.error("Could not update profile type", e); }
       }
 
-      await api.forms.createOrUpdate(formData)
+      if (!isCompleted && versionRef.current != null) {
+        // Pasos intermedios: autoguardado agrupado en el servidor
+        const { is_completed, ...changes } = formData
+        const res = await api.forms.autosave({ version: versionRef.current, changes })
+        versionRef.current = res.version
+      } else {
+        const saved = await api.forms.createOrUpdate(formData)
+        versionRef.current = saved.version
+      }
       toast.success(isCompleted ? 'Formulario enviado exitosamente' : 'Progreso guardado')
     } catch (error) {
       toast.error('Error al guardar: ' + error.message)
+      // Versión desactualizada (otra pestaña o dispositivo): recargar los datos
+      if (error.status === 409) loadFormData()
       throw error
     } finally {
       setSaving(false)
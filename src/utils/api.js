@@ -2,34 +2,74 @@
 const BASE_URL = import.meta.env.VITE_API_URL || 'https://xiomara01-backend.ungd4w.easypanel.host';
 
 export const api = {
-  setToken(token, persist = false) {
+  setToken(token, persist = false, refreshToken = null) {
     // persist: true → localStorage; false → sessionStorage
-    if (persist) {
-      localStorage.setItem('token', token);
-      sessionStorage.removeItem('token');
-    } else {
-      sessionStorage.setItem('token', token);
-      localStorage.removeItem('token');
+    const [store, other] = persist ? [localStorage, sessionStorage] : [sessionStorage, localStorage];
+    store.setItem('token', token);
+    other.removeItem('token');
+    if (refreshToken) {
+      store.setItem('refresh_token', refreshToken);
+      other.removeItem('refresh_token');
     }
   },
   clearToken() {
-    localStorage.removeItem('token');
-    sessionStorage.removeItem('token');
+    for (const store of [localStorage, sessionStorage]) {
+      store.removeItem('token');
+      store.removeItem('refresh_token');
+    }
   },
   get token() {
     return localStorage.getItem('token') || sessionStorage.getItem('token');
   },
+  get refreshToken() {
+    return localStorage.getItem('refresh_token') || sessionStorage.getItem('refresh_token');
+  },
+
+  // El access token dura poco: ante un 401 se pide un par nuevo una sola vez
+  async refresh() {
+    const refreshToken = this.refreshToken;
+    if (!refreshToken) return false;
+    if (!this._refreshing) {
+      this._refreshing = fetch(`${BASE_URL}/api/v1/refresh`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ refresh_token: refreshToken }),
+      })
+        .then(async (res) => {
+          if (!res.ok) {
+            this.clearToken();
+            return false;
+          }
+          const data = await res.json();
+          this.setToken(data.access_token, !!localStorage.getItem('refresh_token'), data.refresh_token);
+          return true;
+        })
+        .catch(() => false)
+        .finally(() => { this._refreshing = null; });
+    }
+    return this._refreshing;
+  },
+  async fetchWithRefresh(path, options = {}) {
+    let res = await fetch(`${BASE_URL}${path}`, options);
+    if (res.status === 401 && options.headers?.Authorization && await this.refresh()) {
+      const headers = { ...options.headers, Authorization: `Bearer ${this.token}` };
+      res = await fetch(`${BASE_URL}${path}`, { ...options, headers });
+    }
+    return res;
+  },
   headers(extra = {}) {
     const h = { 'Content-Type': 'application/json', ...extra };
     if (this.token) h.Authorization = `Bearer ${this.token}`;
     return h;
   },
   async json(path, options = {}) {
-    const res = await fetch(`${BASE_URL}${path}`, options);
+    const res = await this.fetchWithRefresh(path, options);
     if (!res.ok) {
       const error = await res.json().catch(() => ({ detail: 'Error desconocido' }));
-      throw new Error(error.detail || 'Error en la petición');
+      // status permite distinguir casos (409 = versión desactualizada) sin leer el texto
+      throw Object.assign(new Error(error.detail || 'Error en la petición'), { status: res.status });
     }
+    if (res.status === 204) return null;
     return res.json();
   },
 
@@ -69,10 +109,10 @@ export const api = {
   async upload(path, formData) {
     const headers = {};
     if (this.token) headers.Authorization = `Bearer ${this.token}`;
-    const res = await fetch(`${BASE_URL}${path}`, { method: 'POST', headers, body: formData });
+    const res = await this.fetchWithRefresh(path, { method: 'POST', headers, body: formData });
     if (!res.ok) {
       const error = await res.json().catch(() => ({ detail: 'Error al subir archivo' }));
-      throw new Error(error.detail || 'Error al subir archivo');
+      throw Object.assign(new Error(error.detail || 'Error al subir archivo'), { status: res.status });
     }
     return res.json();
   },
@@ -114,6 +154,7 @@ export const api = {
     createOrUpdate: (data) => api.post('/api/v1/forms', data),
     getMy: () => api.get('/api/v1/forms/me'),
     updateMy: (data) => api.put('/api/v1/forms/me', data),
+    autosave: (data) => api.put('/api/v1/forms/me/autosave', data),
     getAll: (params = {}) => {
       const query = new URLSearchParams(params).toString();
       return api.get(`/api/v1/forms/admin/all${query ? '?' + query : ''}`);